@@ -0,0 +1,75 @@
+"""Tarefas de manutenção do banco executadas em segundo plano.
+
+O `AgendadorDiario` roda uma tarefa uma vez por dia, no horário configurado,
+em uma thread do próprio processo do Streamlit. Quando há vários processos
+(workers ou réplicas), apenas o que detém a concessão de liderança da tarefa
+(tabela agendador_lider, função adquirir_lideranca) a executa; a concessão é
+renovada a cada verificação e expira se o processo parar.
+
+Uso atual: DatabaseManager.manutencao_diaria, que marca como VENCIDA as parcelas
+pendentes cujo vencimento passou e descarta os registros de exclusão antigos da
+sincronização incremental.
+"""
+import atexit
+import os
+import socket
+import threading
+import uuid
+from datetime import date, datetime, time
+from typing import Callable, Optional
+
+
+class AgendadorDiario:
+    """Executa `tarefa` diariamente a partir de `horario`, apenas no processo líder"""
+
+    def __init__(self, nome: str, tarefa: Callable[[], None], adquirir_lideranca: Callable[[str, str, int], bool],
+                 horario: time = time(0, 5), verificacao: float = 300.0):
+        self.nome = nome
+        self.tarefa = tarefa
+        self.adquirir_lideranca = adquirir_lideranca
+        self.horario = horario
+        self.verificacao = verificacao
+        # Identifica este processo na concessão de liderança
+        self.dono = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.ultima_execucao: Optional[date] = None
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def iniciar(self):
+        """Inicia a thread (chamadas repetidas não têm efeito)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._executar, name=f'agendador-{self.nome}', daemon=True)
+            self._thread.start()
+        atexit.register(self.parar)
+
+    def parar(self):
+        self._parar.set()
+
+    def _lider(self) -> bool:
+        # A concessão dura algumas verificações, tolerando atrasos na renovação
+        try:
+            return bool(self.adquirir_lideranca(self.nome, self.dono, max(1, int(self.verificacao * 3))))
+        except Exception as e:
+            print(f"Erro ao verificar liderança do agendador '{self.nome}': {e}")
+            return False
+
+    def _pendente(self, agora: datetime) -> bool:
+        """A execução do dia ainda não ocorreu e o horário já passou (ou nunca executou)"""
+        if self.ultima_execucao is None:
+            return True
+        return self.ultima_execucao < agora.date() and agora.time() >= self.horario
+
+    def _executar(self):
+        while not self._parar.is_set():
+            agora = datetime.now()
+            # A concessão é renovada a cada verificação, mesmo sem execução pendente
+            if self._lider() and self._pendente(agora):
+                try:
+                    self.tarefa()
+                    self.ultima_execucao = agora.date()
+                except Exception as e:
+                    print(f"Erro na tarefa agendada '{self.nome}': {e}")
+            self._parar.wait(self.verificacao)
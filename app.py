@@ -1,5 +1,5 @@
 import streamlit as st
-from auth import AuthManager
+from auth import obter_auth_manager
 
 # Configuração da página
 st.set_page_config(
@@ -10,7 +10,7 @@ st.set_page_config(
 )
 
 # Verificar autenticação
-auth = AuthManager()
+auth = obter_auth_manager()
 
 # Se não estiver logado, redirecionar para login
 if not auth.is_logged_in():
@@ -0,0 +1,155 @@
+"""Gravação em segundo plano dos logs de auditoria (logs_sistema).
+
+Cada ação do usuário gerava um INSERT síncrono em logs_sistema antes de a
+página responder. O `GravadorLogs` enfileira os registros em memória e uma
+thread os grava em lotes (INSERT de várias linhas) quando o lote enche ou o
+intervalo de tempo expira.
+
+Registros que não puderem ser gravados (fila cheia ou falha no banco) vão para
+um arquivo JSONL de pendentes, reenviado na próxima gravação bem-sucedida e na
+inicialização. No encerramento normal do processo a fila é descarregada; se o
+processo for morto (SIGKILL, falta de memória, timeout de parada do contêiner),
+os registros ainda na fila, no máximo `intervalo` segundos de ações, se perdem
+(ver LOG_ASSINCRONO em config.py).
+
+Todo registro é normalizado para as mesmas colunas (`COLUNAS_LOG`, ausentes como
+None): o INSERT de várias linhas do PostgREST exige as mesmas chaves em todas.
+"""
+import atexit
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+# Colunas gravadas em logs_sistema (id e as demais ficam com o padrão do banco)
+COLUNAS_LOG = ('usuario_id', 'acao', 'tabela_afetada', 'registro_id', 'dados_anteriores', 'dados_novos',
+               'ip_address', 'user_agent', 'created_at')
+
+
+def normalizar_log(log_data: Dict) -> Dict:
+    """Registro com exatamente as colunas de COLUNAS_LOG; created_at em UTC se ausente"""
+    registro = {coluna: log_data.get(coluna) for coluna in COLUNAS_LOG}
+    if registro['created_at'] is None:
+        registro['created_at'] = datetime.now(timezone.utc).isoformat()
+    return registro
+
+
+class GravadorLogs:
+    """Fila limitada de logs gravada em lotes por uma thread em segundo plano"""
+
+    def __init__(self, cliente, lote: int = 50, intervalo: float = 2.0, max_fila: int = 10000,
+                 arquivo_pendentes: Optional[str] = None, ao_gravar: Optional[Callable[[], None]] = None):
+        self.cliente = cliente
+        self.lote = max(1, lote)
+        self.intervalo = intervalo
+        self.max_fila = max_fila
+        self.arquivo_pendentes = arquivo_pendentes
+        self.ao_gravar = ao_gravar
+        self._fila: deque = deque()
+        self._cond = threading.Condition()
+        self._lock_arquivo = threading.Lock()
+        self._parar = False
+        self._thread: Optional[threading.Thread] = None
+
+    def _iniciar(self):
+        """Inicia a thread na primeira utilização (chamado com _cond adquirido)"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._executar, name='gravador-logs', daemon=True)
+        self._thread.start()
+        atexit.register(self.encerrar)
+
+    def registrar(self, log_data: Dict):
+        """Enfileira um log sem bloquear; o horário é o do registro, não o da gravação"""
+        registro = normalizar_log(log_data)
+        with self._cond:
+            self._iniciar()
+            if len(self._fila) >= self.max_fila:
+                cheia = True
+            else:
+                cheia = False
+                self._fila.append(registro)
+                if len(self._fila) >= self.lote:
+                    self._cond.notify()
+        if cheia:
+            self._salvar_pendentes([registro])
+
+    def pendentes(self) -> int:
+        with self._cond:
+            return len(self._fila)
+
+    def _retirar(self, quantidade: Optional[int] = None) -> List[Dict]:
+        quantidade = len(self._fila) if quantidade is None else min(quantidade, len(self._fila))
+        return [self._fila.popleft() for _ in range(quantidade)]
+
+    def _executar(self):
+        self._reenviar_pendentes()
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._parar or len(self._fila) >= self.lote, timeout=self.intervalo)
+                if self._parar:
+                    return
+                lote = self._retirar(self.lote)
+            if lote:
+                self._gravar(lote)
+
+    def _gravar(self, lote: List[Dict]) -> bool:
+        try:
+            self.cliente.table('logs_sistema').insert(lote).execute()
+        except Exception as e:
+            print(f"Erro ao gravar {len(lote)} log(s); mantidos em disco: {e}")
+            self._salvar_pendentes(lote)
+            return False
+        if self.ao_gravar:
+            self.ao_gravar()
+        if self.arquivo_pendentes and os.path.exists(self.arquivo_pendentes):
+            self._reenviar_pendentes()
+        return True
+
+    def descarregar(self):
+        """Grava imediatamente tudo o que está na fila (na thread chamadora)"""
+        with self._cond:
+            registros = self._retirar()
+        for inicio in range(0, len(registros), self.lote):
+            self._gravar(registros[inicio:inicio + self.lote])
+
+    def encerrar(self, timeout: float = 5.0):
+        """Para a thread e descarrega a fila (registrado em atexit)"""
+        with self._cond:
+            self._parar = True
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self.descarregar()
+
+    # Arquivo de pendentes
+    def _salvar_pendentes(self, registros: List[Dict]):
+        if not self.arquivo_pendentes:
+            print(f"⚠️ {len(registros)} log(s) descartado(s): arquivo de pendentes não configurado")
+            return
+        with self._lock_arquivo:
+            with open(self.arquivo_pendentes, 'a', encoding='utf-8') as f:
+                for registro in registros:
+                    f.write(json.dumps(registro, ensure_ascii=False, default=str) + '\n')
+
+    def _reenviar_pendentes(self):
+        if not self.arquivo_pendentes:
+            return
+        with self._lock_arquivo:
+            if not os.path.exists(self.arquivo_pendentes):
+                return
+            with open(self.arquivo_pendentes, encoding='utf-8') as f:
+                registros = [normalizar_log(json.loads(linha)) for linha in f if linha.strip()]
+            os.remove(self.arquivo_pendentes)
+        for inicio in range(0, len(registros), self.lote):
+            lote = registros[inicio:inicio + self.lote]
+            try:
+                self.cliente.table('logs_sistema').insert(lote).execute()
+            except Exception as e:
+                print(f"Erro ao reenviar logs pendentes: {e}")
+                self._salvar_pendentes(registros[inicio:])
+                return
+        if registros and self.ao_gravar:
+            self.ao_gravar()
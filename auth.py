@@ -1,14 +1,18 @@
 import streamlit as st
 import hashlib
 import secrets
+import time
 from datetime import datetime, timedelta
-from database import DatabaseManager
-from config import supabase
+from database import obter_database_manager
+from config import supabase, USUARIO_SESSAO_TTL_SEGUNDOS
 from typing import Optional, Dict
 
+# Chave do st.session_state com o registro do usuário logado
+CHAVE_USUARIO_SESSAO = 'usuario_atual'
+
 class AuthManager:
     def __init__(self):
-        self.db = DatabaseManager()
+        self.db = obter_database_manager()
         try:
             import streamlit as st
             self.codigo_cadastro = st.secrets.get('ACCESS_CODE') or os.getenv('ACCESS_CODE') or "Easy2025"
@@ -29,16 +33,35 @@ class AuthManager:
         return 'user_id' in st.session_state and 'session_token' in st.session_state
     
     def get_current_user(self) -> Optional[Dict]:
-        """Retorna dados do usuário atual"""
+        """Retorna dados do usuário atual (guardados na sessão por até USUARIO_SESSAO_TTL_SEGUNDOS)"""
         if not self.is_logged_in():
             return None
         
+        user_id = st.session_state.user_id
+        # Qualquer escrita em usuarios (update_usuario, delete_usuario) muda a versão
+        versao = self.db.cache.versao('usuarios')
+        entrada = st.session_state.get(CHAVE_USUARIO_SESSAO)
+        if (entrada and entrada['id'] == user_id and entrada['versao'] == versao
+                and time.monotonic() < entrada['expira']):
+            return entrada['dados']
+        
         try:
-            user_id = st.session_state.user_id
             usuario = self.db.get_usuario_by_id(user_id)
-            return usuario
         except:
             return None
+        self._guardar_usuario_sessao(usuario, versao)
+        return usuario
+    
+    def _guardar_usuario_sessao(self, usuario: Optional[Dict], versao: int):
+        if not usuario:
+            st.session_state.pop(CHAVE_USUARIO_SESSAO, None)
+            return
+        st.session_state[CHAVE_USUARIO_SESSAO] = {
+            'id': usuario['id'],
+            'dados': usuario,
+            'versao': versao,
+            'expira': time.monotonic() + USUARIO_SESSAO_TTL_SEGUNDOS,
+        }
     
     def login(self, email: str, senha: str) -> bool:
         """Realiza login via Supabase Auth usando email/senha e sincroniza com tabela usuarios"""
@@ -74,6 +97,7 @@ class AuthManager:
             st.session_state.session_token = self.generate_session_token()
             st.session_state.user_name = usuario['nome']
             st.session_state.user_role = usuario['funcao']
+            self._guardar_usuario_sessao(usuario, self.db.cache.versao('usuarios'))
 
             # Log da ação
             self.log_action('LOGIN', 'usuarios', usuario['id'], 
@@ -156,7 +180,7 @@ class AuthManager:
                           {'user_name': st.session_state.get('user_name')}, {})
             
             # Limpar sessão
-            for key in ['user_id', 'session_token', 'user_name', 'user_role']:
+            for key in ['user_id', 'session_token', 'user_name', 'user_role', CHAVE_USUARIO_SESSAO]:
                 if key in st.session_state:
                     del st.session_state[key]
     
@@ -191,3 +215,9 @@ class AuthManager:
         if not self.is_logged_in():
             return False
         return st.session_state.get('user_role') == 'Administrador'
+
+
+@st.cache_resource
+def obter_auth_manager() -> AuthManager:
+    """AuthManager único por processo (o estado de cada usuário fica em st.session_state)"""
+    return AuthManager()
@@ -0,0 +1,961 @@
+"""Backend local (SQLite) com a mesma interface do cliente Supabase usada no projeto.
+
+Permite rodar o app, benchmarks e testes de carga sem o serviço real. O
+esquema é montado a partir dos scripts setup_*.sql (traduzidos para SQLite)
+e o cliente expõe o subconjunto do query builder do PostgREST usado em
+database.py: table().select/insert/update/upsert/delete, filtros, ordenação,
+paginação, selects embutidos (ex.: '*, notas(*)'), views e rpc(). Alterações
+nas tabelas podem ser assinadas com on_change (equivalente em processo ao Realtime).
+
+Ative com DB_BACKEND=local (e opcionalmente LOCAL_DB_PATH=arquivo.db).
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from itertools import groupby
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Scripts de esquema, na ordem em que devem ser aplicados
+SCRIPTS_ESQUEMA = ['setup_supabase.sql', 'setup_fornecedores.sql', 'setup_usuarios.sql']
+# Views, índices e funções idempotentes, reaplicados a cada abertura do banco
+SCRIPTS_OTIMIZACAO = ['setup_otimizacoes.sql']
+
+# Colunas e views que existem na instância do Supabase mas não nos scripts
+ESQUEMA_COMPLEMENTAR = """
+ALTER TABLE usuarios ADD COLUMN email VARCHAR(255);
+ALTER TABLE parcelas ADD COLUMN status_material VARCHAR(20) DEFAULT 'ESTOQUE';
+
+CREATE VIEW IF NOT EXISTS vw_total_de_notas AS
+    SELECT COALESCE(SUM(valor_total), 0) AS total_de_notas FROM notas;
+
+CREATE VIEW IF NOT EXISTS vw_resumo_notas_parcelas AS
+    SELECT
+        COALESCE((SELECT SUM(valor) FROM parcelas WHERE status_material = 'ESTOQUE'), 0) AS total_em_estoque,
+        COALESCE((SELECT SUM(valor) FROM parcelas WHERE status_material = 'EM_USO'), 0) AS total_em_uso,
+        COALESCE((SELECT SUM(valor_total) FROM notas), 0) AS total_de_notas,
+        COALESCE((SELECT SUM(valor) FROM parcelas WHERE status <> 'PAGA'), 0) AS total_a_pagar;
+"""
+
+# Comandos específicos do Postgres que não têm equivalente local
+_IGNORAR = ('COMMENT ON', 'CREATE POLICY', 'CREATE TRIGGER', 'DROP FUNCTION', 'DROP TRIGGER', 'GRANT', 'REVOKE')
+
+_AGORA = "(strftime('%Y-%m-%dT%H:%M:%f', 'now'))"
+
+# Limite de parâmetros por comando do SQLite (SQLITE_MAX_VARIABLE_NUMBER)
+MAX_VARIAVEIS = 32000
+
+# Contribuição de uma linha de parcelas para cada coluna de kpis_resumo ({r}: NEW ou OLD)
+_KPIS_PARCELA = {
+    'total_parcelas': "1",
+    'parcelas_pagas': "CASE WHEN {r}.status = 'PAGA' THEN 1 ELSE 0 END",
+    'parcelas_pendentes': "CASE WHEN {r}.status = 'PENDENTE' THEN 1 ELSE 0 END",
+    'parcelas_vencidas': "CASE WHEN {r}.status = 'VENCIDA' THEN 1 ELSE 0 END",
+    'valor_pago': "CASE WHEN {r}.status = 'PAGA' THEN COALESCE({r}.valor, 0) ELSE 0 END",
+    'valor_pendente': "CASE WHEN {r}.status = 'PENDENTE' THEN COALESCE({r}.valor, 0) ELSE 0 END",
+    'valor_vencido': "CASE WHEN {r}.status = 'VENCIDA' THEN COALESCE({r}.valor, 0) ELSE 0 END",
+}
+_KPIS_NOTA = {
+    'total_notas': "1",
+    'valor_total': "COALESCE({r}.valor_total, 0)",
+}
+
+
+# Deltas de kpis_resumo registrados pelos gatilhos locais até o fim do comando
+TABELA_KPIS_DELTA = "CREATE TABLE IF NOT EXISTS kpis_delta (" + ', '.join(
+    f"{coluna} REAL NOT NULL DEFAULT 0" for coluna in list(_KPIS_NOTA) + list(_KPIS_PARCELA)) + ")"
+
+
+def _gatilhos_kpis(tabela: str, contribuicoes: Dict[str, str], colunas_update: Tuple[str, ...]) -> List[str]:
+    """Equivalentes locais dos gatilhos por comando de kpis_resumo (setup_otimizacoes.sql).
+    
+    O SQLite não tem gatilhos FOR EACH STATEMENT: cada linha registra sua contribuição em
+    kpis_delta e o cliente a soma em kpis_resumo com um único UPDATE ao fim de cada comando
+    (LocalClient._aplicar_kpis). Nas atualizações, só as linhas em que alguma das
+    `colunas_update` mudou.
+    """
+    colunas = ', '.join(contribuicoes)
+    gatilhos = []
+    for evento, termos in (('INSERT', [('', 'NEW')]), ('DELETE', [('-', 'OLD')]),
+                           ('UPDATE', [('-', 'OLD'), ('', 'NEW')])):
+        nome = f"kpis_{tabela}_{evento.lower()}"
+        quando = ''
+        if evento == 'UPDATE':
+            quando = ' WHEN ' + ' OR '.join(f"OLD.{c} IS NOT NEW.{c}" for c in colunas_update)
+        registros = ' '.join(
+            f"INSERT INTO kpis_delta ({colunas}) VALUES "
+            f"({', '.join(f'{sinal}({expr.format(r=r)})' for expr in contribuicoes.values())});"
+            for sinal, r in termos)
+        # Recriados a cada abertura: bancos em arquivo podem ter a versão anterior do gatilho
+        gatilhos += [f"DROP TRIGGER IF EXISTS {nome}",
+                     f"CREATE TRIGGER {nome} AFTER {evento} ON {tabela}{quando} BEGIN {registros} END"]
+    return gatilhos
+
+
+_STATUS_POR_VENCIMENTO = "CASE WHEN NEW.data_vencimento < date('now') THEN 'VENCIDA' ELSE 'PENDENTE' END"
+
+
+def _gatilho_status_parcela(evento: str) -> str:
+    """Equivalente local de normalizar_status_parcela (o SQLite não altera NEW em gatilhos BEFORE)"""
+    nome = f"normalizar_status_parcela_{evento.split()[0].lower()}"
+    return (f"CREATE TRIGGER IF NOT EXISTS {nome} AFTER {evento} ON parcelas "
+            f"WHEN NEW.status IN ('PENDENTE', 'VENCIDA') AND NEW.status <> {_STATUS_POR_VENCIMENTO} BEGIN "
+            f"UPDATE parcelas SET status = {_STATUS_POR_VENCIMENTO} WHERE id = NEW.id; END")
+
+
+# Tabelas com updated_at e registro de exclusões (função alteracoes_desde)
+TABELAS_SINCRONIZADAS = ('notas', 'parcelas', 'fornecedores')
+
+
+def _gatilhos_sincronizacao(tabela: str) -> List[str]:
+    """Equivalentes locais de definir_updated_at e registrar_exclusoes.
+    
+    A coluna updated_at é criada sem valor padrão (ver LocalClient._adicionar_coluna),
+    por isso a inclusão também a preenche.
+    """
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS updated_at_{tabela}_insert AFTER INSERT ON {tabela} "
+        f"WHEN NEW.updated_at IS NULL BEGIN UPDATE {tabela} SET updated_at = {_AGORA} WHERE id = NEW.id; END",
+        f"CREATE TRIGGER IF NOT EXISTS updated_at_{tabela}_update AFTER UPDATE ON {tabela} "
+        f"WHEN NEW.updated_at IS OLD.updated_at BEGIN UPDATE {tabela} SET updated_at = {_AGORA} WHERE id = NEW.id; END",
+        f"CREATE TRIGGER IF NOT EXISTS exclusoes_{tabela} AFTER DELETE ON {tabela} BEGIN "
+        f"INSERT INTO registros_excluidos (tabela, registro_id) VALUES ('{tabela}', OLD.id); END",
+    ]
+
+
+# Os gatilhos plpgsql não são traduzidos: estes mantêm kpis_resumo, o status das parcelas,
+# updated_at e os registros de exclusão
+GATILHOS_LOCAIS = [
+    TABELA_KPIS_DELTA,
+    *_gatilhos_kpis('parcelas', _KPIS_PARCELA, ('status', 'valor')),
+    *_gatilhos_kpis('notas', _KPIS_NOTA, ('valor_total',)),
+] + [
+    _gatilho_status_parcela(evento) for evento in ('INSERT', 'UPDATE OF status, data_vencimento')
+] + [
+    gatilho for tabela in TABELAS_SINCRONIZADAS for gatilho in _gatilhos_sincronizacao(tabela)
+]
+
+# ALTER TABLE ... ADD COLUMN IF NOT EXISTS (sem equivalente direto no SQLite)
+_NOVA_COLUNA = re.compile(
+    r'ALTER\s+TABLE\s+(\w+)\s+ADD\s+COLUMN\s+IF\s+NOT\s+EXISTS\s+(\w+)\s+(\w+)(?:.*?\bDEFAULT\s+(.+))?$',
+    re.IGNORECASE | re.DOTALL)
+
+
+def traduzir_sql(sql: str) -> List[str]:
+    """Converte um script Postgres dos setup_*.sql em comandos SQLite"""
+    sql = re.sub(r'--[^\n]*', '', sql)
+    # Funções plpgsql são implementadas em Python (ver FUNCOES_RPC)
+    sql = re.sub(r'CREATE\s+(OR\s+REPLACE\s+)?FUNCTION.*?\$\$\s*LANGUAGE\s+\w+[^;]*;', '', sql,
+                 flags=re.DOTALL | re.IGNORECASE)
+    # Blocos anônimos (DO $$ ... $$) só fazem sentido no Postgres
+    sql = re.sub(r'\bDO\s+\$\$.*?\$\$\s*;', '', sql, flags=re.DOTALL | re.IGNORECASE)
+    sql = re.sub(r'\bpublic\.', '', sql)
+    sql = re.sub(r'CREATE\s+OR\s+REPLACE\s+VIEW\s+(\w+)', r'DROP VIEW IF EXISTS \1; CREATE VIEW \1', sql,
+                 flags=re.IGNORECASE)
+    sql = re.sub(r'\bSERIAL\s+PRIMARY\s+KEY\b', 'INTEGER PRIMARY KEY AUTOINCREMENT', sql, flags=re.IGNORECASE)
+    sql = re.sub(r'\bBIGSERIAL\b|\bSERIAL\b', 'INTEGER', sql, flags=re.IGNORECASE)
+    sql = re.sub(r'TIMESTAMP\s+WITH(OUT)?\s+TIME\s+ZONE', 'TIMESTAMP', sql, flags=re.IGNORECASE)
+    sql = re.sub(r'\bNOW\(\)', _AGORA, sql, flags=re.IGNORECASE)
+
+    comandos = []
+    for comando in sql.split(';'):
+        comando = comando.strip()
+        if not comando:
+            continue
+        maiusculo = ' '.join(comando.upper().split())
+        if maiusculo.startswith(_IGNORAR) or 'ROW LEVEL SECURITY' in maiusculo:
+            continue
+        comandos.append(comando)
+    return comandos
+
+
+def _dividir_select(select: str) -> List[str]:
+    """Divide a lista de colunas do select no nível superior (respeitando parênteses)"""
+    itens, atual, nivel = [], [], 0
+    for ch in select:
+        if ch == '(':
+            nivel += 1
+        elif ch == ')':
+            nivel -= 1
+        if ch == ',' and nivel == 0:
+            itens.append(''.join(atual).strip())
+            atual = []
+        else:
+            atual.append(ch)
+    if ''.join(atual).strip():
+        itens.append(''.join(atual).strip())
+    return [' '.join(i.split()) for i in itens if i]
+
+
+def _parse_select(select: str) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """Retorna (colunas, [(tabela_embutida, select_embutido)])"""
+    colunas, embutidos = [], []
+    for item in _dividir_select(select or '*'):
+        m = re.match(r'^(\w+)(?:!\w+)?\s*\((.*)\)$', item, flags=re.DOTALL)
+        if m:
+            embutidos.append((m.group(1), m.group(2)))
+        else:
+            colunas.append(item)
+    return colunas or ['*'], embutidos
+
+
+def _codificar(valor):
+    if isinstance(valor, (dict, list)):
+        return json.dumps(valor, default=str)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, bool):
+        return int(valor)
+    return valor
+
+
+class LocalResponse:
+    """Equivalente ao APIResponse do postgrest-py"""
+
+    def __init__(self, data, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+    def __repr__(self):
+        return f"LocalResponse(data={self.data!r}, count={self.count!r})"
+
+
+class LocalQuery:
+    """Query builder compatível com o subconjunto do PostgREST usado no projeto"""
+
+    def __init__(self, client: 'LocalClient', tabela: str):
+        self.client = client
+        self.tabela = tabela
+        self._operacao = 'select'
+        self._select = '*'
+        self._count = None
+        self._dados = None
+        self._on_conflict = None
+        self._filtros: List[Tuple[str, list]] = []
+        self._ordens: List[Tuple[str, bool]] = []
+        self._ordens_embutidas: Dict[str, List[Tuple[str, bool]]] = {}
+        self._limite: Optional[int] = None
+        self._deslocamento: Optional[int] = None
+
+    # Operações
+    def select(self, *colunas: str, count: Optional[str] = None):
+        self._operacao = 'select'
+        self._select = ','.join(colunas) if colunas else '*'
+        self._count = count
+        return self
+
+    def insert(self, dados, **_):
+        self._operacao, self._dados = 'insert', dados
+        return self
+
+    def upsert(self, dados, on_conflict: str = 'id', **_):
+        self._operacao, self._dados, self._on_conflict = 'upsert', dados, on_conflict
+        return self
+
+    def update(self, dados, **_):
+        self._operacao, self._dados = 'update', dados
+        return self
+
+    def delete(self, **_):
+        self._operacao = 'delete'
+        return self
+
+    # Filtros
+    def _filtro(self, sql: str, *params):
+        self._filtros.append((sql, [_codificar(p) for p in params]))
+        return self
+
+    def eq(self, coluna: str, valor):
+        return self._filtro(f'"{coluna}" = ?', valor)
+
+    def neq(self, coluna: str, valor):
+        return self._filtro(f'"{coluna}" <> ?', valor)
+
+    def gt(self, coluna: str, valor):
+        return self._filtro(f'"{coluna}" > ?', valor)
+
+    def gte(self, coluna: str, valor):
+        return self._filtro(f'"{coluna}" >= ?', valor)
+
+    def lt(self, coluna: str, valor):
+        return self._filtro(f'"{coluna}" < ?', valor)
+
+    def lte(self, coluna: str, valor):
+        return self._filtro(f'"{coluna}" <= ?', valor)
+
+    def like(self, coluna: str, padrao: str):
+        return self._filtro(f'"{coluna}" GLOB ?', padrao.replace('%', '*').replace('_', '?'))
+
+    def ilike(self, coluna: str, padrao: str):
+        return self._filtro(f'LOWER("{coluna}") LIKE LOWER(?)', padrao)
+
+    def in_(self, coluna: str, valores):
+        valores = list(valores)
+        if not valores:
+            return self._filtro('0')
+        return self._filtro(f'"{coluna}" IN ({", ".join("?" * len(valores))})', *valores)
+
+    def is_(self, coluna: str, valor):
+        if valor is None or str(valor).lower() == 'null':
+            return self._filtro(f'"{coluna}" IS NULL')
+        return self._filtro(f'"{coluna}" = ?', str(valor).lower() == 'true')
+
+    # Ordenação e paginação
+    def order(self, coluna: str, desc: bool = False, nullsfirst: bool = False, foreign_table: Optional[str] = None):
+        if foreign_table:
+            self._ordens_embutidas.setdefault(foreign_table, []).append((coluna, desc))
+        else:
+            self._ordens.append((coluna, desc))
+        return self
+
+    def limit(self, quantidade: int, foreign_table: Optional[str] = None):
+        self._limite = quantidade
+        return self
+
+    def offset(self, quantidade: int):
+        self._deslocamento = quantidade
+        return self
+
+    def range(self, inicio: int, fim: int, foreign_table: Optional[str] = None):
+        self._deslocamento = inicio
+        self._limite = fim - inicio + 1
+        return self
+
+    def _where(self) -> Tuple[str, list]:
+        if not self._filtros:
+            return '', []
+        params = [p for _, ps in self._filtros for p in ps]
+        return ' WHERE ' + ' AND '.join(f'({sql})' for sql, _ in self._filtros), params
+
+    def execute(self) -> LocalResponse:
+        with self.client.lock:
+            if self._operacao == 'select':
+                return self._executar_select()
+            resposta = self._executar_escrita()
+        self.client._notificar_alteracoes()
+        return resposta
+
+    def _executar_select(self) -> LocalResponse:
+        where, params = self._where()
+        sql = f'SELECT * FROM "{self.tabela}"{where}'
+        if self._ordens:
+            sql += ' ORDER BY ' + ', '.join(f'"{c}" {"DESC" if d else "ASC"}' for c, d in self._ordens)
+        if self._limite is not None or self._deslocamento:
+            sql += f' LIMIT {self._limite if self._limite is not None else -1} OFFSET {self._deslocamento or 0}'
+        linhas = self.client._consultar(self.tabela, sql, params)
+        linhas = self.client._projetar(self.tabela, linhas, self._select, self._ordens_embutidas)
+
+        count = None
+        if self._count:
+            count = self.client.conn.execute(f'SELECT COUNT(*) FROM "{self.tabela}"{where}', params).fetchone()[0]
+        return LocalResponse(linhas, count)
+
+    def _sql_insert(self, colunas: Tuple[str, ...], quantidade: int) -> str:
+        nomes = ', '.join(f'"{c}"' for c in colunas)
+        linha = '(' + ', '.join('?' * len(colunas)) + ')'
+        sql = f'INSERT INTO "{self.tabela}" ({nomes}) VALUES ' + ', '.join([linha] * quantidade)
+        if self._operacao == 'upsert':
+            atualizar = [c for c in colunas if c != self._on_conflict]
+            if atualizar:
+                sets = ', '.join(f'"{c}" = excluded."{c}"' for c in atualizar)
+                sql += f' ON CONFLICT ("{self._on_conflict}") DO UPDATE SET {sets}'
+            else:
+                sql += f' ON CONFLICT ("{self._on_conflict}") DO NOTHING'
+        return sql + ' RETURNING *'
+
+    def _executar_escrita(self) -> LocalResponse:
+        conn = self.client.conn
+        resultado = []
+        try:
+            if self._operacao in ('insert', 'upsert'):
+                registros = self._dados if isinstance(self._dados, list) else [self._dados]
+                # Registros consecutivos com as mesmas colunas viram um único INSERT multi-linha
+                for colunas, grupo in groupby(registros, key=lambda r: tuple(r.keys())):
+                    grupo = list(grupo)
+                    por_comando = max(1, MAX_VARIAVEIS // max(1, len(colunas)))
+                    for i in range(0, len(grupo), por_comando):
+                        lote = grupo[i:i + por_comando]
+                        resultado.extend(self.client._consultar(
+                            self.tabela, self._sql_insert(colunas, len(lote)),
+                            [_codificar(r[c]) for r in lote for c in colunas]))
+            elif self._operacao == 'update':
+                colunas = list(self._dados.keys())
+                sets = ', '.join(f'"{c}" = ?' for c in colunas)
+                where, params = self._where()
+                sql = f'UPDATE "{self.tabela}" SET {sets}{where} RETURNING *'
+                resultado = self.client._consultar(
+                    self.tabela, sql, [_codificar(self._dados[c]) for c in colunas] + params)
+            elif self._operacao == 'delete':
+                where, params = self._where()
+                sql = f'DELETE FROM "{self.tabela}"{where} RETURNING *'
+                resultado = self.client._consultar(self.tabela, sql, params)
+            self.client._aplicar_kpis()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return LocalResponse(resultado)
+
+
+class LocalRpc:
+    def __init__(self, client: 'LocalClient', nome: str, params: Optional[Dict]):
+        self.client = client
+        self.nome = nome
+        self.params = params or {}
+
+    def execute(self) -> LocalResponse:
+        funcao = FUNCOES_RPC.get(self.nome)
+        if funcao is None:
+            raise Exception(f"Função '{self.nome}' não existe no backend local")
+        with self.client.lock:
+            try:
+                dados = funcao(self.client, self.params)
+                self.client._aplicar_kpis()
+                self.client.conn.commit()
+            except Exception:
+                self.client.conn.rollback()
+                raise
+        self.client._notificar_alteracoes()
+        return LocalResponse(dados)
+
+
+class LocalAuth:
+    """Substituto mínimo do Supabase Auth (email/senha em memória)"""
+
+    def __init__(self):
+        self._contas: Dict[str, Dict] = {}
+
+    def _hash(self, senha: str) -> str:
+        return hashlib.sha256(senha.encode()).hexdigest()
+
+    def _usuario(self, email: str):
+        conta = self._contas[email]
+        return SimpleNamespace(id=conta['id'], email=email, user_metadata=conta['metadata'])
+
+    def sign_up(self, credenciais: Dict):
+        email = credenciais['email']
+        if email in self._contas:
+            raise Exception("User already registered")
+        metadata = (credenciais.get('options') or {}).get('data') or {}
+        self._contas[email] = {
+            'id': hashlib.md5(email.encode()).hexdigest(),
+            'senha': self._hash(credenciais['password']),
+            'metadata': metadata,
+        }
+        return SimpleNamespace(user=self._usuario(email), session=None)
+
+    def sign_in_with_password(self, credenciais: Dict):
+        email = credenciais['email']
+        conta = self._contas.get(email)
+        if not conta or conta['senha'] != self._hash(credenciais['password']):
+            raise Exception("Invalid login credentials")
+        return SimpleNamespace(user=self._usuario(email), session=SimpleNamespace(access_token='local'))
+
+    def sign_out(self):
+        return None
+
+
+class LocalClient:
+    """Cliente com a mesma interface de supabase.Client sobre SQLite"""
+
+    def __init__(self, caminho: str = ':memory:'):
+        self.caminho = caminho
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(caminho, check_same_thread=False)
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        self.auth = LocalAuth()
+        self._tipos: Dict[str, Dict[str, str]] = {}
+        self._fks: Dict[str, List[Tuple[str, str, str]]] = {}
+        # Assinaturas de on_change e tabelas alteradas desde a última notificação
+        self._ouvintes: List[Tuple[frozenset, Callable[[str], None]]] = []
+        self._alteradas: set = set()
+        self.conn.create_function('registrar_alteracao', 1, self._alteradas.add)
+        with self.lock:
+            existe = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'notas'").fetchone()
+            if not existe:
+                self._criar_esquema()
+            self._aplicar_scripts(SCRIPTS_OTIMIZACAO)
+            for gatilho in GATILHOS_LOCAIS:
+                self.conn.execute(gatilho)
+            self.conn.commit()
+
+    def _aplicar_scripts(self, scripts: List[str]):
+        for script in scripts:
+            with open(os.path.join(BASE_DIR, script), encoding='utf-8') as f:
+                for comando in traduzir_sql(f.read()):
+                    nova_coluna = _NOVA_COLUNA.match(comando)
+                    if nova_coluna:
+                        self._adicionar_coluna(*nova_coluna.groups())
+                    else:
+                        self.conn.execute(comando)
+        self.conn.commit()
+
+    def _adicionar_coluna(self, tabela: str, coluna: str, tipo: str, padrao: Optional[str]):
+        """O SQLite não aceita valor padrão não constante em ALTER TABLE: as linhas
+        existentes recebem o padrão por UPDATE e as novas, pelos gatilhos locais"""
+        existentes = {linha[1] for linha in self.conn.execute(f'PRAGMA table_info("{tabela}")')}
+        if coluna in existentes:
+            return
+        self.conn.execute(f'ALTER TABLE "{tabela}" ADD COLUMN "{coluna}" {tipo}')
+        if padrao:
+            self.conn.execute(f'UPDATE "{tabela}" SET "{coluna}" = {padrao}')
+
+    def _criar_esquema(self):
+        self._aplicar_scripts(SCRIPTS_ESQUEMA)
+        for comando in traduzir_sql(ESQUEMA_COMPLEMENTAR):
+            self.conn.execute(comando)
+        self.conn.commit()
+
+    def _aplicar_kpis(self):
+        """Soma em kpis_resumo, com um único UPDATE, os deltas registrados pelos gatilhos
+        locais durante o comando (ver _gatilhos_kpis)"""
+        colunas = list(_KPIS_NOTA) + list(_KPIS_PARCELA)
+        soma = self.conn.execute(
+            f"SELECT COUNT(*), {', '.join(f'COALESCE(SUM({c}), 0)' for c in colunas)} FROM kpis_delta").fetchone()
+        if not soma[0]:
+            return
+        self.conn.execute("DELETE FROM kpis_delta")
+        if any(soma[1:]):
+            sets = ', '.join(f"{c} = {c} + ?" for c in colunas)
+            self.conn.execute(f"UPDATE kpis_resumo SET {sets}, atualizado_em = {_AGORA} WHERE id = 1", soma[1:])
+
+    # Notificações de alteração
+    def on_change(self, tabelas, ouvinte: Callable[[str], None]):
+        """Chama `ouvinte(tabela)` após cada escrita confirmada que alterou uma das tabelas.
+        
+        Os gatilhos são temporários (só desta conexão) e também capturam alterações
+        em cascata e feitas pelas funções rpc.
+        """
+        tabelas = frozenset(tabelas)
+        with self.lock:
+            for tabela in tabelas:
+                for evento in ('INSERT', 'UPDATE', 'DELETE'):
+                    self.conn.execute(
+                        f"CREATE TEMP TRIGGER IF NOT EXISTS notificar_{tabela}_{evento.lower()} "
+                        f"AFTER {evento} ON main.{tabela} BEGIN SELECT registrar_alteracao('{tabela}'); END")
+            self._ouvintes.append((tabelas, ouvinte))
+
+    def _notificar_alteracoes(self):
+        with self.lock:
+            if not self._alteradas:
+                return
+            alteradas = sorted(self._alteradas)
+            self._alteradas.clear()
+            ouvintes = list(self._ouvintes)
+        for tabela in alteradas:
+            for tabelas, ouvinte in ouvintes:
+                if tabela in tabelas:
+                    try:
+                        ouvinte(tabela)
+                    except Exception as e:
+                        print(f"Erro ao notificar alteração em {tabela}: {e}")
+
+    def table(self, nome: str) -> LocalQuery:
+        return LocalQuery(self, nome)
+
+    def from_(self, nome: str) -> LocalQuery:
+        return self.table(nome)
+
+    def rpc(self, nome: str, params: Optional[Dict] = None) -> LocalRpc:
+        return LocalRpc(self, nome, params)
+
+    # Metadados do esquema
+    def _tipos_colunas(self, tabela: str) -> Dict[str, str]:
+        if tabela not in self._tipos:
+            info = self.conn.execute(f'PRAGMA table_info("{tabela}")').fetchall()
+            if not info:
+                raise Exception(f"Relação '{tabela}' não existe")
+            self._tipos[tabela] = {linha[1]: (linha[2] or '').upper() for linha in info}
+        return self._tipos[tabela]
+
+    def _chaves_estrangeiras(self, tabela: str) -> List[Tuple[str, str, str]]:
+        """[(coluna_local, tabela_referenciada, coluna_referenciada)]"""
+        if tabela not in self._fks:
+            linhas = self.conn.execute(f'PRAGMA foreign_key_list("{tabela}")').fetchall()
+            self._fks[tabela] = [(l[3], l[2], l[4] or 'id') for l in linhas]
+        return self._fks[tabela]
+
+    def _decodificar(self, tabela: str, linha: Dict) -> Dict:
+        tipos = self._tipos_colunas(tabela)
+        for coluna, valor in linha.items():
+            if valor is None:
+                continue
+            tipo = tipos.get(coluna, '')
+            if tipo.startswith('BOOL'):
+                linha[coluna] = bool(valor)
+            elif tipo.startswith('JSON') and isinstance(valor, str):
+                linha[coluna] = json.loads(valor)
+            elif tipo.startswith(('DECIMAL', 'NUMERIC')):
+                linha[coluna] = float(valor)
+        return linha
+
+    def _consultar(self, tabela: str, sql: str, params: list) -> List[Dict]:
+        cursor = self.conn.execute(sql, params)
+        nomes = [d[0] for d in cursor.description] if cursor.description else []
+        return [self._decodificar(tabela, dict(zip(nomes, linha))) for linha in cursor.fetchall()]
+
+    # Selects embutidos
+    def _projetar(self, tabela: str, linhas: List[Dict], select: str,
+                  ordens_embutidas: Optional[Dict[str, List[Tuple[str, bool]]]] = None) -> List[Dict]:
+        colunas, embutidos = _parse_select(select)
+        for nome, sub_select in embutidos:
+            self._embutir(tabela, linhas, nome, sub_select, (ordens_embutidas or {}).get(nome, []))
+        if '*' in colunas:
+            return linhas
+        nomes = [n for n, _ in embutidos]
+        return [{c: l.get(c) for c in colunas + nomes} for l in linhas]
+
+    def _embutir(self, tabela: str, linhas: List[Dict], alvo: str, sub_select: str,
+                 ordens: List[Tuple[str, bool]]):
+        if not linhas:
+            return
+        # Muitos-para-um: a tabela atual referencia a embutida -> objeto
+        for coluna, ref_tabela, ref_coluna in self._chaves_estrangeiras(tabela):
+            if ref_tabela == alvo:
+                chaves = list({l[coluna] for l in linhas if l.get(coluna) is not None})
+                relacionados = self._buscar_por(alvo, ref_coluna, chaves)
+                # A chave é lida antes da projeção, que pode não incluir a coluna referenciada
+                chaves_relacionados = [r.get(ref_coluna) for r in relacionados]
+                relacionados = self._projetar(alvo, relacionados, sub_select)
+                por_chave = dict(zip(chaves_relacionados, relacionados))
+                for l in linhas:
+                    l[alvo] = por_chave.get(l.get(coluna))
+                return
+        # Um-para-muitos: a embutida referencia a atual -> lista
+        for coluna, ref_tabela, ref_coluna in self._chaves_estrangeiras(alvo):
+            if ref_tabela == tabela:
+                chaves = list({l[ref_coluna] for l in linhas})
+                relacionados = self._buscar_por(alvo, coluna, chaves)
+                for c, d in reversed(ordens):
+                    relacionados.sort(key=lambda r: (r.get(c) is None, r.get(c)), reverse=d)
+                agrupados: Dict[Any, List[Dict]] = {}
+                for r in relacionados:
+                    agrupados.setdefault(r[coluna], []).append(r)
+                for l in linhas:
+                    filhos = agrupados.get(l[ref_coluna], [])
+                    l[alvo] = self._projetar(alvo, filhos, sub_select)
+                return
+        raise Exception(f"Nenhum relacionamento entre '{tabela}' e '{alvo}'")
+
+    def _buscar_por(self, tabela: str, coluna: str, valores: list) -> List[Dict]:
+        resultado = []
+        for i in range(0, len(valores), 500):
+            lote = valores[i:i + 500]
+            sql = f'SELECT * FROM "{tabela}" WHERE "{coluna}" IN ({", ".join("?" * len(lote))}) ORDER BY "id"'
+            resultado.extend(self._consultar(tabela, sql, lote))
+        return resultado
+
+
+# Funções RPC: equivalentes em Python das funções plpgsql dos scripts de setup
+FUNCOES_RPC: Dict[str, Callable[[LocalClient, Dict], Any]] = {}
+
+
+def funcao_rpc(nome: str):
+    def decorator(func):
+        FUNCOES_RPC[nome] = func
+        return func
+    return decorator
+
+
+@funcao_rpc('atualizar_status_parcelas_vencidas')
+def _atualizar_status_parcelas_vencidas(client: LocalClient, params: Dict):
+    client.conn.execute(
+        "UPDATE parcelas SET status = 'VENCIDA' WHERE status = 'PENDENTE' AND data_vencimento < date('now')")
+    return None
+
+
+@funcao_rpc('adquirir_lideranca')
+def _adquirir_lideranca(client: LocalClient, params: Dict):
+    agora = datetime.now(timezone.utc).replace(tzinfo=None)
+    expira = (agora + timedelta(seconds=params['p_segundos'])).isoformat()
+    cursor = client.conn.execute(
+        "INSERT INTO agendador_lider (nome, dono, expira_em) VALUES (?, ?, ?) "
+        "ON CONFLICT (nome) DO UPDATE SET dono = excluded.dono, expira_em = excluded.expira_em "
+        "WHERE agendador_lider.dono = excluded.dono OR agendador_lider.expira_em < ?",
+        (params['p_nome'], params['p_dono'], expira, agora.isoformat()))
+    return cursor.rowcount > 0
+
+
+@funcao_rpc('alteracoes_desde')
+def _alteracoes_desde(client: LocalClient, params: Dict):
+    desde, colunas = params.get('p_desde'), params.get('p_colunas') or {}
+    cursor, retencao = client.conn.execute(
+        "SELECT strftime('%Y-%m-%dT%H:%M:%f', 'now', '-300 seconds'), "
+        "strftime('%Y-%m-%dT%H:%M:%f', 'now', '-30 days')").fetchone()
+    completo = desde is None or desde < retencao
+    resultado = {'cursor': cursor, 'completo': completo, 'exclusoes': []}
+    for tabela, lista in colunas.items():
+        if tabela not in TABELAS_SINCRONIZADAS:
+            raise Exception(f"Tabela sem sincronização: {tabela}")
+        selecionadas = ', '.join(f'"{c}"' for c in lista)
+        sql = f'SELECT {selecionadas} FROM "{tabela}"'
+        resultado[tabela] = client._consultar(tabela, sql if completo else f"{sql} WHERE updated_at > ?",
+                                              [] if completo else [desde])
+    if not completo and colunas:
+        marcadores = ', '.join('?' * len(colunas))
+        linhas = client.conn.execute(
+            "SELECT tabela, registro_id FROM registros_excluidos "
+            f"WHERE excluido_em > ? AND tabela IN ({marcadores}) ORDER BY id", [desde] + list(colunas)).fetchall()
+        resultado['exclusoes'] = [{'tabela': tabela, 'registro_id': registro_id} for tabela, registro_id in linhas]
+    return resultado
+
+
+@funcao_rpc('limpar_exclusoes')
+def _limpar_exclusoes(client: LocalClient, params: Dict):
+    client.conn.execute(
+        "DELETE FROM registros_excluidos WHERE excluido_em < strftime('%Y-%m-%dT%H:%M:%f', 'now', '-30 days')")
+    return None
+
+
+@funcao_rpc('atualizar_parcelas_lote')
+def _atualizar_parcelas_lote(client: LocalClient, params: Dict):
+    parcelas = params.get('p_parcelas') or []
+    ids = [p['id'] for p in parcelas]
+    if not ids:
+        return []
+    marcadores = ', '.join('?' * len(ids))
+    anteriores = client._consultar(
+        'parcelas', f'SELECT * FROM parcelas WHERE id IN ({marcadores}) ORDER BY id', ids)
+    if not anteriores:
+        return []
+    client.conn.executemany(
+        "UPDATE parcelas SET valor = ?, data_vencimento = ? WHERE id = ?",
+        [(p['valor'], p['data_vencimento'], p['id']) for p in parcelas])
+    client.conn.execute(
+        "INSERT INTO logs_sistema (usuario_id, acao, tabela_afetada, dados_anteriores, dados_novos) "
+        "VALUES (?, 'UPDATE', 'parcelas', ?, ?)",
+        (params.get('p_usuario_id'), json.dumps(anteriores, default=str), json.dumps(parcelas, default=str)))
+    return client._consultar('parcelas', f'SELECT * FROM parcelas WHERE id IN ({marcadores}) ORDER BY id', ids)
+
+
+# Colunas que atualizar_registro_auditado aceita (mesma lista da função plpgsql)
+COLUNAS_EDITAVEIS = {
+    'notas': ('numero_nota', 'fornecedor', 'valor_total', 'data_emissao', 'descricao', 'local_aplicacao',
+              'status_material', 'eh_parcelada', 'num_parcelas', 'dias_ate_primeira', 'intervalo_dias'),
+    'parcelas': ('numero', 'valor', 'data_vencimento', 'status', 'data_pagamento', 'status_material'),
+}
+
+
+@funcao_rpc('atualizar_registro_auditado')
+def _atualizar_registro_auditado(client: LocalClient, params: Dict):
+    tabela, registro_id, dados = params['p_tabela'], params['p_id'], params.get('p_dados') or {}
+    if tabela not in COLUNAS_EDITAVEIS:
+        raise Exception(f"Tabela não permitida: {tabela}")
+    invalidas = set(dados) - set(COLUNAS_EDITAVEIS[tabela])
+    if invalidas:
+        raise Exception(f"Colunas não editáveis em {tabela}: {sorted(invalidas)}")
+    anterior = client._consultar(tabela, f'SELECT * FROM "{tabela}" WHERE id = ?', [registro_id])
+    if not anterior:
+        return None
+    if dados:
+        atribuicoes = ', '.join(f'"{c}" = ?' for c in dados)
+        client.conn.execute(f'UPDATE "{tabela}" SET {atribuicoes} WHERE id = ?',
+                            [_codificar(v) for v in dados.values()] + [registro_id])
+    client.conn.execute(
+        "INSERT INTO logs_sistema (usuario_id, acao, tabela_afetada, registro_id, dados_anteriores, dados_novos) "
+        "VALUES (?, 'UPDATE', ?, ?, ?, ?)",
+        (params.get('p_usuario_id'), tabela, registro_id,
+         json.dumps(anterior[0], default=str), json.dumps(dados, default=str)))
+    return client._consultar(tabela, f'SELECT * FROM "{tabela}" WHERE id = ?', [registro_id])[0]
+
+
+@funcao_rpc('excluir_notas')
+def _excluir_notas(client: LocalClient, params: Dict):
+    ids = list(params.get('p_ids') or [])
+    if not ids:
+        return []
+    marcadores = ', '.join('?' * len(ids))
+    notas = client._consultar('notas', f'SELECT * FROM notas WHERE id IN ({marcadores}) ORDER BY id', ids)
+    parcelas: Dict[int, List[Dict]] = {}
+    for parcela in client._consultar(
+            'parcelas', f'SELECT * FROM parcelas WHERE nota_id IN ({marcadores}) ORDER BY numero', ids):
+        parcelas.setdefault(parcela['nota_id'], []).append(parcela)
+    client.conn.executemany(
+        "INSERT INTO logs_sistema (usuario_id, acao, tabela_afetada, registro_id, dados_anteriores, dados_novos) "
+        "VALUES (?, 'DELETE', 'notas', ?, ?, NULL)",
+        [(params.get('p_usuario_id'), nota['id'],
+          json.dumps({'nota': nota, 'parcelas': parcelas.get(nota['id'], [])}, default=str)) for nota in notas])
+    client.conn.execute(f'DELETE FROM notas WHERE id IN ({marcadores})', ids)
+    return [nota['id'] for nota in notas]
+
+
+COLUNAS_NOTA = ('numero_nota', 'fornecedor', 'valor_total', 'data_emissao', 'descricao', 'local_aplicacao',
+                 'status_material', 'eh_parcelada', 'num_parcelas', 'dias_ate_primeira', 'intervalo_dias')
+PADROES_NOTA = {'eh_parcelada': False, 'num_parcelas': 1, 'dias_ate_primeira': 0, 'intervalo_dias': 30}
+
+
+@funcao_rpc('criar_nota_com_parcelas')
+def _criar_nota_com_parcelas(client: LocalClient, params: Dict):
+    nota, parcelas = params['p_nota'], params.get('p_parcelas') or []
+    duplicada = client.conn.execute(
+        "SELECT 1 FROM notas WHERE numero_nota = ? AND fornecedor = ?",
+        (nota.get('numero_nota'), nota.get('fornecedor'))).fetchone()
+    if duplicada:
+        raise Exception('NOTA_DUPLICADA')
+    valores = [_codificar(nota.get(c) if nota.get(c) is not None else PADROES_NOTA.get(c)) for c in COLUNAS_NOTA]
+    cursor = client.conn.execute(
+        f"INSERT INTO notas ({', '.join(COLUNAS_NOTA)}) VALUES ({', '.join('?' * len(COLUNAS_NOTA))})", valores)
+    nota_id = cursor.lastrowid
+    client.conn.executemany(
+        "INSERT INTO parcelas (nota_id, numero, valor, data_vencimento, status, status_material) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [(nota_id, p['numero'], p['valor'], _codificar(p['data_vencimento']), p.get('status') or 'PENDENTE',
+          p.get('status_material') or 'ESTOQUE') for p in parcelas])
+    criada = client._consultar('notas', "SELECT * FROM notas WHERE id = ?", [nota_id])[0]
+    criada['parcelas'] = client._consultar(
+        'parcelas', "SELECT * FROM parcelas WHERE nota_id = ? ORDER BY numero", [nota_id])
+    return criada
+
+
+def _inicio_periodo(dia: date, granularidade: str) -> date:
+    if granularidade == 'dia':
+        return dia
+    if granularidade == 'semana':
+        return dia - timedelta(days=dia.weekday())
+    if granularidade == 'mes':
+        return dia.replace(day=1)
+    if granularidade == 'trimestre':
+        return date(dia.year, 3 * ((dia.month - 1) // 3) + 1, 1)
+    if granularidade == 'ano':
+        return date(dia.year, 1, 1)
+    raise Exception(f"Granularidade inválida: {granularidade}")
+
+
+def _proximo_periodo(inicio: date, granularidade: str) -> date:
+    if granularidade == 'dia':
+        return inicio + timedelta(days=1)
+    if granularidade == 'semana':
+        return inicio + timedelta(days=7)
+    meses = {'mes': 1, 'trimestre': 3, 'ano': 12}[granularidade]
+    ano, mes = divmod(inicio.month - 1 + meses, 12)
+    return date(inicio.year + ano, mes + 1, 1)
+
+
+@funcao_rpc('relatorio_periodo')
+def _relatorio_periodo(client: LocalClient, params: Dict):
+    inicio, fim = date.fromisoformat(str(params['p_inicio'])), date.fromisoformat(str(params['p_fim']))
+    granularidade = params.get('p_granularidade') or 'mes'
+    totais: Dict[date, Dict] = {}
+    periodo = _inicio_periodo(inicio, granularidade)
+    while periodo < fim:
+        totais[periodo] = {'periodo': periodo.isoformat(), 'total_pago': 0.0, 'total_pendente': 0.0,
+                           'total_vencido': 0.0, 'quantidade': 0}
+        periodo = _proximo_periodo(periodo, granularidade)
+    # Agregação por dia no SQLite; o agrupamento no período é feito aqui
+    linhas = client.conn.execute(
+        "SELECT data_vencimento, status, SUM(valor), COUNT(*) FROM parcelas "
+        "WHERE data_vencimento >= ? AND data_vencimento < ? GROUP BY data_vencimento, status",
+        (inicio.isoformat(), fim.isoformat())).fetchall()
+    colunas = {'PAGA': 'total_pago', 'PENDENTE': 'total_pendente', 'VENCIDA': 'total_vencido'}
+    for dia, status, soma, quantidade in linhas:
+        total = totais[_inicio_periodo(date.fromisoformat(dia[:10]), granularidade)]
+        if status in colunas:
+            total[colunas[status]] += soma or 0
+        total['quantidade'] += quantidade
+    for total in totais.values():
+        for coluna in colunas.values():
+            total[coluna] = round(total[coluna], 2)
+    return list(totais.values())
+
+
+AGRUPAMENTOS_RELATORIO = {
+    'status': 'p.status',
+    'local': 'CAST(n.local_aplicacao AS TEXT)',
+    'fornecedor': 'n.fornecedor',
+    'status_material': 'p.status_material',
+}
+
+
+@funcao_rpc('relatorio_totais')
+def _relatorio_totais(client: LocalClient, params: Dict):
+    expressao = AGRUPAMENTOS_RELATORIO.get(params.get('p_agrupamento') or 'status')
+    if expressao is None:
+        raise Exception(f"Agrupamento inválido: {params.get('p_agrupamento')}")
+    linhas = client.conn.execute(
+        f"SELECT {expressao}, p.status, SUM(p.valor), COUNT(*) FROM parcelas p JOIN notas n ON n.id = p.nota_id "
+        "WHERE p.data_vencimento >= ? AND p.data_vencimento < ? GROUP BY 1, 2 ORDER BY 1, 2",
+        (str(params['p_inicio']), str(params['p_fim']))).fetchall()
+    return [{'chave': chave, 'status': status, 'total': round(total or 0, 2), 'quantidade': quantidade}
+            for chave, status, total, quantidade in linhas]
+
+
+def _filtros_relatorio_parcelas(params: Dict) -> Tuple[str, list]:
+    """Cláusula WHERE e parâmetros comuns a relatorio_parcelas e relatorio_parcelas_resumo"""
+    condicoes = ["p.data_vencimento >= ?", "p.data_vencimento < ?"]
+    valores = [str(params['p_inicio']), str(params['p_fim'])]
+    for parametro, coluna in (('p_status', 'p.status'), ('p_fornecedor', 'n.fornecedor'),
+                              ('p_local', 'n.local_aplicacao')):
+        if params.get(parametro) is not None:
+            condicoes.append(f"{coluna} = ?")
+            valores.append(params[parametro])
+    return ' AND '.join(condicoes), valores
+
+
+@funcao_rpc('relatorio_parcelas')
+def _relatorio_parcelas(client: LocalClient, params: Dict):
+    where, valores = _filtros_relatorio_parcelas(params)
+    if params.get('p_apos_id') is not None:
+        where += " AND p.id > ?"
+        valores.append(params['p_apos_id'])
+    cursor = client.conn.execute(
+        "SELECT p.id, p.numero, p.valor, p.data_vencimento, p.status, n.numero_nota, n.fornecedor, "
+        f"n.local_aplicacao, n.status_material FROM parcelas p JOIN notas n ON n.id = p.nota_id WHERE {where} "
+        "ORDER BY p.id LIMIT ?", valores + [params.get('p_limite') or 50])
+    nomes = [d[0] for d in cursor.description]
+    return [client._decodificar('parcelas', dict(zip(nomes, linha))) for linha in cursor.fetchall()]
+
+
+@funcao_rpc('relatorio_parcelas_resumo')
+def _relatorio_parcelas_resumo(client: LocalClient, params: Dict):
+    where, valores = _filtros_relatorio_parcelas(params)
+    linhas = client.conn.execute(
+        f"SELECT p.status, SUM(p.valor), COUNT(*) FROM parcelas p JOIN notas n ON n.id = p.nota_id WHERE {where} "
+        "GROUP BY 1 ORDER BY 1", valores).fetchall()
+    return [{'status': status, 'total': round(total or 0, 2), 'quantidade': quantidade}
+            for status, total, quantidade in linhas]
+
+
+@funcao_rpc('resumo_parcelas_notas')
+def _resumo_parcelas_notas(client: LocalClient, params: Dict):
+    condicoes, valores = ["1 = 1"], []
+    for parametro, coluna in (('p_fornecedor', 'n.fornecedor'), ('p_local', 'n.local_aplicacao'),
+                              ('p_status_material', 'n.status_material')):
+        if params.get(parametro) is not None:
+            condicoes.append(f"{coluna} = ?")
+            valores.append(params[parametro])
+    material = params.get('p_material')
+    if material is not None:
+        coluna = {'ESTOQUE': 'n.material_estoque', 'EM_USO': 'n.material_em_uso'}.get(material)
+        condicoes.append(f"p.status_material = ? AND {coluna or '0'}")
+        valores.append(material)
+    status_parcela = params.get('p_status_parcela')
+    if status_parcela is not None:
+        coluna = {'PENDENTE': 'n.parcela_pendente', 'PAGA': 'n.parcela_paga',
+                  'VENCIDA': 'n.parcela_vencida'}.get(status_parcela)
+        condicoes.append(coluna or '0')
+    linhas = client.conn.execute(
+        "SELECT p.status, SUM(p.valor), COUNT(*) FROM parcelas p JOIN vw_notas_listagem n ON n.id = p.nota_id "
+        f"WHERE {' AND '.join(condicoes)} GROUP BY 1 ORDER BY 1", valores).fetchall()
+    return [{'status': status, 'total': round(total or 0, 2), 'quantidade': quantidade}
+            for status, total, quantidade in linhas]
+
+
+@funcao_rpc('fornecedores_notas')
+def _fornecedores_notas(client: LocalClient, params: Dict):
+    linhas = client.conn.execute("SELECT DISTINCT fornecedor FROM notas ORDER BY 1").fetchall()
+    return [{'fornecedor': fornecedor} for fornecedor, in linhas]
+
+
+def create_local_client(caminho: Optional[str] = None) -> LocalClient:
+    """Cria o cliente local (SQLite em memória por padrão)"""
+    return LocalClient(caminho or ':memory:')
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Benchmark de renderização das páginas Streamlit
+
+Executa cada script de pages/ com o AppTest do Streamlit sobre o backend
+local (SQLite) populado com dados sintéticos, medindo tempo, pico de memória
+e round trips ao banco por página. Falha (código de saída 1) se alguma
+página ultrapassar seu orçamento de round trips.
+
+Uso:
+    python benchmark_paginas.py --escalas 1000 10000 100000 --logs 1000000
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+# O benchmark sempre roda contra o backend local e com instrumentação ativa
+os.environ['DB_BACKEND'] = 'local'
+os.environ['INSTRUMENTACAO'] = '1'
+# Sem o agendador diário: suas requisições não entram nas medições
+os.environ['AGENDADOR_ATIVO'] = '0'
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PAGES_DIR = os.path.join(BASE_DIR, 'pages')
+
+# Máximo de round trips por renderização (cache frio) de cada página
+ORCAMENTO_ROUND_TRIPS = {
+    '00_🏠_Dashboard': 6,
+    '01_📝_Lançar_Fornecedor': 3,
+    '01_📝_Lançar_Nota': 5,
+    '02_📋_Visualizar_Fornecedores': 2,
+    '02_📋_Visualizar_Notas': 7,
+    '03_📊_Relatórios': 6,
+    '04_⚙️_Configurações': 4,
+    '05_📊_Logs': 4,
+}
+
+# Páginas que não fazem sentido sem interação (formulários de autenticação)
+PAGINAS_IGNORADAS = {'00_🔐_Login'}
+
+TABELAS = ['logs_sistema', 'parcelas', 'notas', 'fornecedores', 'locais_aplicacao', 'usuarios']
+
+
+def _limpar(conn):
+    for tabela in TABELAS:
+        conn.execute(f'DELETE FROM "{tabela}"')
+    conn.execute("DELETE FROM sqlite_sequence")
+    conn.commit()
+
+
+def popular_banco(cliente, num_notas: int, num_fornecedores: int, num_logs: int, seed: int = 42):
+    """Popula o banco local com o gerador de dados sintéticos (usuário 1 é o administrador)"""
+    from gerador_dados import DestinoBanco, gerar
+    from instrumentacao import metricas
+    _limpar(cliente.conn)
+    gerar(DestinoBanco(cliente), num_notas, fornecedores=num_fornecedores, logs=num_logs, seed=seed)
+    # As inserções da carga não entram nas medições das páginas
+    metricas.reset()
+
+
+def _resetar_estado():
+    from database import query_cache, referencias_cache, replica
+    query_cache.clear()
+    referencias_cache.clear()
+    if replica is not None:
+        replica.clear()
+    gc.collect()
+
+
+def _executar(caminho: str, timeout: float):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(caminho, default_timeout=timeout)
+    at.session_state['user_id'] = 1
+    at.session_state['session_token'] = 'benchmark'
+    at.session_state['user_name'] = 'Administrador'
+    at.session_state['user_role'] = 'Administrador'
+    at.run()
+    return at
+
+
+def medir_pagina(caminho: str, timeout: float, medir_memoria: bool = True) -> dict:
+    from instrumentacao import metricas
+    pagina = os.path.splitext(os.path.basename(caminho))[0]
+
+    # Renderização com cache frio: tempo e round trips
+    _resetar_estado()
+    antes = metricas.total_requisicoes(pagina)
+    inicio = time.perf_counter()
+    at = _executar(caminho, timeout)
+    tempo = time.perf_counter() - inicio
+    round_trips = metricas.total_requisicoes(pagina) - antes
+    erros = [str(e.value) for e in at.exception] if at.exception else []
+
+    # Segunda renderização (rerun com cache quente)
+    antes = metricas.total_requisicoes(pagina)
+    inicio = time.perf_counter()
+    at.run()
+    tempo_quente = time.perf_counter() - inicio
+    round_trips_quente = metricas.total_requisicoes(pagina) - antes
+    erros += [str(e.value) for e in at.exception if str(e.value) not in erros] if at.exception else []
+
+    pico_mb = None
+    if medir_memoria:
+        _resetar_estado()
+        tracemalloc.start()
+        _executar(caminho, timeout)
+        pico_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+
+    orcamento = ORCAMENTO_ROUND_TRIPS.get(pagina)
+    return {
+        'pagina': pagina,
+        'tempo_s': round(tempo, 3),
+        'tempo_quente_s': round(tempo_quente, 3),
+        'round_trips': round_trips,
+        'round_trips_quente': round_trips_quente,
+        'pico_memoria_mb': round(pico_mb, 1) if pico_mb is not None else None,
+        'orcamento': orcamento,
+        'dentro_orcamento': orcamento is None or round_trips <= orcamento,
+        'erros': erros,
+    }
+
+
+def listar_paginas(filtro=None):
+    paginas = []
+    for nome in sorted(os.listdir(PAGES_DIR)):
+        base, ext = os.path.splitext(nome)
+        if ext != '.py' or base in PAGINAS_IGNORADAS:
+            continue
+        if filtro and not any(f in base for f in filtro):
+            continue
+        paginas.append(os.path.join(PAGES_DIR, nome))
+    return paginas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de renderização das páginas")
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help="quantidades de notas a testar")
+    parser.add_argument('--fornecedores', type=int, default=300)
+    parser.add_argument('--logs', type=int, default=1000000)
+    parser.add_argument('--paginas', nargs='*', help="filtra páginas pelo nome (ex.: Dashboard)")
+    parser.add_argument('--timeout', type=float, default=600)
+    parser.add_argument('--sem-memoria', action='store_true', help="não mede pico de memória (mais rápido)")
+    parser.add_argument('--json', help="grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    sys.path.insert(0, BASE_DIR)
+    import config
+
+    resultados = []
+    for escala in args.escalas:
+        print(f"\n🔧 Populando banco local: {escala} notas, {args.fornecedores} fornecedores, {args.logs} logs...")
+        popular_banco(config.supabase, escala, args.fornecedores, args.logs)
+
+        print(f"{'Página':<32} {'Tempo':>8} {'Quente':>8} {'RT':>5} {'RT q.':>6} {'Memória':>9} {'Orç.':>5}")
+        for caminho in listar_paginas(args.paginas):
+            r = medir_pagina(caminho, args.timeout, not args.sem_memoria)
+            r['escala'] = escala
+            resultados.append(r)
+            memoria = f"{r['pico_memoria_mb']:.1f}MB" if r['pico_memoria_mb'] is not None else '-'
+            # Uma página que falha no meio faz menos round trips: o erro também reprova
+            status = '✅' if r['dentro_orcamento'] and not r['erros'] else '❌'
+            print(f"{r['pagina']:<32} {r['tempo_s']:>7.2f}s {r['tempo_quente_s']:>7.2f}s "
+                  f"{r['round_trips']:>5} {r['round_trips_quente']:>6} {memoria:>9} {str(r['orcamento']):>5} {status}")
+            for erro in r['erros']:
+                print(f"    ⚠️ {erro}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+    estourados = [r for r in resultados if not r['dentro_orcamento']]
+    com_erro = [r for r in resultados if r['erros']]
+    if estourados:
+        print(f"\n❌ {len(estourados)} renderização(ões) acima do orçamento de round trips")
+    if com_erro:
+        print(f"\n❌ {len(com_erro)} renderização(ões) com erro")
+    if estourados or com_erro:
+        sys.exit(1)
+    print("\n✅ Todas as páginas sem erros e dentro do orçamento de round trips")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+# Sinaliza, por thread, que a leitura em andamento retornou um valor de erro (ver nao_armazenar)
+_leitura = threading.local()
+
+
+def nao_armazenar():
+    """Chamada no tratamento de erro dos métodos com @cacheado: o valor retornado
+    (lista vazia, totais zerados...) é entregue ao chamador, mas não é guardado no cache"""
+    _leitura.erro = True
+
+
+class _Entrada:
+    def __init__(self, valor, tabelas: Tuple[str, ...], criado_em: float):
+        self.valor = valor
+        self.tabelas = tabelas
+        self.criado_em = criado_em
+
+
+class _Voo:
+    """Busca em andamento para uma chave, compartilhada pelas threads que esperam"""
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.valor = None
+        self.erro: Optional[BaseException] = None
+
+
+class QueryCache:
+    """Cache LRU com TTL e stale-while-revalidate para resultados de consultas.
+
+    Cada entrada registra as tabelas das quais depende; uma escrita em uma
+    tabela invalida apenas as entradas que a utilizam. Buscas simultâneas da
+    mesma chave são coalescidas (single-flight): apenas uma vai ao banco e as
+    demais aguardam o resultado.
+    """
+
+    def __init__(self, ttl: float = 30, stale: float = 300, max_entradas: int = 256):
+        self.ttl = ttl
+        # TTL das entradas que dependem só de tabelas notificadas (ver definir_ttl_notificado)
+        self.ttl_notificado: Optional[float] = None
+        self.tabelas_notificadas: frozenset = frozenset()
+        self.stale = stale
+        self.max_entradas = max_entradas
+        self._entradas: "OrderedDict[str, _Entrada]" = OrderedDict()
+        self._geracoes: Dict[str, int] = {}
+        self._atualizando = set()
+        self._em_voo: Dict[str, _Voo] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def ativo(self) -> bool:
+        return self.ttl > 0 and self.max_entradas > 0
+
+    def definir_ttl_notificado(self, tabelas: Iterable[str], ttl: Optional[float]):
+        """TTL (se maior que o padrão) das entradas que dependem apenas de `tabelas`.
+        
+        Usado enquanto as alterações dessas tabelas chegam por notificação e invalidam
+        as entradas (ver notificacoes.py); None volta ao TTL padrão.
+        """
+        with self._lock:
+            self.tabelas_notificadas = frozenset(tabelas)
+            self.ttl_notificado = ttl
+
+    def _ttl(self, entrada: _Entrada) -> float:
+        if self.ttl_notificado is not None and entrada.tabelas and self.tabelas_notificadas.issuperset(entrada.tabelas):
+            return max(self.ttl, self.ttl_notificado)
+        return self.ttl
+
+    def _geracao(self, tabelas: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(self._geracoes.get(t, 0) for t in tabelas)
+
+    def versao(self, tabela: str) -> int:
+        """Versão atual da tabela; muda a cada invalidação"""
+        with self._lock:
+            return self._geracoes.get(tabela, 0)
+
+    def _armazenar(self, chave: str, tabelas: Tuple[str, ...], geracao: Tuple[int, ...], valor):
+        with self._lock:
+            # Uma escrita ocorreu durante a busca: o resultado pode estar desatualizado
+            if self._geracao(tabelas) != geracao:
+                return
+            self._entradas[chave] = _Entrada(valor, tabelas, time.monotonic())
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def _carregar(self, chave: str, tabelas: Tuple[str, ...], loader: Callable):
+        with self._lock:
+            geracao = self._geracao(tabelas)
+        anterior = getattr(_leitura, 'erro', False)
+        _leitura.erro = False
+        try:
+            valor = loader()
+            erro = _leitura.erro
+        finally:
+            # Um erro em leitura aninhada também invalida o resultado da leitura externa
+            _leitura.erro = anterior or _leitura.erro
+        if not erro:
+            self._armazenar(chave, tabelas, geracao, copy.deepcopy(valor))
+        return valor
+
+    def _revalidar(self, chave: str, tabelas: Tuple[str, ...], loader: Callable):
+        try:
+            self._carregar(chave, tabelas, loader)
+        except Exception as e:
+            print(f"Erro ao revalidar cache ({chave}): {e}")
+        finally:
+            with self._lock:
+                self._atualizando.discard(chave)
+
+    def get_or_load(self, chave: str, tabelas: Tuple[str, ...], loader: Callable):
+        """Retorna o valor em cache ou executa `loader` para obtê-lo"""
+        if not self.ativo:
+            return loader()
+
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                idade = time.monotonic() - entrada.criado_em
+                ttl = self._ttl(entrada)
+                if idade <= ttl + self.stale:
+                    self._entradas.move_to_end(chave)
+                    if idade > ttl and chave not in self._atualizando:
+                        # Entrada vencida: serve o valor antigo e atualiza em segundo plano
+                        self._atualizando.add(chave)
+                        threading.Thread(
+                            target=self._revalidar, args=(chave, tabelas, loader), daemon=True
+                        ).start()
+                    return copy.deepcopy(entrada.valor)
+                del self._entradas[chave]
+
+            voo = self._em_voo.get(chave)
+            lider = voo is None
+            if lider:
+                voo = self._em_voo[chave] = _Voo()
+
+        if not lider:
+            voo.evento.wait()
+            if voo.erro is not None:
+                raise voo.erro
+            return copy.deepcopy(voo.valor)
+
+        try:
+            valor = self._carregar(chave, tabelas, loader)
+            voo.valor = copy.deepcopy(valor)
+            return valor
+        except BaseException as e:
+            voo.erro = e
+            raise
+        finally:
+            with self._lock:
+                self._em_voo.pop(chave, None)
+            voo.evento.set()
+
+    def invalidate(self, *tabelas: str):
+        """Remove as entradas que dependem de qualquer uma das tabelas"""
+        with self._lock:
+            for tabela in tabelas:
+                self._geracoes[tabela] = self._geracoes.get(tabela, 0) + 1
+            alvo = set(tabelas)
+            for chave in [c for c, e in self._entradas.items() if alvo.intersection(e.tabelas)]:
+                del self._entradas[chave]
+
+    def clear(self):
+        with self._lock:
+            for tabela in list(self._geracoes):
+                self._geracoes[tabela] += 1
+            self._entradas.clear()
+
+
+def _chave(nome: str, args: tuple, kwargs: dict) -> str:
+    return f"{nome}:{json.dumps([args, kwargs], sort_keys=True, default=str)}"
+
+
+# Atributos do DatabaseManager invalidados pelas escritas: instâncias de QueryCache
+# e a réplica local (sincronizacao.ReplicaLocal)
+CACHES = ('cache', 'referencias', 'replica')
+
+
+def cacheado(*tabelas: str, cache: str = 'cache'):
+    """Decorator para métodos de leitura do DatabaseManager.
+
+    `cache` indica qual atributo do manager armazena o resultado.
+    """
+    atributo = cache
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            cache: Optional[QueryCache] = getattr(self, atributo, None)
+            if cache is None:
+                return func(self, *args, **kwargs)
+            chave = _chave(func.__name__, args, kwargs)
+            return cache.get_or_load(chave, tabelas, lambda: func(self, *args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def invalidar_caches(manager, *tabelas: str):
+    """Invalida as tabelas em todos os caches do manager (escritas e notificações de alteração)"""
+    for atributo in CACHES:
+        cache: Optional[QueryCache] = getattr(manager, atributo, None)
+        if cache is not None:
+            cache.invalidate(*tabelas)
+
+
+def invalida(*tabelas: str):
+    """Decorator para métodos de escrita: invalida as tabelas afetadas"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                invalidar_caches(self, *tabelas)
+        return wrapper
+    return decorator
@@ -0,0 +1,62 @@
+"""Transporte HTTP compartilhado do cliente Supabase.
+
+Por padrão o supabase-py cria o próprio `httpx.Client` com limites e timeouts
+fixos. Aqui o processo usa um único cliente httpx, com pool de conexões
+configurável, keep-alive e HTTP/2 (quando o pacote `h2` está instalado),
+compartilhado pelo PostgREST e pelo Auth. Conexões já abertas são
+reaproveitadas entre requisições, páginas e sessões, evitando um novo
+handshake TCP/TLS a cada rerun.
+
+Com a instrumentação ativa, cada conexão aberta e cada handshake TLS são
+registrados nas métricas da página que os causou (ver instrumentacao.py).
+"""
+from typing import Optional
+
+import httpx
+
+
+def http2_disponivel() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def criar_cliente_http(timeout: float = 30.0, timeout_conexao: float = 10.0, max_conexoes: int = 20,
+                       max_keepalive: int = 10, keepalive_segundos: float = 60.0, http2: bool = True,
+                       rastrear_conexoes: bool = False) -> httpx.Client:
+    """Cria o cliente httpx com pool de conexões usado por todas as requisições do processo"""
+    if http2 and not http2_disponivel():
+        print("⚠️ HTTP/2 indisponível (instale httpx[http2]); usando HTTP/1.1")
+        http2 = False
+    ganchos = {}
+    if rastrear_conexoes:
+        from instrumentacao import rastrear_conexoes as gancho
+        ganchos = {'request': [gancho]}
+    return httpx.Client(
+        timeout=httpx.Timeout(timeout, connect=timeout_conexao),
+        limits=httpx.Limits(
+            max_connections=max_conexoes,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_segundos,
+        ),
+        http2=http2,
+        event_hooks=ganchos,
+    )
+
+
+def criar_cliente_supabase(url: str, key: str, http: Optional[httpx.Client] = None):
+    """Cria o cliente Supabase usando o transporte compartilhado `http`"""
+    from supabase import create_client
+    if http is None:
+        return create_client(url, key)
+    try:
+        from supabase.lib.client_options import SyncClientOptions
+        opcoes = SyncClientOptions(httpx_client=http)
+    except (ImportError, TypeError):
+        # supabase-py anterior à 2.17 não aceita um cliente httpx externo
+        print("⚠️ Versão do supabase-py sem suporte a httpx_client; usando o transporte padrão")
+        http.close()
+        return create_client(url, key)
+    return create_client(url, key, options=opcoes)
@@ -1,5 +1,4 @@
 import os
-from supabase import create_client, Client
 
 # Configurações do Supabase
 # Carrega credenciais do Supabase com fallback seguro (secrets.toml -> env vars)
@@ -15,8 +14,72 @@ except Exception:
     SUPABASE_URL = os.getenv("SUPABASE_URL")
     SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
+# Backend de dados: "supabase" (padrão) ou "local" (SQLite, para uso offline e benchmarks)
+DB_BACKEND = os.getenv("DB_BACKEND", "supabase").lower()
+
+# Métricas de round trips e latência por página/método (INSTRUMENTACAO=0 desativa)
+INSTRUMENTACAO = os.getenv("INSTRUMENTACAO", "1") != "0"
+
+# Pool de conexões HTTP compartilhado por todas as requisições ao Supabase do processo
+HTTP_TIMEOUT_SEGUNDOS = float(os.getenv("HTTP_TIMEOUT_SEGUNDOS", "30"))
+HTTP_TIMEOUT_CONEXAO_SEGUNDOS = float(os.getenv("HTTP_TIMEOUT_CONEXAO_SEGUNDOS", "10"))
+HTTP_MAX_CONEXOES = int(os.getenv("HTTP_MAX_CONEXOES", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_SEGUNDOS = float(os.getenv("HTTP_KEEPALIVE_SEGUNDOS", "60"))
+HTTP2 = os.getenv("HTTP2", "1") != "0"
+
 # Inicializar cliente Supabase
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+if DB_BACKEND == "local":
+    from backend_local import create_local_client
+    supabase = create_local_client(os.getenv("LOCAL_DB_PATH"))
+else:
+    from cliente_http import criar_cliente_http, criar_cliente_supabase
+    cliente_http = criar_cliente_http(
+        HTTP_TIMEOUT_SEGUNDOS, HTTP_TIMEOUT_CONEXAO_SEGUNDOS, HTTP_MAX_CONEXOES,
+        HTTP_MAX_KEEPALIVE, HTTP_KEEPALIVE_SEGUNDOS, HTTP2, rastrear_conexoes=INSTRUMENTACAO
+    )
+    supabase = criar_cliente_supabase(SUPABASE_URL, SUPABASE_KEY, cliente_http)
+
+if INSTRUMENTACAO:
+    from instrumentacao import instrumentar_cliente
+    supabase = instrumentar_cliente(supabase)
+
+# Cache de consultas do DatabaseManager (TTL 0 desativa o cache)
+CACHE_TTL_SEGUNDOS = float(os.getenv("CACHE_TTL_SEGUNDOS", "30"))
+CACHE_STALE_SEGUNDOS = float(os.getenv("CACHE_STALE_SEGUNDOS", "300"))
+CACHE_MAX_ENTRADAS = int(os.getenv("CACHE_MAX_ENTRADAS", "256"))
+# Dados de referência (locais, fornecedores, usuários) mudam pouco e são invalidados nas escritas
+REFERENCIA_TTL_SEGUNDOS = float(os.getenv("REFERENCIA_TTL_SEGUNDOS", "600"))
+REFERENCIA_STALE_SEGUNDOS = float(os.getenv("REFERENCIA_STALE_SEGUNDOS", "3600"))
+# Registro do usuário logado guardado na sessão (renovado no login e em escritas em usuarios)
+USUARIO_SESSAO_TTL_SEGUNDOS = float(os.getenv("USUARIO_SESSAO_TTL_SEGUNDOS", "300"))
+
+# Logs de auditoria gravados em lote em segundo plano (LOG_ASSINCRONO=0 grava a cada ação).
+# Janela de perda: os logs ficam em memória por até LOG_INTERVALO_SEGUNDOS antes de irem ao
+# banco (ou a LOG_PENDENTES_PATH, se a gravação falhar); se o processo for morto sem
+# encerramento normal (SIGKILL, falta de memória, timeout de parada), esses logs se perdem.
+# Use LOG_ASSINCRONO=0 quando nenhuma perda da trilha de auditoria for aceitável.
+LOG_ASSINCRONO = os.getenv("LOG_ASSINCRONO", "1") != "0"
+LOG_LOTE = int(os.getenv("LOG_LOTE", "50"))
+LOG_INTERVALO_SEGUNDOS = float(os.getenv("LOG_INTERVALO_SEGUNDOS", "2"))
+LOG_FILA_MAX = int(os.getenv("LOG_FILA_MAX", "10000"))
+# Logs que não puderam ser gravados ficam neste arquivo até o próximo envio
+LOG_PENDENTES_PATH = os.getenv("LOG_PENDENTES_PATH", "logs_pendentes.jsonl")
+
+# Réplica em memória de notas, parcelas e fornecedores com sincronização incremental
+# (REPLICA_LOCAL=0 desativa; alterações de outros processos aparecem após o intervalo)
+REPLICA_LOCAL = os.getenv("REPLICA_LOCAL", "1") != "0"
+REPLICA_INTERVALO_SEGUNDOS = float(os.getenv("REPLICA_INTERVALO_SEGUNDOS", "30"))
+
+# Notificações de alteração (Supabase Realtime ou backend local) que invalidam os caches de
+# todos os processos; enquanto ativas, o cache das tabelas notificadas usa o TTL longo abaixo
+NOTIFICACOES = os.getenv("NOTIFICACOES", "1") != "0"
+CACHE_TTL_NOTIFICACOES_SEGUNDOS = float(os.getenv("CACHE_TTL_NOTIFICACOES_SEGUNDOS", "600"))
+
+# Manutenção diária: parcelas vencidas e limpeza das exclusões (AGENDADOR_ATIVO=0 desativa; horário HH:MM local)
+AGENDADOR_ATIVO = os.getenv("AGENDADOR_ATIVO", "1") != "0"
+AGENDADOR_HORARIO = os.getenv("AGENDADOR_HORARIO", "00:05")
+AGENDADOR_VERIFICACAO_SEGUNDOS = float(os.getenv("AGENDADOR_VERIFICACAO_SEGUNDOS", "300"))
 
 # Configurações da aplicação
 APP_TITLE = "Sistema de Controle de Contas - Obras"
@@ -1,13 +1,122 @@
-from supabase import Client
 import streamlit as st
-from config import supabase
-from datetime import datetime, date
-from typing import List, Dict, Optional
+from config import (
+    supabase, SUPABASE_URL, SUPABASE_KEY, CACHE_TTL_SEGUNDOS, CACHE_STALE_SEGUNDOS, CACHE_MAX_ENTRADAS,
+    REFERENCIA_TTL_SEGUNDOS, REFERENCIA_STALE_SEGUNDOS, INSTRUMENTACAO,
+    LOG_ASSINCRONO, LOG_LOTE, LOG_INTERVALO_SEGUNDOS, LOG_FILA_MAX, LOG_PENDENTES_PATH,
+    AGENDADOR_ATIVO, AGENDADOR_HORARIO, AGENDADOR_VERIFICACAO_SEGUNDOS,
+    REPLICA_LOCAL, REPLICA_INTERVALO_SEGUNDOS, NOTIFICACOES, CACHE_TTL_NOTIFICACOES_SEGUNDOS
+)
+from agendador import AgendadorDiario
+from auditoria import GravadorLogs
+from cache import QueryCache, cacheado, invalida, invalidar_caches, nao_armazenar
+from instrumentacao import instrumentar_metodos
+from notificacoes import CanalAlteracoes, TABELAS_NOTIFICADAS
+from quadros import TIPOS_NOTAS, TIPOS_PARCELAS, mascara_notas, quadro_tipado
+from sincronizacao import ReplicaLocal
+from datetime import datetime, date, time
+from typing import List, Dict, Optional, Tuple
+import pandas as pd
 import json
 
+# Quantidade de ids por filtro in_ e de linhas por página nas buscas em lote
+IN_CHUNK_SIZE = 200
+PAGE_SIZE = 1000
+
+# Colunas das listagens de logs: os JSONs dados_anteriores/dados_novos só são lidos por get_log
+COLUNAS_LOG_LISTA = 'id, usuario_id, acao, tabela_afetada, registro_id, ip_address, created_at'
+USUARIO_LOG = 'usuarios!logs_sistema_usuario_id_fkey(nome, funcao, empresa)'
+
+# Colunas de kpis_resumo retornadas por get_kpis
+COLUNAS_KPIS = [
+    'total_notas', 'valor_total', 'total_parcelas', 'parcelas_pagas', 'parcelas_pendentes',
+    'parcelas_vencidas', 'valor_pago', 'valor_pendente', 'valor_vencido',
+]
+
+# Chave do total de cada status de parcela nos relatórios agregados
+COLUNAS_TOTAL_STATUS = {'PAGA': 'total_pago', 'PENDENTE': 'total_pendente', 'VENCIDA': 'total_vencido'}
+
+# Colunas de vw_notas_listagem usadas pelo filtro 'status_parcela' (nota com alguma parcela no status)
+COLUNAS_STATUS_PARCELA = {'PENDENTE': 'parcela_pendente', 'PAGA': 'parcela_paga', 'VENCIDA': 'parcela_vencida'}
+
+# Colunas de vw_notas_listagem usadas pelo filtro 'material'
+COLUNAS_MATERIAL = {'ESTOQUE': 'material_estoque', 'EM_USO': 'material_em_uso'}
+
+# Colunas mantidas em memória pela réplica local (as leituras que pedem outras colunas vão ao banco)
+COLUNAS_REPLICA = {
+    'notas': ['id', 'numero_nota', 'fornecedor', 'valor_total', 'data_emissao', 'local_aplicacao',
+              'status_material', 'eh_parcelada', 'num_parcelas'],
+    'parcelas': ['id', 'nota_id', 'numero', 'valor', 'data_vencimento', 'status', 'status_material',
+                 'data_pagamento'],
+    'fornecedores': ['id', 'nome', 'cnpj', 'telefone', 'vendedor', 'created_at'],
+}
+
+# Filtros de notas que dependem das parcelas (colunas calculadas de vw_notas_listagem)
+FILTROS_POR_PARCELAS = ('material', 'status_parcela')
+
+# Cache de consultas compartilhado por todas as instâncias do processo
+query_cache = QueryCache(CACHE_TTL_SEGUNDOS, CACHE_STALE_SEGUNDOS, CACHE_MAX_ENTRADAS)
+# Dados de referência quase estáticos (locais, fornecedores, usuários), com TTL longo
+referencias_cache = QueryCache(REFERENCIA_TTL_SEGUNDOS, REFERENCIA_STALE_SEGUNDOS, CACHE_MAX_ENTRADAS)
+# Logs de auditoria gravados em lote fora do caminho da requisição
+gravador_logs = GravadorLogs(
+    supabase, LOG_LOTE, LOG_INTERVALO_SEGUNDOS, LOG_FILA_MAX, LOG_PENDENTES_PATH,
+    ao_gravar=lambda: query_cache.invalidate('logs_sistema')
+) if LOG_ASSINCRONO else None
+
+
+def _buscar_alteracoes(cursor: Optional[str], colunas: Dict[str, List[str]]) -> Dict:
+    """Alterações posteriores ao cursor (função alteracoes_desde) para a réplica local"""
+    return supabase.rpc('alteracoes_desde', {'p_desde': cursor, 'p_colunas': colunas}).execute().data
+
+
+# Notas, parcelas e fornecedores em memória, atualizados por sincronização incremental
+replica = ReplicaLocal(_buscar_alteracoes, COLUNAS_REPLICA, REPLICA_INTERVALO_SEGUNDOS) if REPLICA_LOCAL else None
+
+def _projecao(colunas: str, *obrigatorias: str) -> str:
+    """Lista de colunas do select acrescida das colunas de que o método depende"""
+    if colunas.strip() == '*':
+        return colunas
+    presentes = {c.strip() for c in colunas.split(',')}
+    faltantes = [c for c in obrigatorias if c not in presentes]
+    return ', '.join(faltantes + [colunas]) if faltantes else colunas
+
+
+def _quadros_notas(notas: List[Dict], parcelas: List[Dict]) -> Dict[str, pd.DataFrame]:
+    """DataFrames tipados das colunas da réplica de notas e parcelas"""
+    return {
+        'notas': quadro_tipado(notas, COLUNAS_REPLICA['notas'], TIPOS_NOTAS),
+        'parcelas': quadro_tipado(parcelas, COLUNAS_REPLICA['parcelas'], TIPOS_PARCELAS),
+    }
+
+
 class DatabaseManager:
     def __init__(self):
         self.supabase = supabase
+        self.cache = query_cache
+        self.referencias = referencias_cache
+        self.replica = replica
+        # Quadros de notas e parcelas e a versão da réplica de que foram montados
+        self._quadros: Optional[Tuple[int, Dict[str, pd.DataFrame]]] = None
+    
+    # Notificações de alteração
+    def assinar_alteracoes(self) -> CanalAlteracoes:
+        """Invalida os caches deste processo a cada alteração nas tabelas notificadas, feita por qualquer processo"""
+        canal = CanalAlteracoes(lambda tabela: invalidar_caches(self, tabela), self._ao_mudar_canal)
+        canal.iniciar(self.supabase, SUPABASE_URL, SUPABASE_KEY)
+        return canal
+    
+    def _ao_mudar_canal(self, ativo: bool):
+        """Com o canal ativo, as entradas que dependem só das tabelas notificadas usam o TTL longo.
+        
+        Na troca de estado essas entradas são invalidadas: com o canal fora do ar,
+        alterações podem ter sido perdidas.
+        """
+        ttl = CACHE_TTL_NOTIFICACOES_SEGUNDOS if ativo else None
+        for cache in (self.cache, self.referencias):
+            cache.definir_ttl_notificado(TABELAS_NOTIFICADAS, ttl)
+        if self.replica is not None:
+            self.replica.intervalo = max(REPLICA_INTERVALO_SEGUNDOS, ttl) if ativo else REPLICA_INTERVALO_SEGUNDOS
+        invalidar_caches(self, *TABELAS_NOTIFICADAS)
     
     def create_tables(self):
         """Cria as tabelas necessárias no Supabase"""
@@ -16,6 +125,7 @@ class DatabaseManager:
         pass
     
     # Operações para Notas
+    @invalida('notas')
     def create_nota(self, nota_data: Dict) -> Dict:
         """Cria uma nova nota"""
         try:
@@ -25,23 +135,292 @@ class DatabaseManager:
             print(f"Erro ao criar nota: {e}")
             return None
     
-    def get_notas(self, filters: Optional[Dict] = None) -> List[Dict]:
-        """Busca todas as notas com filtros opcionais"""
+    @invalida('notas', 'parcelas')
+    def create_nota_com_parcelas(self, nota_data: Dict, parcelas_data: List[Dict]) -> Optional[Dict]:
+        """Cria a nota e suas parcelas em uma única transação (função criar_nota_com_parcelas).
+        
+        Retorna a nota criada com a chave 'parcelas'. Levanta ValueError se já
+        existir nota com o mesmo número para o fornecedor.
+        """
         try:
-            query = self.supabase.table('notas').select('*')
-            
-            if filters:
-                if filters.get('fornecedor'):
-                    query = query.eq('fornecedor', filters['fornecedor'])
-                if filters.get('local_aplicacao'):
-                    query = query.eq('local_aplicacao', filters['local_aplicacao'])
-                if filters.get('status_material'):
-                    query = query.eq('status_material', filters['status_material'])
+            result = self.supabase.rpc('criar_nota_com_parcelas', {
+                'p_nota': nota_data,
+                'p_parcelas': parcelas_data
+            }).execute()
+            return result.data if result.data else None
+        except Exception as e:
+            if 'NOTA_DUPLICADA' in str(e):
+                raise ValueError("Já existe uma nota com este número para este fornecedor!")
+            print(f"Erro ao criar nota com parcelas: {e}")
+            return None
+    
+    def _aplicar_filtros_notas(self, query, filters: Optional[Dict]):
+        """Aplica os filtros suportados de notas a uma query"""
+        if filters:
+            if filters.get('fornecedor'):
+                query = query.eq('fornecedor', filters['fornecedor'])
+            if filters.get('local_aplicacao'):
+                query = query.eq('local_aplicacao', filters['local_aplicacao'])
+            if filters.get('status_material'):
+                query = query.eq('status_material', filters['status_material'])
+            if filters.get('material'):
+                # Status do material considerando as parcelas (apenas em vw_notas_listagem)
+                query = query.eq(COLUNAS_MATERIAL[filters['material']], True)
+            if filters.get('status_parcela'):
+                # Notas com ao menos uma parcela no status (apenas em vw_notas_listagem)
+                query = query.eq(COLUNAS_STATUS_PARCELA[filters['status_parcela']], True)
+        return query
+    
+    def _filtrar_por_parcelas(self, notas: List[Dict], filters: Optional[Dict]) -> List[Dict]:
+        """Filtros 'material' e 'status_parcela' aplicados em memória a notas com a chave 'parcelas'
+        (mesma regra das colunas de vw_notas_listagem)"""
+        material = (filters or {}).get('material')
+        status_parcela = (filters or {}).get('status_parcela')
+        if material:
+            notas = [
+                n for n in notas
+                if (any(p.get('status_material') == material for p in n['parcelas'])
+                    if n.get('eh_parcelada') else n.get('status_material') == material)
+            ]
+        if status_parcela:
+            notas = [n for n in notas if any(p.get('status') == status_parcela for p in n['parcelas'])]
+        return notas
+    
+    def _tabela_notas(self, filters: Optional[Dict]) -> str:
+        """Os filtros 'material' e 'status_parcela' dependem das colunas calculadas da view de listagem"""
+        if filters and (filters.get('material') or filters.get('status_parcela')):
+            return 'vw_notas_listagem'
+        return 'notas'
+    
+    @cacheado('notas', 'parcelas')
+    def get_notas(self, filters: Optional[Dict] = None, after_id: Optional[int] = None,
+                  limit: Optional[int] = None, colunas: str = '*') -> List[Dict]:
+        """Busca notas com filtros opcionais, em ordem de id.
+        
+        Com `limit`, retorna uma página (keyset): as notas com id maior que `after_id`.
+        `colunas` restringe os campos retornados (o id é sempre incluído).
+        """
+        try:
+            query = self.supabase.table(self._tabela_notas(filters)).select(_projecao(colunas, 'id'))
+            query = self._aplicar_filtros_notas(query, filters)
+            if after_id is not None:
+                query = query.gt('id', after_id)
+            query = query.order('id')
+            if limit is not None:
+                query = query.limit(limit)
             
             result = query.execute()
             return result.data if result.data else []
         except Exception as e:
             print(f"Erro ao buscar notas: {e}")
+            nao_armazenar()
+            return []
+    
+    @cacheado('notas')
+    def get_notas_recentes(self, limite: int = 5, colunas: str = '*') -> List[Dict]:
+        """Notas mais recentes por data de emissão"""
+        try:
+            result = self.supabase.table('notas').select(colunas).order('data_emissao', desc=True).order('id', desc=True).limit(limite).execute()
+            return result.data if result.data else []
+        except Exception as e:
+            print(f"Erro ao buscar notas recentes: {e}")
+            nao_armazenar()
+            return []
+    
+    @cacheado('notas', 'parcelas')
+    def count_notas(self, filters: Optional[Dict] = None) -> int:
+        """Conta as notas que atendem aos filtros (contagem exata no servidor)"""
+        try:
+            query = self.supabase.table(self._tabela_notas(filters)).select('id', count='exact')
+            query = self._aplicar_filtros_notas(query, filters)
+            result = query.limit(1).execute()
+            return result.count or 0
+        except Exception as e:
+            print(f"Erro ao contar notas: {e}")
+            nao_armazenar()
+            return 0
+    
+    def get_pagina_notas(self, filters: Optional[Dict] = None, after_id: Optional[int] = None,
+                         limit: int = 20, colunas: str = '*') -> Tuple[int, List[Dict]]:
+        """Total de notas que atendem aos filtros e uma página delas (keyset por id), da mesma fonte.
+        
+        Com a réplica local, o total e os ids da página saem dos mesmos quadros e só as
+        notas da página são buscadas no servidor, com as colunas pedidas; sem ela, o total
+        e a página vêm do servidor (count_notas e get_notas).
+        """
+        quadros = self._quadros_da_replica()
+        if quadros is None:
+            return self.count_notas(filters), self.get_notas(filters, after_id=after_id, limit=limit, colunas=colunas)
+        ids = quadros['notas'].loc[mascara_notas(quadros['notas'], quadros['parcelas'], filters), 'id']
+        total = len(ids)
+        if after_id is not None:
+            ids = ids[ids > after_id]
+        return total, self.get_notas_by_ids(ids.nsmallest(limit).tolist(), colunas)
+    
+    @cacheado('notas')
+    def get_notas_by_ids(self, nota_ids: List[int], colunas: str = '*') -> List[Dict]:
+        """Notas com os ids dados, em ordem de id"""
+        if not nota_ids:
+            return []
+        try:
+            result = self.supabase.table('notas').select(_projecao(colunas, 'id')).in_('id', list(nota_ids)).order('id').execute()
+            return result.data if result.data else []
+        except Exception as e:
+            print(f"Erro ao buscar notas por id: {e}")
+            nao_armazenar()
+            return []
+    
+    def get_notas_com_parcelas(self, filters: Optional[Dict] = None, colunas_nota: str = '*',
+                               colunas_parcela: str = '*') -> List[Dict]:
+        """Busca notas com as parcelas embutidas (chave 'parcelas'), ordenadas por vencimento.
+        
+        Servida pela réplica local quando ela guarda as colunas pedidas.
+        """
+        if (self.replica is not None and self.replica.cobre('notas', colunas_nota)
+                and self.replica.cobre('parcelas', colunas_parcela)):
+            tabelas = self.replica.linhas('notas', 'parcelas')
+            if tabelas is not None:
+                return self._notas_com_parcelas_da_replica(tabelas, filters, colunas_nota, colunas_parcela)
+        return self._buscar_notas_com_parcelas(filters, colunas_nota, colunas_parcela)
+    
+    def _notas_com_parcelas_da_replica(self, tabelas: Dict[str, List[Dict]], filters: Optional[Dict],
+                                       colunas_nota: str, colunas_parcela: str) -> List[Dict]:
+        campos_nota = [c.strip() for c in _projecao(colunas_nota, 'id').split(',')]
+        campos_parcela = [c.strip() for c in colunas_parcela.split(',')]
+        por_nota: Dict[int, List[Dict]] = {}
+        for parcela in tabelas['parcelas']:
+            por_nota.setdefault(parcela['nota_id'], []).append(parcela)
+        
+        notas = []
+        for nota in tabelas['notas']:
+            if filters and any(filters.get(f) and nota.get(f) != filters[f]
+                               for f in ('fornecedor', 'local_aplicacao', 'status_material')):
+                continue
+            parcelas = sorted(por_nota.get(nota['id'], []), key=lambda p: p['data_vencimento'] or '')
+            notas.append(dict(nota, parcelas=parcelas))
+        notas = self._filtrar_por_parcelas(notas, filters)
+        
+        return [
+            dict({c: nota.get(c) for c in campos_nota},
+                 parcelas=[{c: p.get(c) for c in campos_parcela} for p in nota['parcelas']])
+            for nota in notas
+        ]
+    
+    @cacheado('notas', 'parcelas')
+    def _buscar_notas_com_parcelas(self, filters: Optional[Dict], colunas_nota: str,
+                                   colunas_parcela: str) -> List[Dict]:
+        try:
+            filtros_parcelas = {f: filters[f] for f in FILTROS_POR_PARCELAS if filters and filters.get(f)}
+            filtros_nota = {k: v for k, v in (filters or {}).items() if k not in FILTROS_POR_PARCELAS}
+            # O id da nota é necessário para o PostgREST relacionar as parcelas; os filtros
+            # por parcelas são aplicados depois, sobre as colunas de que dependem
+            if filtros_parcelas:
+                colunas_nota = _projecao(colunas_nota, 'id', 'eh_parcelada', 'status_material')
+                colunas_parcela = _projecao(colunas_parcela, 'status', 'status_material')
+            else:
+                colunas_nota = _projecao(colunas_nota, 'id')
+            select = f"{colunas_nota}, parcelas({colunas_parcela})"
+            
+            notas = []
+            inicio = 0
+            while True:
+                query = self.supabase.table('notas').select(select)
+                query = self._aplicar_filtros_notas(query, filtros_nota)
+                result = query.order('id').order('data_vencimento', foreign_table='parcelas').range(inicio, inicio + PAGE_SIZE - 1).execute()
+                dados = result.data if result.data else []
+                notas.extend(dados)
+                if len(dados) < PAGE_SIZE:
+                    break
+                inicio += PAGE_SIZE
+            
+            for nota in notas:
+                nota['parcelas'] = nota.get('parcelas') or []
+            return self._filtrar_por_parcelas(notas, filtros_parcelas)
+        except Exception as e:
+            print(f"Erro ao buscar notas com parcelas: {e}")
+            nao_armazenar()
+            return []
+    
+    def get_quadros_notas(self) -> Dict[str, pd.DataFrame]:
+        """Todas as notas e parcelas em DataFrames tipados ('notas' e 'parcelas', ver quadros.py).
+        
+        Com a réplica local os quadros são montados uma vez por versão da réplica e
+        compartilhados entre as sessões, portanto não devem ser alterados. Sem ela,
+        todas as notas e parcelas são baixadas a cada chamada.
+        """
+        quadros = self._quadros_da_replica()
+        if quadros is not None:
+            return quadros
+        notas = self._buscar_notas_com_parcelas(
+            None, ', '.join(COLUNAS_REPLICA['notas']), ', '.join(COLUNAS_REPLICA['parcelas'])
+        )
+        return _quadros_notas(notas, [parcela for nota in notas for parcela in nota['parcelas']])
+    
+    def _quadros_da_replica(self) -> Optional[Dict[str, pd.DataFrame]]:
+        """Quadros da versão atual da réplica local, ou None sem réplica disponível"""
+        if self.replica is None:
+            return None
+        quadros = self._quadros
+        if quadros is not None and quadros[0] == self.replica.versao_atual('notas', 'parcelas'):
+            return quadros[1]
+        resultado = self.replica.linhas_versionadas('notas', 'parcelas')
+        if resultado is None:
+            return None
+        versao, tabelas = resultado
+        self._quadros = (versao, _quadros_notas(tabelas['notas'], tabelas['parcelas']))
+        return self._quadros[1]
+    
+    def get_resumo_notas(self, filters: Optional[Dict] = None) -> Dict[str, Dict]:
+        """Total e quantidade por status das parcelas das notas que atendem aos filtros de get_notas.
+        
+        Com o filtro 'material', apenas as parcelas com esse status do material. Calculado
+        sobre os quadros da réplica local ou, sem ela, agregado no servidor.
+        """
+        quadros = self._quadros_da_replica()
+        if quadros is None:
+            return self._buscar_resumo_notas(filters)
+        mascara = mascara_notas(quadros['notas'], quadros['parcelas'], filters)
+        parcelas = quadros['parcelas']
+        parcelas = parcelas[parcelas['nota_id'].isin(quadros['notas'].loc[mascara, 'id'])]
+        if (filters or {}).get('material'):
+            parcelas = parcelas[parcelas['status_material'].isin([filters['material']])]
+        grupos = parcelas.groupby('status', observed=True)['valor'].agg(['sum', 'count'])
+        return {status: {'total': float(linha['sum']), 'quantidade': int(linha['count'])}
+                for status, linha in grupos.iterrows()}
+    
+    @cacheado('notas', 'parcelas')
+    def _buscar_resumo_notas(self, filters: Optional[Dict]) -> Dict[str, Dict]:
+        filters = filters or {}
+        try:
+            result = self.supabase.rpc('resumo_parcelas_notas', {
+                'p_fornecedor': filters.get('fornecedor'),
+                'p_local': filters.get('local_aplicacao'),
+                'p_status_material': filters.get('status_material'),
+                'p_material': filters.get('material'),
+                'p_status_parcela': filters.get('status_parcela')
+            }).execute()
+            return {linha['status']: {'total': float(linha['total'] or 0), 'quantidade': int(linha['quantidade'] or 0)}
+                    for linha in (result.data or [])}
+        except Exception as e:
+            print(f"Erro ao resumir parcelas das notas: {e}")
+            nao_armazenar()
+            return {}
+    
+    def get_fornecedores_notas(self) -> List[str]:
+        """Fornecedores distintos presentes nas notas (inclui nomes digitados ou que não estão mais no cadastro)"""
+        quadros = self._quadros_da_replica()
+        if quadros is None:
+            return self._buscar_fornecedores_notas()
+        return sorted(quadros['notas']['fornecedor'].cat.categories)
+    
+    @cacheado('notas')
+    def _buscar_fornecedores_notas(self) -> List[str]:
+        try:
+            result = self.supabase.rpc('fornecedores_notas', {}).execute()
+            return [linha['fornecedor'] for linha in (result.data or []) if linha['fornecedor']]
+        except Exception as e:
+            print(f"Erro ao buscar fornecedores das notas: {e}")
+            nao_armazenar()
             return []
     
     def verificar_duplicata_nota(self, numero_nota: str, fornecedor: str) -> bool:
@@ -53,65 +432,50 @@ class DatabaseManager:
             print(f"Erro ao verificar duplicata: {e}")
             return False
     
+    def _atualizar_auditado(self, tabela: str, registro_id: int, update_data: Dict) -> Optional[Dict]:
+        """Aplica a atualização e grava o log (com a imagem anterior) em uma única requisição"""
+        result = self.supabase.rpc('atualizar_registro_auditado', {
+            'p_tabela': tabela,
+            'p_id': registro_id,
+            'p_dados': update_data,
+            'p_usuario_id': st.session_state.get('user_id')
+        }).execute()
+        return result.data if result.data else None
+    
+    @invalida('notas', 'logs_sistema')
     def update_nota(self, nota_id: int, update_data: Dict) -> Dict:
         """Atualiza uma nota"""
         try:
-            # Buscar estado anterior para log
-            prev_q = self.supabase.table('notas').select('*').eq('id', nota_id).execute()
-            dados_anteriores = prev_q.data[0] if prev_q.data else None
-
-            result = self.supabase.table('notas').update(update_data).eq('id', nota_id).execute()
-            updated = result.data[0] if result.data else None
-
-            # Log de atualização
-            try:
-                if updated:
-                    self.create_log({
-                        'usuario_id': st.session_state.get('user_id'),
-                        'acao': 'UPDATE',
-                        'tabela_afetada': 'notas',
-                        'registro_id': nota_id,
-                        'dados_anteriores': dados_anteriores,
-                        'dados_novos': update_data
-                    })
-            except Exception as _:
-                pass
-
-            return updated
+            return self._atualizar_auditado('notas', nota_id, update_data)
         except Exception as e:
             print(f"Erro ao atualizar nota: {e}")
             return None
     
     def delete_nota(self, nota_id: int) -> bool:
         """Deleta uma nota e suas parcelas"""
+        return nota_id in self.delete_notas([nota_id])
+    
+    @invalida('notas', 'parcelas', 'logs_sistema')
+    def delete_notas(self, nota_ids: List[int]) -> List[int]:
+        """Deleta notas e suas parcelas em uma única transação; retorna os ids removidos.
+        
+        A função excluir_notas (setup_otimizacoes.sql) grava um log por nota com a
+        nota e as parcelas removidas.
+        """
+        if not nota_ids:
+            return []
         try:
-            # Buscar dados anteriores
-            prev_nota_q = self.supabase.table('notas').select('*').eq('id', nota_id).execute()
-            prev_nota = prev_nota_q.data[0] if prev_nota_q.data else None
-            prev_parcelas_q = self.supabase.table('parcelas').select('*').eq('nota_id', nota_id).execute()
-            prev_parcelas = prev_parcelas_q.data if prev_parcelas_q.data else []
-            # Primeiro deleta as parcelas
-            self.supabase.table('parcelas').delete().eq('nota_id', nota_id).execute()
-            # Depois deleta a nota
-            self.supabase.table('notas').delete().eq('id', nota_id).execute()
-            # Log
-            try:
-                self.create_log({
-                    'usuario_id': st.session_state.get('user_id'),
-                    'acao': 'DELETE',
-                    'tabela_afetada': 'notas',
-                    'registro_id': nota_id,
-                    'dados_anteriores': {'nota': prev_nota, 'parcelas': prev_parcelas},
-                    'dados_novos': None
-                })
-            except Exception as _:
-                pass
-            return True
+            result = self.supabase.rpc('excluir_notas', {
+                'p_ids': list(nota_ids),
+                'p_usuario_id': st.session_state.get('user_id')
+            }).execute()
+            return result.data if result.data else []
         except Exception as e:
-            print(f"Erro ao deletar nota: {e}")
-            return False
+            print(f"Erro ao deletar notas: {e}")
+            return []
     
     # Operações para Parcelas
+    @invalida('parcelas')
     def create_parcela(self, parcela_data: Dict) -> Dict:
         """Cria uma nova parcela"""
         try:
@@ -125,6 +489,7 @@ class DatabaseManager:
             print(f"Erro ao criar parcela: {e}")
             return None
     
+    @invalida('parcelas')
     def create_parcelas(self, parcelas_data: List[Dict]) -> List[Dict]:
         """Cria múltiplas parcelas"""
         try:
@@ -146,122 +511,143 @@ class DatabaseManager:
             print(f"Debug: Tipo do erro: {type(e)}")
             return []
     
-    def get_parcelas_by_nota(self, nota_id: int) -> List[Dict]:
+    @cacheado('parcelas')
+    def get_parcelas_by_nota(self, nota_id: int, colunas: str = '*') -> List[Dict]:
         """Busca parcelas de uma nota específica"""
         try:
-            result = self.supabase.table('parcelas').select('*').eq('nota_id', nota_id).order('data_vencimento').execute()
+            result = self.supabase.table('parcelas').select(colunas).eq('nota_id', nota_id).order('data_vencimento').execute()
             return result.data if result.data else []
         except Exception as e:
             print(f"Erro ao buscar parcelas: {e}")
+            nao_armazenar()
             return []
     
+    @cacheado('parcelas')
+    def get_parcelas_by_notas(self, nota_ids: List[int], colunas: str = '*') -> Dict[int, List[Dict]]:
+        """Busca parcelas de várias notas em lote, agrupadas por nota_id"""
+        ids = list(dict.fromkeys(nota_ids))
+        select = _projecao(colunas, 'nota_id')
+        parcelas_por_nota = {nota_id: [] for nota_id in ids}
+        try:
+            # Lotes de ids para não estourar o tamanho da URL do filtro in_
+            for i in range(0, len(ids), IN_CHUNK_SIZE):
+                lote = ids[i:i + IN_CHUNK_SIZE]
+                inicio = 0
+                # Paginar, pois o PostgREST limita o número de linhas por resposta
+                while True:
+                    result = self.supabase.table('parcelas').select(select).in_('nota_id', lote).order('data_vencimento').order('id').range(inicio, inicio + PAGE_SIZE - 1).execute()
+                    dados = result.data if result.data else []
+                    for parcela in dados:
+                        parcelas_por_nota.setdefault(parcela['nota_id'], []).append(parcela)
+                    if len(dados) < PAGE_SIZE:
+                        break
+                    inicio += PAGE_SIZE
+            return parcelas_por_nota
+        except Exception as e:
+            print(f"Erro ao buscar parcelas em lote: {e}")
+            nao_armazenar()
+            return {nota_id: [] for nota_id in ids}
+    
+    @invalida('parcelas', 'logs_sistema')
     def update_parcela_status(self, parcela_id: int, status: str, data_pagamento: Optional[date] = None) -> Dict:
         """Atualiza status de uma parcela"""
         try:
-            prev_q = self.supabase.table('parcelas').select('*').eq('id', parcela_id).execute()
-            dados_anteriores = prev_q.data[0] if prev_q.data else None
             update_data = {'status': status}
             if data_pagamento:
                 update_data['data_pagamento'] = data_pagamento.isoformat()
-            
-            result = self.supabase.table('parcelas').update(update_data).eq('id', parcela_id).execute()
-            updated = result.data[0] if result.data else None
-            # Log
-            try:
-                if updated:
-                    self.create_log({
-                        'usuario_id': st.session_state.get('user_id'),
-                        'acao': 'UPDATE',
-                        'tabela_afetada': 'parcelas',
-                        'registro_id': parcela_id,
-                        'dados_anteriores': dados_anteriores,
-                        'dados_novos': update_data
-                    })
-            except Exception as _:
-                pass
-            return updated
+            return self._atualizar_auditado('parcelas', parcela_id, update_data)
         except Exception as e:
             print(f"Erro ao atualizar parcela: {e}")
             return None
     
+    @invalida('parcelas', 'logs_sistema')
     def update_parcela(self, parcela_id: int, valor: float, data_vencimento: str) -> Dict:
         """Atualiza valor e data de vencimento de uma parcela"""
         try:
-            prev_q = self.supabase.table('parcelas').select('*').eq('id', parcela_id).execute()
-            dados_anteriores = prev_q.data[0] if prev_q.data else None
             update_data = {
                 'valor': valor,
                 'data_vencimento': data_vencimento
             }
-            
-            result = self.supabase.table('parcelas').update(update_data).eq('id', parcela_id).execute()
-            updated = result.data[0] if result.data else None
-            # Log
-            try:
-                if updated:
-                    self.create_log({
-                        'usuario_id': st.session_state.get('user_id'),
-                        'acao': 'UPDATE',
-                        'tabela_afetada': 'parcelas',
-                        'registro_id': parcela_id,
-                        'dados_anteriores': dados_anteriores,
-                        'dados_novos': update_data
-                    })
-            except Exception as _:
-                pass
-            return updated
+            return self._atualizar_auditado('parcelas', parcela_id, update_data)
         except Exception as e:
             print(f"Erro ao atualizar parcela: {e}")
             return None
     
+    @invalida('parcelas', 'logs_sistema')
     def update_parcela_status_material(self, parcela_id: int, status_material: str) -> Dict:
         """Atualiza status_material de uma parcela"""
         try:
-            prev_q = self.supabase.table('parcelas').select('*').eq('id', parcela_id).execute()
-            dados_anteriores = prev_q.data[0] if prev_q.data else None
             update_data = {
                 'status_material': status_material
             }
-            
-            result = self.supabase.table('parcelas').update(update_data).eq('id', parcela_id).execute()
-            updated = result.data[0] if result.data else None
-            # Log
-            try:
-                if updated:
-                    self.create_log({
-                        'usuario_id': st.session_state.get('user_id'),
-                        'acao': 'UPDATE',
-                        'tabela_afetada': 'parcelas',
-                        'registro_id': parcela_id,
-                        'dados_anteriores': dados_anteriores,
-                        'dados_novos': update_data
-                    })
-            except Exception as _:
-                pass
-            return updated
+            return self._atualizar_auditado('parcelas', parcela_id, update_data)
         except Exception as e:
             print(f"Erro ao atualizar status_material da parcela: {e}")
             return None
     
+    @invalida('parcelas', 'logs_sistema')
     def update_parcelas_batch(self, parcelas_data: List[Dict]) -> List[Dict]:
-        """Atualiza múltiplas parcelas em lote"""
-        try:
-            updated_parcelas = []
-            for parcela in parcelas_data:
-                result = self.supabase.table('parcelas').update({
-                    'valor': parcela['valor'],
-                    'data_vencimento': parcela['data_vencimento']
-                }).eq('id', parcela['id']).execute()
-                
-                if result.data:
-                    updated_parcelas.append(result.data[0])
-            
-            return updated_parcelas
+        """Atualiza valor e vencimento de múltiplas parcelas em uma única transação.
+        
+        Usa a função atualizar_parcelas_lote (setup_otimizacoes.sql), que também
+        grava um único log com os dados anteriores e os novos.
+        """
+        if not parcelas_data:
+            return []
+        try:
+            payload = [{
+                'id': parcela['id'],
+                'valor': parcela['valor'],
+                'data_vencimento': parcela['data_vencimento']
+            } for parcela in parcelas_data]
+            result = self.supabase.rpc('atualizar_parcelas_lote', {
+                'p_parcelas': payload,
+                'p_usuario_id': st.session_state.get('user_id')
+            }).execute()
+            return result.data if result.data else []
         except Exception as e:
             print(f"Erro ao atualizar parcelas em lote: {e}")
             return []
     
+    @invalida('parcelas')
+    def atualizar_status_vencidas(self) -> bool:
+        """Marca como VENCIDA as parcelas pendentes com vencimento passado (atualizar_status_parcelas_vencidas)"""
+        try:
+            self.supabase.rpc('atualizar_status_parcelas_vencidas', {}).execute()
+            return True
+        except Exception as e:
+            print(f"Erro ao atualizar status de parcelas vencidas: {e}")
+            return False
+    
+    def limpar_exclusoes(self) -> bool:
+        """Descarta os registros de exclusão fora da retenção da sincronização incremental"""
+        try:
+            self.supabase.rpc('limpar_exclusoes', {}).execute()
+            return True
+        except Exception as e:
+            print(f"Erro ao limpar registros de exclusão: {e}")
+            return False
+    
+    def manutencao_diaria(self):
+        """Tarefa do agendador diário: status das parcelas vencidas e limpeza das exclusões"""
+        self.atualizar_status_vencidas()
+        self.limpar_exclusoes()
+    
+    def adquirir_lideranca(self, nome: str, dono: str, segundos: int) -> bool:
+        """Adquire ou renova a concessão de liderança de uma tarefa agendada"""
+        try:
+            result = self.supabase.rpc('adquirir_lideranca', {
+                'p_nome': nome,
+                'p_dono': dono,
+                'p_segundos': segundos
+            }).execute()
+            return bool(result.data)
+        except Exception as e:
+            print(f"Erro ao adquirir liderança de '{nome}': {e}")
+            return False
+    
     # Operações para Usuários
+    @invalida('usuarios')
     def create_usuario(self, usuario_data: Dict) -> Dict:
         """Cria um novo usuário"""
         try:
@@ -271,42 +657,47 @@ class DatabaseManager:
             print(f"Erro ao criar usuário: {e}")
             return None
     
-    def get_usuario_by_id(self, usuario_id: int) -> Dict:
+    @cacheado('usuarios')
+    def get_usuario_by_id(self, usuario_id: int, colunas: str = '*') -> Dict:
         """Busca usuário por ID"""
         try:
-            result = self.supabase.table('usuarios').select('*').eq('id', usuario_id).execute()
+            result = self.supabase.table('usuarios').select(colunas).eq('id', usuario_id).execute()
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Erro ao buscar usuário por ID: {e}")
+            nao_armazenar()
             return None
     
-    def get_usuario_by_cpf(self, cpf: str) -> Dict:
+    def get_usuario_by_cpf(self, cpf: str, colunas: str = '*') -> Dict:
         """Busca usuário por CPF"""
         try:
-            result = self.supabase.table('usuarios').select('*').eq('cpf', cpf).execute()
+            result = self.supabase.table('usuarios').select(colunas).eq('cpf', cpf).execute()
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Erro ao buscar usuário por CPF: {e}")
             return None
 
-    def get_usuario_by_email(self, email: str) -> Dict:
+    def get_usuario_by_email(self, email: str, colunas: str = '*') -> Dict:
         """Busca usuário por email"""
         try:
-            result = self.supabase.table('usuarios').select('*').eq('email', email).execute()
+            result = self.supabase.table('usuarios').select(colunas).eq('email', email).execute()
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Erro ao buscar usuário por email: {e}")
             return None
     
-    def get_usuarios(self) -> List[Dict]:
+    @cacheado('usuarios', cache='referencias')
+    def get_usuarios(self, colunas: str = '*') -> List[Dict]:
         """Busca todos os usuários"""
         try:
-            result = self.supabase.table('usuarios').select('*').order('nome').execute()
+            result = self.supabase.table('usuarios').select(colunas).order('nome').execute()
             return result.data if result.data else []
         except Exception as e:
             print(f"Erro ao buscar usuários: {e}")
+            nao_armazenar()
             return []
     
+    @invalida('usuarios')
     def update_usuario(self, usuario_id: int, update_data: Dict) -> Dict:
         """Atualiza dados do usuário"""
         try:
@@ -316,6 +707,7 @@ class DatabaseManager:
             print(f"Erro ao atualizar usuário: {e}")
             return None
     
+    @invalida('usuarios')
     def delete_usuario(self, usuario_id: int) -> bool:
         """Desativa usuário (soft delete)"""
         try:
@@ -326,8 +718,12 @@ class DatabaseManager:
             return False
     
     # Operações para Logs
+    @invalida('logs_sistema')
     def create_log(self, log_data: Dict) -> Dict:
-        """Cria um novo log"""
+        """Cria um novo log (enfileirado para gravação em lote se LOG_ASSINCRONO)"""
+        if gravador_logs is not None:
+            gravador_logs.registrar(log_data)
+            return log_data
         try:
             result = self.supabase.table('logs_sistema').insert(log_data).execute()
             return result.data[0] if result.data else None
@@ -335,43 +731,57 @@ class DatabaseManager:
             print(f"Erro ao criar log: {e}")
             return None
     
-    def get_logs(self, limit: int = 100, offset: int = 0) -> List[Dict]:
-        """Busca logs do sistema"""
+    def descarregar_logs(self):
+        """Grava imediatamente os logs enfileirados (antes de exibi-los)"""
+        if gravador_logs is not None:
+            gravador_logs.descarregar()
+    
+    @cacheado('logs_sistema', 'usuarios')
+    def get_logs(self, limit: int = 100, offset: int = 0, colunas: str = COLUNAS_LOG_LISTA) -> List[Dict]:
+        """Busca logs do sistema (sem os dados anteriores/novos; ver get_log)"""
         try:
-            result = self.supabase.table('logs_sistema').select('''
-                *,
-                usuarios!logs_sistema_usuario_id_fkey(nome, funcao, empresa)
-            ''').order('created_at', desc=True).limit(limit).offset(offset).execute()
+            result = self.supabase.table('logs_sistema').select(f"{colunas}, {USUARIO_LOG}").order('created_at', desc=True).limit(limit).offset(offset).execute()
             return result.data if result.data else []
         except Exception as e:
             print(f"Erro ao buscar logs: {e}")
+            nao_armazenar()
             return []
     
-    def get_logs_by_usuario(self, usuario_id: int, limit: int = 50) -> List[Dict]:
+    @cacheado('logs_sistema', 'usuarios')
+    def get_logs_by_usuario(self, usuario_id: int, limit: int = 50, colunas: str = COLUNAS_LOG_LISTA) -> List[Dict]:
         """Busca logs de um usuário específico"""
         try:
-            result = self.supabase.table('logs_sistema').select('''
-                *,
-                usuarios!logs_sistema_usuario_id_fkey(nome, funcao, empresa)
-            ''').eq('usuario_id', usuario_id).order('created_at', desc=True).limit(limit).execute()
+            result = self.supabase.table('logs_sistema').select(f"{colunas}, {USUARIO_LOG}").eq('usuario_id', usuario_id).order('created_at', desc=True).limit(limit).execute()
             return result.data if result.data else []
         except Exception as e:
             print(f"Erro ao buscar logs do usuário: {e}")
+            nao_armazenar()
             return []
     
-    def get_logs_by_acao(self, acao: str, limit: int = 50) -> List[Dict]:
+    @cacheado('logs_sistema', 'usuarios')
+    def get_logs_by_acao(self, acao: str, limit: int = 50, colunas: str = COLUNAS_LOG_LISTA) -> List[Dict]:
         """Busca logs por tipo de ação"""
         try:
-            result = self.supabase.table('logs_sistema').select('''
-                *,
-                usuarios!logs_sistema_usuario_id_fkey(nome, funcao, empresa)
-            ''').eq('acao', acao).order('created_at', desc=True).limit(limit).execute()
+            result = self.supabase.table('logs_sistema').select(f"{colunas}, {USUARIO_LOG}").eq('acao', acao).order('created_at', desc=True).limit(limit).execute()
             return result.data if result.data else []
         except Exception as e:
             print(f"Erro ao buscar logs por ação: {e}")
+            nao_armazenar()
             return []
     
+    @cacheado('logs_sistema', 'usuarios')
+    def get_log(self, log_id: int) -> Optional[Dict]:
+        """Busca um log completo, com os dados anteriores e novos"""
+        try:
+            result = self.supabase.table('logs_sistema').select(f"*, {USUARIO_LOG}").eq('id', log_id).execute()
+            return result.data[0] if result.data else None
+        except Exception as e:
+            print(f"Erro ao buscar log: {e}")
+            nao_armazenar()
+            return None
+    
     # Operações para Locais de Aplicação
+    @invalida('locais_aplicacao')
     def create_local_aplicacao(self, nome: str) -> Dict:
         """Cria um novo local de aplicação"""
         try:
@@ -381,15 +791,18 @@ class DatabaseManager:
             print(f"Erro ao criar local: {e}")
             return None
     
-    def get_locais_aplicacao(self) -> List[Dict]:
+    @cacheado('locais_aplicacao', cache='referencias')
+    def get_locais_aplicacao(self, colunas: str = '*') -> List[Dict]:
         """Busca todos os locais de aplicação"""
         try:
-            result = self.supabase.table('locais_aplicacao').select('*').order('nome').execute()
+            result = self.supabase.table('locais_aplicacao').select(colunas).order('nome').execute()
             return result.data if result.data else []
         except Exception as e:
             print(f"Erro ao buscar locais: {e}")
+            nao_armazenar()
             return []
     
+    @invalida('locais_aplicacao')
     def delete_local_aplicacao(self, local_id: int) -> bool:
         """Deleta um local de aplicação"""
         try:
@@ -400,36 +813,161 @@ class DatabaseManager:
             return False
     
     # Relatórios
+    @cacheado('parcelas', 'notas')
+    def get_totais_agrupados(self, inicio: date, fim: date, agrupamento: str = 'status') -> List[Dict]:
+        """Totais das parcelas com vencimento em [inicio, fim), agregados no servidor.
+        
+        `agrupamento`: 'status', 'local' (id do local), 'fornecedor' ou 'status_material'.
+        Retorna um item por chave com total_pago, total_pendente, total_vencido, total
+        e quantidade, em ordem decrescente de total.
+        """
+        try:
+            return self._totais_agrupados(inicio, fim, agrupamento)
+        except Exception as e:
+            print(f"Erro ao buscar totais agrupados: {e}")
+            nao_armazenar()
+            return []
+    
+    def _totais_agrupados(self, inicio: date, fim: date, agrupamento: str) -> List[Dict]:
+        result = self.supabase.rpc('relatorio_totais', {
+            'p_inicio': inicio.isoformat(),
+            'p_fim': fim.isoformat(),
+            'p_agrupamento': agrupamento
+        }).execute()
+        grupos = {}
+        for linha in result.data or []:
+            chave = linha['chave']
+            if agrupamento == 'local' and chave is not None:
+                chave = int(chave)
+            grupo = grupos.setdefault(chave, {
+                'chave': chave, 'total_pago': 0.0, 'total_pendente': 0.0,
+                'total_vencido': 0.0, 'total': 0.0, 'quantidade': 0
+            })
+            valor = float(linha['total'] or 0)
+            coluna = COLUNAS_TOTAL_STATUS.get(linha['status'])
+            if coluna:
+                grupo[coluna] += valor
+            grupo['total'] += valor
+            grupo['quantidade'] += int(linha['quantidade'] or 0)
+        return sorted(grupos.values(), key=lambda g: g['total'], reverse=True)
+    
+    @cacheado('parcelas', 'notas')
     def get_relatorio_mensal(self, mes: int, ano: int) -> Dict:
-        """Gera relatório mensal de contas"""
+        """Totais do mês por status, agregados no servidor (o detalhamento das parcelas
+        é paginado sob demanda por get_parcelas_relatorio)"""
+        vazio = {'total_pago': 0, 'total_pendente': 0, 'total_vencido': 0, 'quantidades': {}}
         try:
-            # Busca parcelas do mês
-            start_date = f"{ano}-{mes:02d}-01"
-            if mes == 12:
-                end_date = f"{ano+1}-01-01"
-            else:
-                end_date = f"{ano}-{mes+1:02d}-01"
-            
-            parcelas = self.supabase.table('parcelas').select('*, notas(*)').gte('data_vencimento', start_date).lt('data_vencimento', end_date).execute()
-            
-            if not parcelas.data:
-                return {'parcelas': [], 'total_pago': 0, 'total_pendente': 0, 'total_vencido': 0}
-            
-            total_pago = sum(p['valor'] for p in parcelas.data if p['status'] == 'PAGA')
-            total_pendente = sum(p['valor'] for p in parcelas.data if p['status'] == 'PENDENTE')
-            total_vencido = sum(p['valor'] for p in parcelas.data if p['status'] == 'VENCIDA')
+            inicio = date(ano, mes, 1)
+            fim = date(ano + 1, 1, 1) if mes == 12 else date(ano, mes + 1, 1)
+            por_status = {g['chave']: g for g in self._totais_agrupados(inicio, fim, 'status')}
+            if not por_status:
+                return vazio
             
             return {
-                'parcelas': parcelas.data,
-                'total_pago': total_pago,
-                'total_pendente': total_pendente,
-                'total_vencido': total_vencido
+                'total_pago': por_status.get('PAGA', {}).get('total', 0),
+                'total_pendente': por_status.get('PENDENTE', {}).get('total', 0),
+                'total_vencido': por_status.get('VENCIDA', {}).get('total', 0),
+                'quantidades': {status: g['quantidade'] for status, g in por_status.items()}
             }
         except Exception as e:
             print(f"Erro ao gerar relatório: {e}")
-            return {'parcelas': [], 'total_pago': 0, 'total_pendente': 0, 'total_vencido': 0}
+            nao_armazenar()
+            return vazio
+    
+    @cacheado('parcelas', 'notas')
+    def get_parcelas_relatorio(self, inicio: date, fim: date, filtros: Optional[Dict] = None,
+                               after_id: Optional[int] = None, limit: int = 50) -> List[Dict]:
+        """Uma página das parcelas com vencimento em [inicio, fim), com os dados da nota.
+        
+        `filtros`: 'status', 'fornecedor' e 'local_aplicacao'. Paginação por keyset:
+        `after_id` é o id da última parcela da página anterior.
+        """
+        filtros = filtros or {}
+        try:
+            result = self.supabase.rpc('relatorio_parcelas', {
+                'p_inicio': inicio.isoformat(),
+                'p_fim': fim.isoformat(),
+                'p_status': filtros.get('status'),
+                'p_fornecedor': filtros.get('fornecedor'),
+                'p_local': filtros.get('local_aplicacao'),
+                'p_apos_id': after_id,
+                'p_limite': limit
+            }).execute()
+            return result.data if result.data else []
+        except Exception as e:
+            print(f"Erro ao buscar parcelas do relatório: {e}")
+            nao_armazenar()
+            return []
+    
+    @cacheado('parcelas', 'notas')
+    def get_resumo_parcelas_relatorio(self, inicio: date, fim: date, filtros: Optional[Dict] = None) -> Dict[str, Dict]:
+        """Total e quantidade por status das parcelas de get_parcelas_relatorio com os mesmos filtros"""
+        filtros = filtros or {}
+        try:
+            result = self.supabase.rpc('relatorio_parcelas_resumo', {
+                'p_inicio': inicio.isoformat(),
+                'p_fim': fim.isoformat(),
+                'p_status': filtros.get('status'),
+                'p_fornecedor': filtros.get('fornecedor'),
+                'p_local': filtros.get('local_aplicacao')
+            }).execute()
+            return {linha['status']: {'total': float(linha['total'] or 0), 'quantidade': int(linha['quantidade'] or 0)}
+                    for linha in (result.data or [])}
+        except Exception as e:
+            print(f"Erro ao resumir parcelas do relatório: {e}")
+            nao_armazenar()
+            return {}
+
+    @cacheado('parcelas')
+    def get_relatorio_periodo(self, inicio: date, fim: date, granularidade: str = 'mes') -> List[Dict]:
+        """Totais pago/pendente/vencido por período de vencimento em [inicio, fim).
+        
+        Agregado no servidor (função relatorio_periodo) em uma única requisição,
+        com uma linha por período ('dia', 'semana', 'mes', 'trimestre' ou 'ano'),
+        inclusive os sem parcelas.
+        """
+        try:
+            result = self.supabase.rpc('relatorio_periodo', {
+                'p_inicio': inicio.isoformat(),
+                'p_fim': fim.isoformat(),
+                'p_granularidade': granularidade
+            }).execute()
+            return [{
+                'periodo': linha['periodo'],
+                'total_pago': float(linha['total_pago'] or 0),
+                'total_pendente': float(linha['total_pendente'] or 0),
+                'total_vencido': float(linha['total_vencido'] or 0),
+                'quantidade': int(linha['quantidade'] or 0)
+            } for linha in (result.data or [])]
+        except Exception as e:
+            print(f"Erro ao gerar relatório do período: {e}")
+            nao_armazenar()
+            return []
 
     # Views de resumo
+    @cacheado('notas', 'parcelas')
+    def get_kpis(self) -> Dict:
+        """Indicadores do dashboard lidos de kpis_resumo (mantida por gatilhos no banco).
+        
+        Retorna total_notas, valor_total, total_parcelas, parcelas_pagas,
+        parcelas_pendentes, parcelas_vencidas, valor_pago, valor_pendente e valor_vencido.
+        """
+        kpis = {coluna: 0 for coluna in COLUNAS_KPIS}
+        try:
+            result = self.supabase.table('kpis_resumo').select(', '.join(COLUNAS_KPIS)).eq('id', 1).execute()
+            if result.data:
+                for coluna, valor in result.data[0].items():
+                    if coluna.startswith('valor'):
+                        kpis[coluna] = round(float(valor or 0), 2)
+                    else:
+                        kpis[coluna] = int(valor or 0)
+            return kpis
+        except Exception as e:
+            print(f"Erro ao ler kpis_resumo: {e}")
+            nao_armazenar()
+            return kpis
+    
+    @cacheado('notas', 'parcelas')
     def get_resumo_notas_parcelas(self) -> Dict:
         """Lê a view vw_resumo_notas_parcelas e retorna um único registro com totais."""
         try:
@@ -445,6 +983,7 @@ class DatabaseManager:
             }
         except Exception as e:
             print(f"Erro ao ler vw_resumo_notas_parcelas: {e}")
+            nao_armazenar()
             return {
                 'total_em_estoque': 0,
                 'total_em_uso': 0,
@@ -452,6 +991,7 @@ class DatabaseManager:
                 'total_a_pagar': 0,
             }
 
+    @cacheado('notas')
     def get_total_de_notas_view(self) -> Dict:
         """Lê a view vw_total_de_notas e retorna um único registro com o total."""
         try:
@@ -461,9 +1001,11 @@ class DatabaseManager:
             return {'total_de_notas': 0}
         except Exception as e:
             print(f"Erro ao ler vw_total_de_notas: {e}")
+            nao_armazenar()
             return {'total_de_notas': 0}
     
     # Operações para Fornecedores
+    @invalida('fornecedores')
     def create_fornecedor(self, fornecedor_data: Dict) -> Dict:
         """Cria um novo fornecedor"""
         try:
@@ -473,10 +1015,27 @@ class DatabaseManager:
             print(f"Erro ao criar fornecedor: {e}")
             return None
     
-    def get_fornecedores(self, filters: Optional[Dict] = None) -> List[Dict]:
-        """Busca todos os fornecedores com filtros opcionais"""
+    def get_fornecedores(self, filters: Optional[Dict] = None, colunas: str = '*') -> List[Dict]:
+        """Busca todos os fornecedores com filtros opcionais (da réplica local, quando ela guarda as colunas)"""
+        if self.replica is not None and self.replica.cobre('fornecedores', colunas):
+            tabelas = self.replica.linhas('fornecedores')
+            if tabelas is not None:
+                campos = [c.strip() for c in colunas.split(',')]
+                filtros = filters or {}
+                # Mesma semântica dos filtros do PostgREST (ilike '%valor%' e eq)
+                return [
+                    {c: f.get(c) for c in campos}
+                    for f in tabelas['fornecedores']
+                    if (not filtros.get('nome') or filtros['nome'].lower() in (f.get('nome') or '').lower())
+                    and (not filtros.get('cnpj') or f.get('cnpj') == filtros['cnpj'])
+                    and (not filtros.get('vendedor') or filtros['vendedor'].lower() in (f.get('vendedor') or '').lower())
+                ]
+        return self._buscar_fornecedores(filters, colunas)
+    
+    @cacheado('fornecedores', cache='referencias')
+    def _buscar_fornecedores(self, filters: Optional[Dict], colunas: str) -> List[Dict]:
         try:
-            query = self.supabase.table('fornecedores').select('*')
+            query = self.supabase.table('fornecedores').select(colunas)
             
             if filters:
                 if filters.get('nome'):
@@ -490,6 +1049,7 @@ class DatabaseManager:
             return result.data if result.data else []
         except Exception as e:
             print(f"Erro ao buscar fornecedores: {e}")
+            nao_armazenar()
             return []
     
     def verificar_fornecedor_cnpj(self, cnpj: str) -> bool:
@@ -501,15 +1061,18 @@ class DatabaseManager:
             print(f"Erro ao verificar CNPJ: {e}")
             return False
     
-    def get_fornecedor_by_id(self, fornecedor_id: int) -> Dict:
+    @cacheado('fornecedores')
+    def get_fornecedor_by_id(self, fornecedor_id: int, colunas: str = '*') -> Dict:
         """Busca um fornecedor pelo ID"""
         try:
-            result = self.supabase.table('fornecedores').select('*').eq('id', fornecedor_id).execute()
+            result = self.supabase.table('fornecedores').select(colunas).eq('id', fornecedor_id).execute()
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Erro ao buscar fornecedor: {e}")
+            nao_armazenar()
             return None
     
+    @invalida('fornecedores')
     def update_fornecedor(self, fornecedor_id: int, fornecedor_data: Dict) -> Dict:
         """Atualiza um fornecedor"""
         try:
@@ -519,6 +1082,7 @@ class DatabaseManager:
             print(f"Erro ao atualizar fornecedor: {e}")
             return None
     
+    @invalida('fornecedores')
     def delete_fornecedor(self, fornecedor_id: int) -> bool:
         """Exclui um fornecedor"""
         try:
@@ -526,4 +1090,27 @@ class DatabaseManager:
             return True
         except Exception as e:
             print(f"Erro ao excluir fornecedor: {e}")
-            return False
\ No newline at end of file
+            return False
+
+
+if INSTRUMENTACAO:
+    instrumentar_metodos(DatabaseManager)
+
+
+@st.cache_resource
+def obter_database_manager() -> DatabaseManager:
+    """DatabaseManager único por processo, reaproveitado entre reruns e sessões.
+    
+    Também inicia, uma vez por processo, a assinatura das notificações de alteração
+    e o agendador da manutenção diária.
+    """
+    db = DatabaseManager()
+    if NOTIFICACOES:
+        db.assinar_alteracoes()
+    if AGENDADOR_ATIVO:
+        horas, minutos = (int(parte) for parte in AGENDADOR_HORARIO.split(':'))
+        AgendadorDiario(
+            'manutencao_diaria', db.manutencao_diaria, db.adquirir_lideranca,
+            time(horas, minutos), AGENDADOR_VERIFICACAO_SEGUNDOS
+        ).iniciar()
+    return db
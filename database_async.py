@@ -0,0 +1,72 @@
+"""Acesso assíncrono ao banco e leituras concorrentes para as páginas.
+
+As páginas Streamlit executam leituras independentes uma após a outra, e cada
+uma espera o round trip da anterior. `AsyncDatabaseManager` expõe os mesmos
+métodos do DatabaseManager como corrotinas, e `carregar_em_paralelo` permite
+que uma página dispare todas as leituras iniciais de uma vez:
+
+    notas, locais = carregar_em_paralelo(
+        lambda: db.get_notas(),
+        db.get_locais_aplicacao,
+    )
+
+As chamadas reaproveitam o DatabaseManager síncrono (executado em threads via
+`asyncio.to_thread`), mantendo o cache de consultas, a coalescência de buscas
+e a instrumentação, e funcionam igualmente com o Supabase e com o backend local.
+"""
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+from database import DatabaseManager, obter_database_manager
+from instrumentacao import pagina_chamadora, pagina_contexto
+
+
+class AsyncDatabaseManager:
+    """Variante assíncrona do DatabaseManager: cada método público vira uma corrotina"""
+
+    def __init__(self, db: Optional[DatabaseManager] = None):
+        self.db = db or obter_database_manager()
+
+    def __getattr__(self, nome: str):
+        metodo = getattr(self.db, nome)
+        if nome.startswith('_') or not callable(metodo):
+            return metodo
+
+        async def corrotina(*args, **kwargs):
+            return await asyncio.to_thread(metodo, *args, **kwargs)
+
+        corrotina.__name__ = nome
+        corrotina.__doc__ = metodo.__doc__
+        return corrotina
+
+
+async def reunir(*chamadas: Callable[[], Any]) -> List[Any]:
+    """Executa as chamadas síncronas simultaneamente e retorna os resultados em ordem"""
+    return list(await asyncio.gather(*(asyncio.to_thread(chamada) for chamada in chamadas)))
+
+
+def carregar_em_paralelo(*chamadas: Callable[[], Any]) -> List[Any]:
+    """Executa leituras independentes ao mesmo tempo a partir de código síncrono.
+
+    Cada item é uma função sem argumentos (ex.: `db.get_locais_aplicacao` ou
+    `lambda: db.get_notas(filtros)`). Os resultados são retornados na mesma
+    ordem; o tempo total fica próximo ao da leitura mais lenta.
+    """
+    if len(chamadas) <= 1:
+        return [chamada() for chamada in chamadas]
+
+    # As threads não enxergam a pilha do script: a página é repassada por contexto
+    token = pagina_contexto.set(pagina_chamadora())
+    try:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(reunir(*chamadas))
+        # Já existe um event loop nesta thread: usar um pool de threads diretamente
+        with ThreadPoolExecutor(max_workers=len(chamadas)) as executor:
+            futuros = [executor.submit(contextvars.copy_context().run, chamada) for chamada in chamadas]
+            return [f.result() for f in futuros]
+    finally:
+        pagina_contexto.reset(token)
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Gerador de dados sintéticos para testes de carga
+
+Produz linhas válidas para usuarios, locais_aplicacao, fornecedores, notas,
+parcelas e logs_sistema em escala configurável. Os dados são gerados em
+lotes (memória limitada, independente do volume) e gravados no backend
+configurado (Supabase ou local) ou em arquivos CSV/Parquet.
+
+Distribuições: poucos fornecedores e locais concentram a maior parte das
+notas, valores seguem uma log-normal, a maioria das notas é à vista ou tem
+poucas parcelas e parcelas já vencidas estão em geral pagas.
+
+Uso:
+    python gerador_dados.py --notas 100000 --logs 1000000 --destino banco
+    python gerador_dados.py --notas 1000000 --destino parquet --saida dados/
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import random
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from utils import calcular_parcelas, formatar_cnpj, validar_cnpj
+
+PALAVRAS_FORNECEDOR = [
+    'Comercial', 'Distribuidora', 'Materiais', 'Construção', 'Ferragens', 'Madeireira',
+    'Elétrica', 'Hidráulica', 'Cimento', 'Aço', 'Tintas', 'Vidraçaria', 'Pisos', 'Areia',
+]
+SOBRENOMES = [
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Costa', 'Almeida',
+    'Ferreira', 'Rodrigues', 'Gomes', 'Martins', 'Araújo', 'Barbosa', 'Ribeiro',
+]
+NOMES = ['Ana', 'Bruno', 'Carla', 'Diego', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela', 'João']
+SUFIXOS = ['Ltda', 'S.A.', 'ME', 'EIRELI', 'EPP']
+MATERIAIS = ['Cimento CP-II', 'Vergalhão 10mm', 'Tijolo cerâmico', 'Areia média', 'Brita 1',
+             'Tubo PVC 100mm', 'Fio 2,5mm', 'Telha fibrocimento', 'Tinta acrílica', 'Porcelanato']
+FUNCOES = ['Administrador', 'Usuário', 'Financeiro', 'Contador']
+ACOES_LOG = ['LOGIN', 'LOGOUT', 'CREATE', 'UPDATE', 'DELETE', 'VIEW']
+PESOS_ACOES_LOG = [20, 15, 25, 30, 5, 5]
+
+# Número de parcelas: muitas notas à vista, poucas com parcelamento longo
+OPCOES_PARCELAS = list(range(1, 25))
+PESOS_PARCELAS = [40, 8, 12, 6, 5, 8] + [2] * 6 + [1] * 12
+
+# Tipos das colunas para gravação em Parquet
+TIPOS = {
+    'usuarios': {'id': 'int64', 'nome': 'string', 'cpf': 'string', 'email': 'string', 'funcao': 'string',
+                 'empresa': 'string', 'ativo': 'bool'},
+    'locais_aplicacao': {'id': 'int64', 'nome': 'string'},
+    'fornecedores': {'id': 'int64', 'nome': 'string', 'cnpj': 'string', 'telefone': 'string', 'vendedor': 'string'},
+    'notas': {'id': 'int64', 'numero_nota': 'string', 'fornecedor': 'string', 'valor_total': 'float64',
+              'data_emissao': 'string', 'descricao': 'string', 'local_aplicacao': 'int64',
+              'status_material': 'string', 'eh_parcelada': 'bool', 'num_parcelas': 'int64',
+              'dias_ate_primeira': 'int64', 'intervalo_dias': 'int64'},
+    'parcelas': {'id': 'int64', 'nota_id': 'int64', 'numero': 'int64', 'valor': 'float64',
+                 'data_vencimento': 'string', 'status': 'string', 'data_pagamento': 'string',
+                 'status_material': 'string'},
+    'logs_sistema': {'id': 'int64', 'usuario_id': 'int64', 'acao': 'string', 'tabela_afetada': 'string',
+                     'registro_id': 'int64', 'dados_anteriores': 'string', 'dados_novos': 'string',
+                     'ip_address': 'string', 'user_agent': 'string'},
+}
+# Fábrica do tipo pyarrow de cada tipo de TIPOS
+TIPOS_ARROW = {'int64': 'int64', 'float64': 'float64', 'string': 'string', 'bool': 'bool_'}
+
+
+def _digitos_verificadores(base: List[int], pesos_iniciais: List[int]) -> List[int]:
+    digitos = list(base)
+    for pesos in (pesos_iniciais, [pesos_iniciais[0] + 1] + pesos_iniciais):
+        resto = sum(d * p for d, p in zip(digitos, pesos)) % 11
+        digitos.append(0 if resto < 2 else 11 - resto)
+    return digitos
+
+
+def gerar_cnpj(sequencial: int) -> str:
+    """CNPJ formatado com dígitos verificadores válidos e único por sequencial"""
+    base = [int(d) for d in f"{sequencial % 10 ** 8:08d}"] + [0, 0, 0, 1]
+    digitos = _digitos_verificadores(base, [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+    return formatar_cnpj(''.join(map(str, digitos)))
+
+
+def gerar_cpf(sequencial: int) -> str:
+    """CPF formatado com dígitos verificadores válidos e único por sequencial"""
+    base = [int(d) for d in f"{(sequencial + 1) % 10 ** 9:09d}"]
+    d = ''.join(map(str, _digitos_verificadores(base, [10, 9, 8, 7, 6, 5, 4, 3, 2])))
+    return f"{d[:3]}.{d[3:6]}.{d[6:9]}-{d[9:]}"
+
+
+def _pesos_zipf(n: int, s: float = 1.1) -> List[float]:
+    return [1 / (i ** s) for i in range(1, n + 1)]
+
+
+class GeradorDados:
+    """Gera linhas sintéticas; ids são atribuídos pelo destino"""
+
+    def __init__(self, seed: int = 42, hoje: Optional[date] = None, dias_historico: int = 3 * 365):
+        self.rnd = random.Random(seed)
+        self.hoje = hoje or date.today()
+        self.dias_historico = dias_historico
+
+    def usuarios(self, quantidade: int) -> Iterator[Dict]:
+        for i in range(quantidade):
+            if i == 0:
+                nome, funcao = 'Administrador', 'Administrador'
+            else:
+                nome = f"{self.rnd.choice(NOMES)} {self.rnd.choice(SOBRENOMES)}"
+                funcao = self.rnd.choice(FUNCOES)
+            yield {
+                'nome': nome,
+                'cpf': gerar_cpf(i),
+                'email': f"usuario{i}@easynf.local",
+                'funcao': funcao,
+                'empresa': 'Construtora Exemplo',
+                'ativo': self.rnd.random() > 0.05,
+            }
+
+    def locais(self, quantidade: int) -> Iterator[Dict]:
+        for i in range(1, quantidade + 1):
+            yield {'nome': f"Obra {self.rnd.choice(SOBRENOMES)} {i:03d}"}
+
+    def fornecedores(self, quantidade: int) -> Iterator[Dict]:
+        deslocamento = self.rnd.randint(0, 10 ** 7)
+        for i in range(quantidade):
+            cnpj = gerar_cnpj(deslocamento + i)
+            assert validar_cnpj(cnpj)
+            yield {
+                'nome': f"{self.rnd.choice(PALAVRAS_FORNECEDOR)} {self.rnd.choice(SOBRENOMES)} "
+                        f"{self.rnd.choice(SUFIXOS)} {i + 1:04d}",
+                'cnpj': cnpj,
+                'telefone': f"({self.rnd.randint(11, 99)}) 9{self.rnd.randint(1000, 9999)}-{self.rnd.randint(1000, 9999)}",
+                'vendedor': f"{self.rnd.choice(NOMES)} {self.rnd.choice(SOBRENOMES)}" if self.rnd.random() < 0.7 else None,
+            }
+
+    def notas(self, quantidade: int, fornecedores: List[str], locais_ids: List[int]) -> Iterator[Dict]:
+        pesos_fornecedores = _pesos_zipf(len(fornecedores))
+        pesos_locais = _pesos_zipf(len(locais_ids), 0.8)
+        for i in range(quantidade):
+            num_parcelas = self.rnd.choices(OPCOES_PARCELAS, PESOS_PARCELAS)[0]
+            valor = round(min(500000.0, max(10.0, self.rnd.lognormvariate(math.log(2500), 1.2))), 2)
+            emissao = self.hoje - timedelta(days=int(self.rnd.triangular(0, self.dias_historico, 0)))
+            yield {
+                'numero_nota': f"{i + 1:09d}",
+                'fornecedor': self.rnd.choices(fornecedores, pesos_fornecedores)[0],
+                'valor_total': valor,
+                'data_emissao': emissao.isoformat(),
+                'descricao': self.rnd.choice(MATERIAIS) if self.rnd.random() < 0.6 else None,
+                'local_aplicacao': self.rnd.choices(locais_ids, pesos_locais)[0],
+                'status_material': 'EM_USO' if self.rnd.random() < 0.55 else 'ESTOQUE',
+                'eh_parcelada': num_parcelas > 1,
+                'num_parcelas': num_parcelas,
+                'dias_ate_primeira': 0 if num_parcelas == 1 else self.rnd.choice([15, 28, 30, 30, 30, 45]),
+                'intervalo_dias': self.rnd.choice([30, 30, 30, 15, 28]),
+            }
+
+    def parcelas(self, nota: Dict) -> List[Dict]:
+        """Parcelas da nota pelo mesmo cálculo da tela de lançamento"""
+        emissao = date.fromisoformat(nota['data_emissao'])
+        parcelas = calcular_parcelas(nota['valor_total'], nota['num_parcelas'],
+                                     nota['dias_ate_primeira'], nota['intervalo_dias'], emissao)
+        # Ajustar a última parcela para fechar o valor total (como em Lançar Nota)
+        diferenca = round(nota['valor_total'] - sum(p['valor'] for p in parcelas), 2)
+        parcelas[-1]['valor'] = round(parcelas[-1]['valor'] + diferenca, 2)
+
+        for parcela in parcelas:
+            vencimento = date.fromisoformat(parcela['data_vencimento'])
+            sorteio = self.rnd.random()
+            if vencimento < self.hoje:
+                status = 'PAGA' if sorteio < 0.85 else ('VENCIDA' if sorteio < 0.97 else 'PENDENTE')
+            else:
+                status = 'PAGA' if sorteio < 0.05 else 'PENDENTE'
+            pagamento = None
+            if status == 'PAGA':
+                pagamento = min(self.hoje, vencimento + timedelta(days=self.rnd.randint(-5, 10))).isoformat()
+            parcela.update({
+                'nota_id': nota['id'],
+                'status': status,
+                'data_pagamento': pagamento,
+                'status_material': nota['status_material'] if not nota['eh_parcelada']
+                else ('EM_USO' if self.rnd.random() < 0.55 else 'ESTOQUE'),
+            })
+        return parcelas
+
+    def logs(self, quantidade: int, usuarios_ids: List[int], max_registro_id: int) -> Iterator[Dict]:
+        for _ in range(quantidade):
+            acao = self.rnd.choices(ACOES_LOG, PESOS_ACOES_LOG)[0]
+            registro_id = self.rnd.randint(1, max(1, max_registro_id))
+            anteriores, novos = None, None
+            if acao in ('UPDATE', 'DELETE'):
+                anteriores = {
+                    'id': registro_id, 'nota_id': self.rnd.randint(1, max(1, max_registro_id)),
+                    'valor': round(self.rnd.uniform(50, 5000), 2), 'status': 'PENDENTE',
+                    'data_vencimento': (self.hoje - timedelta(days=self.rnd.randint(0, 365))).isoformat(),
+                    'status_material': 'ESTOQUE',
+                }
+            if acao in ('UPDATE', 'CREATE'):
+                novos = {'status': 'PAGA', 'data_pagamento': self.hoje.isoformat()}
+            yield {
+                'usuario_id': self.rnd.choice(usuarios_ids),
+                'acao': acao,
+                'tabela_afetada': 'usuarios' if acao in ('LOGIN', 'LOGOUT') else 'parcelas',
+                'registro_id': registro_id,
+                'dados_anteriores': anteriores,
+                'dados_novos': novos,
+                'ip_address': f"10.0.{self.rnd.randint(0, 255)}.{self.rnd.randint(1, 254)}",
+                'user_agent': 'Streamlit App',
+            }
+
+
+class DestinoBanco:
+    """Grava via cliente configurado (insert em lote); retorna as linhas com ids"""
+
+    def __init__(self, cliente=None):
+        if cliente is None:
+            from config import supabase as cliente
+        self.cliente = cliente
+
+    def gravar(self, tabela: str, linhas: List[Dict]) -> List[Dict]:
+        if not linhas:
+            return []
+        result = self.cliente.table(tabela).insert(linhas).execute()
+        return result.data if result.data else []
+
+    def fechar(self):
+        pass
+
+
+class DestinoArquivos:
+    """Grava um arquivo por tabela (CSV ou Parquet), atribuindo ids sequenciais"""
+
+    def __init__(self, diretorio: str, formato: str = 'csv'):
+        if formato not in ('csv', 'parquet'):
+            raise ValueError("formato deve ser 'csv' ou 'parquet'")
+        if formato == 'parquet':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise RuntimeError("Gravação em Parquet requer o pacote pyarrow (pip install pyarrow)")
+        os.makedirs(diretorio, exist_ok=True)
+        self.diretorio = diretorio
+        self.formato = formato
+        self._proximo_id: Dict[str, int] = {}
+        self._escritores: Dict[str, tuple] = {}
+
+    def _serializar(self, valor):
+        if isinstance(valor, (dict, list)):
+            return json.dumps(valor, ensure_ascii=False)
+        if isinstance(valor, (date, datetime)):
+            return valor.isoformat()
+        return valor
+
+    def gravar(self, tabela: str, linhas: List[Dict]) -> List[Dict]:
+        if not linhas:
+            return []
+        proximo = self._proximo_id.get(tabela, 1)
+        for i, linha in enumerate(linhas):
+            linha['id'] = proximo + i
+        self._proximo_id[tabela] = proximo + len(linhas)
+
+        colunas = list(TIPOS[tabela].keys())
+        registros = [{c: self._serializar(l.get(c)) for c in colunas} for l in linhas]
+        if self.formato == 'csv':
+            self._gravar_csv(tabela, colunas, registros)
+        else:
+            self._gravar_parquet(tabela, colunas, registros)
+        return linhas
+
+    def _gravar_csv(self, tabela: str, colunas: List[str], registros: List[Dict]):
+        if tabela not in self._escritores:
+            arquivo = open(os.path.join(self.diretorio, f"{tabela}.csv"), 'w', newline='', encoding='utf-8')
+            escritor = csv.DictWriter(arquivo, fieldnames=colunas)
+            escritor.writeheader()
+            self._escritores[tabela] = (arquivo, escritor)
+        self._escritores[tabela][1].writerows(registros)
+
+    def _gravar_parquet(self, tabela: str, colunas: List[str], registros: List[Dict]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if tabela not in self._escritores:
+            schema = pa.schema([(c, getattr(pa, TIPOS_ARROW[t])()) for c, t in TIPOS[tabela].items()])
+            escritor = pq.ParquetWriter(os.path.join(self.diretorio, f"{tabela}.parquet"), schema)
+            self._escritores[tabela] = (escritor, schema)
+        escritor, schema = self._escritores[tabela]
+        escritor.write_table(pa.Table.from_pylist(registros, schema=schema))
+
+    def fechar(self):
+        for escritor, _ in self._escritores.values():
+            escritor.close()
+        self._escritores.clear()
+
+
+def gerar(destino, notas: int, fornecedores: int = 300, locais: int = 20, usuarios: int = 25,
+          logs: int = 0, lote: int = 5000, seed: int = 42, progresso: bool = False) -> Dict[str, int]:
+    """Gera e grava o conjunto completo; retorna a contagem de linhas por tabela"""
+    gerador = GeradorDados(seed)
+    contagem = {t: 0 for t in TIPOS}
+
+    def gravar_em_lotes(tabela: str, linhas: Iterator[Dict]) -> List[Dict]:
+        gravadas = []
+        buffer = []
+        for linha in linhas:
+            buffer.append(linha)
+            if len(buffer) >= lote:
+                gravadas.extend(destino.gravar(tabela, buffer))
+                contagem[tabela] += len(buffer)
+                buffer = []
+        if buffer:
+            gravadas.extend(destino.gravar(tabela, buffer))
+            contagem[tabela] += len(buffer)
+        return gravadas
+
+    # Tabelas de referência são pequenas e ficam em memória
+    usuarios_ids = [u['id'] for u in gravar_em_lotes('usuarios', gerador.usuarios(usuarios))]
+    locais_ids = [l['id'] for l in gravar_em_lotes('locais_aplicacao', gerador.locais(locais))]
+    nomes_fornecedores = [f['nome'] for f in gravar_em_lotes('fornecedores', gerador.fornecedores(fornecedores))]
+
+    # Notas e parcelas são gravadas lote a lote, sem acumular
+    buffer = []
+    maior_id = 0
+
+    def descarregar():
+        nonlocal maior_id
+        notas_gravadas = destino.gravar('notas', buffer)
+        contagem['notas'] += len(buffer)
+        parcelas = [p for nota in notas_gravadas for p in gerador.parcelas(nota)]
+        for inicio in range(0, len(parcelas), lote):
+            destino.gravar('parcelas', parcelas[inicio:inicio + lote])
+        contagem['parcelas'] += len(parcelas)
+        maior_id = max([maior_id] + [n['id'] for n in notas_gravadas])
+        if progresso:
+            print(f"  notas: {contagem['notas']:>10}  parcelas: {contagem['parcelas']:>10}")
+
+    for nota in gerador.notas(notas, nomes_fornecedores, locais_ids):
+        buffer.append(nota)
+        if len(buffer) >= lote:
+            descarregar()
+            buffer = []
+    if buffer:
+        descarregar()
+
+    for inicio in range(0, logs, lote):
+        quantidade = min(lote, logs - inicio)
+        destino.gravar('logs_sistema', list(gerador.logs(quantidade, usuarios_ids, maior_id)))
+        contagem['logs_sistema'] += quantidade
+
+    destino.fechar()
+    return contagem
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gerador de dados sintéticos")
+    parser.add_argument('--notas', type=int, default=10000)
+    parser.add_argument('--fornecedores', type=int, default=300)
+    parser.add_argument('--locais', type=int, default=20)
+    parser.add_argument('--usuarios', type=int, default=25)
+    parser.add_argument('--logs', type=int, default=0)
+    parser.add_argument('--lote', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--destino', choices=['banco', 'csv', 'parquet'], default='banco')
+    parser.add_argument('--saida', default='dados_sinteticos', help="diretório para csv/parquet")
+    args = parser.parse_args()
+
+    if args.destino == 'banco':
+        destino = DestinoBanco()
+    else:
+        destino = DestinoArquivos(args.saida, args.destino)
+
+    contagem = gerar(destino, args.notas, args.fornecedores, args.locais, args.usuarios,
+                     args.logs, args.lote, args.seed, progresso=True)
+    for tabela, quantidade in contagem.items():
+        print(f"✅ {tabela}: {quantidade} linhas")
+
+
+if __name__ == "__main__":
+    main()
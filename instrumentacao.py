@@ -0,0 +1,268 @@
+"""Instrumentação de acesso ao banco: chamadas, round trips, bytes e latência.
+
+O cliente criado em config.py é envolvido por `instrumentar_cliente`, que
+mede cada `execute()` (um round trip HTTP no Supabase). Os métodos públicos
+do DatabaseManager são envolvidos por `instrumentar_metodos`, que mede a
+duração total de cada chamada (incluindo acertos de cache, que não geram
+round trips). Tudo é atribuído à página Streamlit que originou a chamada.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from functools import lru_cache, wraps
+from typing import Dict, List, Optional, Tuple
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PAGES_DIR = os.path.join(BASE_DIR, 'pages') + os.sep
+DATABASE_FILE = os.path.join(BASE_DIR, 'database.py')
+SCRIPTS_RAIZ = (os.path.join(BASE_DIR, 'app.py'), os.path.join(BASE_DIR, 'login.py'))
+
+# Quantidade de amostras de latência mantidas por métrica
+MAX_AMOSTRAS = 2048
+
+SEM_PAGINA = '(sem página)'
+SEM_METODO = '(direto no cliente)'
+
+# Página de origem para chamadas feitas fora da thread do script (ver database_async)
+pagina_contexto: ContextVar[Optional[str]] = ContextVar('pagina_contexto', default=None)
+
+
+class _Serie:
+    def __init__(self):
+        self.quantidade = 0
+        self.total = 0.0
+        self.amostras = deque(maxlen=MAX_AMOSTRAS)
+
+    def registrar(self, valor: float):
+        self.quantidade += 1
+        self.total += valor
+        self.amostras.append(valor)
+
+    def percentis(self) -> Dict[str, float]:
+        total_ms = round(self.total * 1000, 2)
+        if not self.amostras:
+            return {'total_ms': total_ms, 'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0}
+        ordenadas = sorted(self.amostras)
+        def p(q):
+            return round(ordenadas[min(len(ordenadas) - 1, int(q * len(ordenadas)))] * 1000, 2)
+        return {'total_ms': total_ms, 'p50_ms': p(0.50), 'p95_ms': p(0.95), 'p99_ms': p(0.99)}
+
+
+class _Metrica:
+    def __init__(self):
+        self.chamadas = _Serie()
+        self.requisicoes = _Serie()
+        self.linhas = 0
+        self.bytes = 0
+        self.tabelas = set()
+        self.conexoes = 0
+        self.handshakes_tls = 0
+
+
+class Metricas:
+    """Registro de métricas do processo, indexado por (página, método)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dados: Dict[Tuple[str, str], _Metrica] = {}
+        self.inicio = time.time()
+
+    def _metrica(self, pagina: str, metodo: str) -> _Metrica:
+        chave = (pagina, metodo)
+        if chave not in self._dados:
+            self._dados[chave] = _Metrica()
+        return self._dados[chave]
+
+    def registrar_chamada(self, pagina: str, metodo: str, duracao: float):
+        with self._lock:
+            self._metrica(pagina, metodo).chamadas.registrar(duracao)
+
+    def registrar_requisicao(self, pagina: str, metodo: str, tabela: str, duracao: float,
+                             linhas: int, tamanho: int):
+        with self._lock:
+            metrica = self._metrica(pagina, metodo)
+            metrica.requisicoes.registrar(duracao)
+            metrica.linhas += linhas
+            metrica.bytes += tamanho
+            metrica.tabelas.add(tabela)
+
+    def registrar_conexao(self, pagina: str, metodo: str, tls: bool):
+        with self._lock:
+            metrica = self._metrica(pagina, metodo)
+            if tls:
+                metrica.handshakes_tls += 1
+            else:
+                metrica.conexoes += 1
+
+    def total_requisicoes(self, pagina: Optional[str] = None) -> int:
+        with self._lock:
+            return sum(m.requisicoes.quantidade for (p, _), m in self._dados.items()
+                       if pagina is None or p == pagina)
+
+    def snapshot(self) -> List[Dict]:
+        """Lista de métricas agregadas, uma linha por (página, método)"""
+        with self._lock:
+            linhas = []
+            for (pagina, metodo), m in sorted(self._dados.items()):
+                linhas.append({
+                    'pagina': pagina,
+                    'metodo': metodo,
+                    'chamadas': m.chamadas.quantidade,
+                    'requisicoes': m.requisicoes.quantidade,
+                    'linhas': m.linhas,
+                    'bytes': m.bytes,
+                    'tabelas': sorted(m.tabelas),
+                    'conexoes': m.conexoes,
+                    'handshakes_tls': m.handshakes_tls,
+                    'chamada': m.chamadas.percentis(),
+                    'requisicao': m.requisicoes.percentis(),
+                })
+            return linhas
+
+    def to_json(self) -> str:
+        return json.dumps({
+            'pid': os.getpid(),
+            'inicio': self.inicio,
+            'gerado_em': time.time(),
+            'metricas': self.snapshot(),
+        }, ensure_ascii=False, indent=2)
+
+    def reset(self):
+        with self._lock:
+            self._dados.clear()
+            self.inicio = time.time()
+
+
+metricas = Metricas()
+
+
+@lru_cache(maxsize=512)
+def _classificar(arquivo: str) -> Optional[str]:
+    """'database' para database.py, o nome da página para scripts Streamlit, ou None"""
+    caminho = os.path.abspath(arquivo)
+    if caminho == DATABASE_FILE:
+        return 'database'
+    if caminho.startswith(PAGES_DIR) or caminho in SCRIPTS_RAIZ:
+        return os.path.splitext(os.path.basename(caminho))[0]
+    return None
+
+
+def _origem(profundidade: int = 2) -> Tuple[str, str]:
+    """Identifica (página, método do DatabaseManager) percorrendo a pilha"""
+    pagina, metodo = pagina_contexto.get() or SEM_PAGINA, SEM_METODO
+    frame = sys._getframe(profundidade)
+    while frame is not None:
+        tipo = _classificar(frame.f_code.co_filename)
+        if tipo == 'database':
+            if metodo == SEM_METODO and not frame.f_code.co_name.startswith('_'):
+                metodo = frame.f_code.co_name
+        elif tipo is not None:
+            pagina = tipo
+            break
+        frame = frame.f_back
+    return pagina, metodo
+
+
+def pagina_chamadora() -> str:
+    """Página Streamlit que está executando o código chamador"""
+    return _origem(profundidade=2)[0]
+
+
+def _tamanho(dados) -> int:
+    try:
+        return len(json.dumps(dados, default=str).encode('utf-8'))
+    except Exception:
+        return 0
+
+
+def _rastrear_evento(evento: str, info: Dict):
+    """Callback de trace do httpcore: conta conexões TCP e handshakes TLS abertos"""
+    if evento in ('connection.connect_tcp.complete', 'connection.start_tls.complete'):
+        pagina, metodo = _origem()
+        metricas.registrar_conexao(pagina, metodo, tls=evento == 'connection.start_tls.complete')
+
+
+def rastrear_conexoes(request):
+    """Gancho de requisição do httpx que ativa o rastreamento de conexões (ver cliente_http)"""
+    request.extensions['trace'] = _rastrear_evento
+
+
+class _QueryInstrumentada:
+    """Proxy do query builder que mede o execute()"""
+
+    def __init__(self, query, tabela: str):
+        self._query = query
+        self._tabela = tabela
+
+    def __getattr__(self, nome):
+        atributo = getattr(self._query, nome)
+        if nome == 'execute':
+            return self._execute
+        if callable(atributo):
+            @wraps(atributo)
+            def encadear(*args, **kwargs):
+                resultado = atributo(*args, **kwargs)
+                # Os métodos do builder retornam o próprio builder (ou um novo)
+                if resultado is not None and hasattr(resultado, 'execute'):
+                    return _QueryInstrumentada(resultado, self._tabela)
+                return resultado
+            return encadear
+        return atributo
+
+    def _execute(self):
+        pagina, metodo = _origem()
+        inicio = time.perf_counter()
+        resultado = self._query.execute()
+        duracao = time.perf_counter() - inicio
+        dados = getattr(resultado, 'data', None)
+        linhas = len(dados) if isinstance(dados, list) else (1 if dados else 0)
+        metricas.registrar_requisicao(pagina, metodo, self._tabela, duracao, linhas, _tamanho(dados))
+        return resultado
+
+
+class ClienteInstrumentado:
+    """Envolve o cliente Supabase (ou o backend local) medindo cada requisição"""
+
+    def __init__(self, cliente):
+        self._cliente = cliente
+
+    def table(self, nome: str):
+        return _QueryInstrumentada(self._cliente.table(nome), nome)
+
+    def from_(self, nome: str):
+        return self.table(nome)
+
+    def rpc(self, nome: str, params: Optional[Dict] = None, *args, **kwargs):
+        return _QueryInstrumentada(self._cliente.rpc(nome, params, *args, **kwargs), f"rpc:{nome}")
+
+    def __getattr__(self, nome):
+        return getattr(self._cliente, nome)
+
+
+def instrumentar_cliente(cliente):
+    return ClienteInstrumentado(cliente)
+
+
+def instrumentar_metodos(cls):
+    """Envolve os métodos públicos da classe registrando duração de cada chamada"""
+    for nome, func in list(vars(cls).items()):
+        if nome.startswith('_') or not callable(func):
+            continue
+
+        def criar(nome, func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                inicio = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    pagina, _ = _origem()
+                    metricas.registrar_chamada(pagina, nome, time.perf_counter() - inicio)
+            return wrapper
+
+        setattr(cls, nome, criar(nome, func))
+    return cls
@@ -1,5 +1,5 @@
 import streamlit as st
-from auth import AuthManager
+from auth import obter_auth_manager
 from datetime import datetime
 
 # Configuração da página
@@ -129,7 +129,7 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Inicializar gerenciador de autenticação
-auth = AuthManager()
+auth = obter_auth_manager()
 
 # Verificar se já está logado
 if auth.is_logged_in():
@@ -0,0 +1,84 @@
+"""Notificações de alteração das tabelas para invalidar caches entre processos.
+
+Cada processo do Streamlit (worker ou réplica) tem os próprios caches
+(QueryCache e ReplicaLocal), invalidados pelas escritas do próprio processo
+(@invalida); escritas de outros processos só apareciam quando o TTL vencia. O
+`CanalAlteracoes` assina as alterações das tabelas e avisa cada processo, que
+invalida apenas as entradas que dependem da tabela alterada:
+
+- Supabase: Realtime (postgres_changes) em uma thread com loop asyncio próprio,
+  pois o cliente síncrono do supabase-py não suporta Realtime. As tabelas
+  precisam estar na publicação supabase_realtime (setup_otimizacoes.sql).
+- Backend local: LocalClient.on_change, que notifica após cada escrita
+  confirmada (equivalente em processo ao LISTEN/NOTIFY).
+
+O canal informa quando fica ativo ou cai; enquanto ativo, os caches podem usar
+TTLs longos nas entradas que dependem só das tabelas notificadas.
+"""
+import asyncio
+import threading
+from typing import Callable, Iterable
+
+TABELAS_NOTIFICADAS = ('notas', 'parcelas', 'fornecedores', 'locais_aplicacao')
+
+
+class CanalAlteracoes:
+    """Repassa a `ao_alterar(tabela)` as alterações nas tabelas e a `ao_mudar_estado(ativo)` o estado do canal"""
+
+    def __init__(self, ao_alterar: Callable[[str], None], ao_mudar_estado: Callable[[bool], None],
+                 tabelas: Iterable[str] = TABELAS_NOTIFICADAS):
+        self.ao_alterar = ao_alterar
+        self.ao_mudar_estado = ao_mudar_estado
+        self.tabelas = tuple(tabelas)
+        self.ativo = False
+        self._lock = threading.Lock()
+
+    def iniciar(self, cliente, url: str = None, key: str = None):
+        """Assina as alterações pelo backend local (on_change) ou pelo Realtime do Supabase"""
+        if hasattr(cliente, 'on_change'):
+            cliente.on_change(self.tabelas, self._alterada)
+            self._definir_estado(True)
+            return
+        if not url or not key:
+            print("⚠️ Notificações de alteração indisponíveis: SUPABASE_URL/SUPABASE_KEY não configurados")
+            return
+        threading.Thread(
+            target=lambda: asyncio.run(self._assinar_realtime(url, key)), name='canal-alteracoes', daemon=True
+        ).start()
+
+    def _alterada(self, tabela: str):
+        try:
+            self.ao_alterar(tabela)
+        except Exception as e:
+            print(f"Erro ao processar alteração em {tabela}: {e}")
+
+    def _definir_estado(self, ativo: bool):
+        with self._lock:
+            if ativo == self.ativo:
+                return
+            self.ativo = ativo
+        self.ao_mudar_estado(ativo)
+
+    def _ao_assinar(self, estado, erro=None):
+        # RealtimeSubscribeStates: SUBSCRIBED, TIMED_OUT, CLOSED ou CHANNEL_ERROR
+        ativo = getattr(estado, 'value', estado) == 'SUBSCRIBED'
+        if erro is not None:
+            print(f"⚠️ Canal de alterações: {erro}")
+        self._definir_estado(ativo)
+
+    async def _assinar_realtime(self, url: str, key: str):
+        try:
+            from supabase import acreate_client
+            cliente = await acreate_client(url, key)
+            canal = cliente.channel('easynf-alteracoes')
+            for tabela in self.tabelas:
+                canal.on_postgres_changes(
+                    '*', schema='public', table=tabela,
+                    callback=lambda payload, tabela=tabela: self._alterada(tabela)
+                )
+            await canal.subscribe(self._ao_assinar)
+            # O cliente Realtime reconecta sozinho; a thread só precisa manter o loop vivo
+            await asyncio.Event().wait()
+        except Exception as e:
+            print(f"⚠️ Notificações de alteração indisponíveis: {e}")
+            self._definir_estado(False)
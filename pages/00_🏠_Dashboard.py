@@ -1,7 +1,7 @@
 import streamlit as st
 from streamlit_option_menu import option_menu
 from config import APP_TITLE, APP_ICON
-from auth import AuthManager
+from auth import obter_auth_manager
 
 # Configuração da página
 st.set_page_config(
@@ -12,7 +12,7 @@ st.set_page_config(
 )
 
 # Verificar autenticação
-auth = AuthManager()
+auth = obter_auth_manager()
 if not auth.is_logged_in():
     st.switch_page("pages/00_🔐_Login.py")
     st.stop()
@@ -152,14 +152,19 @@ if selected == "🏠 Dashboard":
     st.title("🏠 Dashboard")
     
     # Importar dados
-    from database import DatabaseManager
+    from database import obter_database_manager
+    from database_async import carregar_em_paralelo
     from utils import formatar_moeda
     
-    db = DatabaseManager()
-    notas = db.get_notas()
-    locais = db.get_locais_aplicacao()
+    db = obter_database_manager()
+    # Indicadores pré-calculados no banco, em paralelo com as notas recentes e os locais
+    kpis, notas_recentes, locais = carregar_em_paralelo(
+        db.get_kpis,
+        lambda: db.get_notas_recentes(5),
+        db.get_locais_aplicacao,
+    )
     
-    if not notas:
+    if not kpis['total_notas']:
         st.info("""
         ## 👋 Bem-vindo ao Sistema de Controle de Contas!
         
@@ -176,25 +181,18 @@ if selected == "🏠 Dashboard":
         # Estatísticas gerais
         col1, col2, col3, col4 = st.columns(4)
         
-        total_valor = sum(nota['valor_total'] for nota in notas)
-        
-        # Contar parcelas
-        todas_parcelas = []
-        for nota in notas:
-            parcelas = db.get_parcelas_by_nota(nota['id'])
-            todas_parcelas.extend(parcelas)
+        total_parcelas = kpis['total_parcelas']
+        parcelas_pagas = kpis['parcelas_pagas']
+        parcelas_pendentes = kpis['parcelas_pendentes']
+        parcelas_vencidas = kpis['parcelas_vencidas']
         
-        parcelas_pagas = len([p for p in todas_parcelas if p['status'] == 'PAGA'])
-        parcelas_pendentes = len([p for p in todas_parcelas if p['status'] == 'PENDENTE'])
-        parcelas_vencidas = len([p for p in todas_parcelas if p['status'] == 'VENCIDA'])
-        
-        col1.metric("Total de Notas", len(notas))
-        col2.metric("Valor Total", formatar_moeda(total_valor))
+        col1.metric("Total de Notas", kpis['total_notas'])
+        col2.metric("Valor Total", formatar_moeda(kpis['valor_total']))
         col3.metric("Parcelas Pagas", parcelas_pagas)
         col4.metric("Parcelas Pendentes", parcelas_pendentes)
         
         # Gráfico de status das parcelas
-        if todas_parcelas:
+        if total_parcelas:
             st.subheader("📊 Status das Parcelas")
             
             import plotly.express as px
@@ -219,8 +217,8 @@ if selected == "🏠 Dashboard":
             
             with col2:
                 st.subheader("📈 Resumo")
-                st.write(f"**Total de Parcelas:** {len(todas_parcelas)}")
-                st.write(f"**Taxa de Pagamento:** {(parcelas_pagas/len(todas_parcelas)*100):.1f}%")
+                st.write(f"**Total de Parcelas:** {total_parcelas}")
+                st.write(f"**Taxa de Pagamento:** {(parcelas_pagas/total_parcelas*100):.1f}%")
                 st.write(f"**Parcelas Vencidas:** {parcelas_vencidas}")
                 
                 if parcelas_vencidas > 0:
@@ -229,10 +227,7 @@ if selected == "🏠 Dashboard":
     # Notas recentes
     st.subheader("📋 Notas Recentes")
     
-    if notas:
-        # Ordenar por data de emissão (mais recentes primeiro)
-        notas_recentes = sorted(notas, key=lambda x: x['data_emissao'], reverse=True)[:5]
-        
+    if notas_recentes:
         for nota in notas_recentes:
             with st.expander(f"📄 {nota['numero_nota']} - {nota['fornecedor']} - {formatar_moeda(nota['valor_total'])}"):
                 col1, col2 = st.columns(2)
@@ -293,7 +288,7 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 import streamlit as st
-from auth import AuthManager
+from auth import obter_auth_manager
 
 st.set_page_config(
     page_title="EasyNF - Dashboard",
@@ -302,13 +297,13 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-auth = AuthManager()
+auth = obter_auth_manager()
 if not auth.is_logged_in():
     st.switch_page("pages/00_🔐_Login.py")
     st.stop()
 
 import pandas as pd
-from database import DatabaseManager
+from database import obter_database_manager
 from utils import formatar_moeda
 
 st.title("🏠 Dashboard")
@@ -330,13 +325,11 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-db = DatabaseManager()
-notas = db.get_notas()
-locais = db.get_locais_aplicacao()
+db = obter_database_manager()
+notas_recentes = db.get_notas_recentes(5)
 
 st.subheader("📋 Notas Recentes")
-if notas:
-    notas_recentes = sorted(notas, key=lambda x: x['data_emissao'], reverse=True)[:5]
+if notas_recentes:
     for nota in notas_recentes:
         with st.expander(f"📄 {nota['numero_nota']} - {nota['fornecedor']} - {formatar_moeda(nota['valor_total'])}"):
             st.write(f"Fornecedor: {nota['fornecedor']}")
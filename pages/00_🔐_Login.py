@@ -1,5 +1,5 @@
 import streamlit as st
-from auth import AuthManager
+from auth import obter_auth_manager
 
 # Config da página
 st.set_page_config(
@@ -79,7 +79,7 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Auth
-auth = AuthManager()
+auth = obter_auth_manager()
 
 # Estado da aplicação
 if 'login_tab' not in st.session_state:
@@ -1,9 +1,8 @@
 import streamlit as st
 import pandas as pd
 from datetime import date, datetime
-from database import DatabaseManager
-from utils import formatar_moeda
-import re
+from database import obter_database_manager
+from utils import formatar_moeda, formatar_cnpj, validar_cnpj
 
 st.set_page_config(
     page_title="Lançar Fornecedor",
@@ -37,41 +36,8 @@ with st.expander("💡 Como usar a máscara de CNPJ", expanded=False):
         else:
             st.warning("⚠️ CNPJ incompleto")
 
-
-
-# Funções para formatação e validação de CNPJ
-def formatar_cnpj(cnpj):
-    """Aplica máscara de CNPJ: 00.000.000/0000-00"""
-    if not cnpj:
-        return ""
-    
-    # Remove tudo que não é dígito
-    cnpj_limpo = re.sub(r'\D', '', cnpj)
-    
-    # Limita a 14 dígitos
-    cnpj_limpo = cnpj_limpo[:14]
-    
-    # Aplica a máscara progressivamente
-    if len(cnpj_limpo) == 0:
-        return ""
-    elif len(cnpj_limpo) <= 2:
-        return cnpj_limpo
-    elif len(cnpj_limpo) <= 5:
-        return f"{cnpj_limpo[:2]}.{cnpj_limpo[2:]}"
-    elif len(cnpj_limpo) <= 8:
-        return f"{cnpj_limpo[:2]}.{cnpj_limpo[2:5]}.{cnpj_limpo[5:]}"
-    elif len(cnpj_limpo) <= 12:
-        return f"{cnpj_limpo[:2]}.{cnpj_limpo[2:5]}.{cnpj_limpo[5:8]}/{cnpj_limpo[8:]}"
-    else:
-        return f"{cnpj_limpo[:2]}.{cnpj_limpo[2:5]}.{cnpj_limpo[5:8]}/{cnpj_limpo[8:12]}-{cnpj_limpo[12:14]}"
-
-def validar_cnpj(cnpj):
-    """Valida se o CNPJ tem 14 dígitos"""
-    cnpj_limpo = re.sub(r'\D', '', cnpj)
-    return len(cnpj_limpo) == 14
-
 # Inicializar banco de dados
-db = DatabaseManager()
+db = obter_database_manager()
 
 # Formulário principal
 with st.form("form_lancar_fornecedor"):
@@ -230,5 +196,5 @@ st.sidebar.markdown("""
 
 # Estatísticas rápidas
 st.sidebar.markdown("### 📊 Estatísticas")
-total_fornecedores = len(db.get_fornecedores())
+total_fornecedores = len(db.get_fornecedores(colunas='id'))
 st.sidebar.metric("Total de Fornecedores", total_fornecedores)
\ No newline at end of file
@@ -1,14 +1,15 @@
 import streamlit as st
 import pandas as pd
 from datetime import date, datetime, timedelta
-from database import DatabaseManager
+from database import obter_database_manager
+from database_async import carregar_em_paralelo
 from utils import (
     formatar_moeda, formatar_valor_entrada, validar_formato_valor,
     validar_data_emissao, validar_valor_positivo, validar_numero_parcelas,
     calcular_parcelas, validar_campos_obrigatorios
 )
 from config import MATERIAL_STATUS
-from auth import AuthManager
+from auth import obter_auth_manager
 
 st.set_page_config(
     page_title="Lançar Nota Fiscal",
@@ -19,16 +20,18 @@ st.set_page_config(
 st.title("📝 Lançar Nota Fiscal")
 
 # Verificar autenticação
-auth = AuthManager()
+auth = obter_auth_manager()
 if not auth.is_logged_in():
     st.switch_page("pages/00_🔐_Login.py")
 
 # Inicializar banco de dados
-db = DatabaseManager()
+db = obter_database_manager()
 
 # Carregar dados necessários
-fornecedores = db.get_fornecedores()
-locais = db.get_locais_aplicacao()
+fornecedores, locais = carregar_em_paralelo(
+    lambda: db.get_fornecedores(colunas='nome, cnpj'),
+    lambda: db.get_locais_aplicacao(colunas='id, nome'),
+)
 
 if not fornecedores:
     st.error("❌ Nenhum fornecedor cadastrado. Cadastre um fornecedor primeiro.")
@@ -63,7 +66,7 @@ def reset_form():
 def carregar_parcelas_do_banco(nota_id: int):
     """Carrega parcelas existentes do banco de dados"""
     try:
-        parcelas = db.get_parcelas_by_nota(nota_id)
+        parcelas = db.get_parcelas_by_nota(nota_id, colunas='id, nota_id, numero, valor, data_vencimento, status, status_material')
         st.session_state.parcelas_banco = parcelas
         return parcelas
     except Exception as e:
@@ -193,50 +196,37 @@ def recalcular_parcelas_manualmente():
         st.error(f"Erro ao recalcular parcelas: {e}")
 
 def salvar_nota_com_parcelas():
-    """Salva a nota e suas parcelas no banco de dados"""
+    """Salva a nota e suas parcelas no banco de dados (uma única transação)"""
     try:
-        # Salvar nota principal
-        nota_salva = db.create_nota(st.session_state.nota_data)
-        
-        if nota_salva:
-            # Salvar parcelas se for parcelada
-            if st.session_state.nota_data.get('eh_parcelada') and st.session_state.parcelas_preview:
-                parcelas_data = []
-                for parcela in st.session_state.parcelas_preview:
-                    parcelas_data.append({
-                        'nota_id': nota_salva['id'],
-                        'numero': parcela['numero'],
-                        'valor': parcela['valor'],
-                        'data_vencimento': parcela['data_vencimento'],
-                        'status': 'PENDENTE',
-                        'status_material': parcela.get('status_material', 'ESTOQUE')
-                    })
-                
-                parcelas_salvas = db.create_parcelas(parcelas_data)
-                
-                if parcelas_salvas:
-                    return True, f"Nota e {len(parcelas_salvas)} parcelas salvas com sucesso!"
-                else:
-                    return False, "Nota salva, mas houve erro ao salvar as parcelas"
-            else:
-                # Para pagamento à vista, criar 1 parcela com status_material da nota
-                parcela_data = {
-                    'nota_id': nota_salva['id'],
-                    'numero': 1,
-                    'valor': nota_salva['valor_total'],
-                    'data_vencimento': nota_salva['data_emissao'],
-                    'status': 'PENDENTE',
-                    'status_material': nota_salva.get('status_material', 'ESTOQUE')
-                }
-                
-                parcela_criada = db.create_parcela(parcela_data)
-                if parcela_criada:
-                    return True, "Nota e parcela salvas com sucesso!"
-                else:
-                    return False, "Nota salva, mas houve erro ao salvar a parcela"
+        nota_data = st.session_state.nota_data
+        if nota_data.get('eh_parcelada') and st.session_state.parcelas_preview:
+            parcelas_data = [{
+                'numero': parcela['numero'],
+                'valor': parcela['valor'],
+                'data_vencimento': parcela['data_vencimento'],
+                'status': 'PENDENTE',
+                'status_material': parcela.get('status_material', 'ESTOQUE')
+            } for parcela in st.session_state.parcelas_preview]
         else:
+            # Para pagamento à vista, criar 1 parcela com status_material da nota
+            parcelas_data = [{
+                'numero': 1,
+                'valor': nota_data['valor_total'],
+                'data_vencimento': nota_data['data_emissao'],
+                'status': 'PENDENTE',
+                'status_material': nota_data.get('status_material', 'ESTOQUE')
+            }]
+        
+        nota_salva = db.create_nota_com_parcelas(nota_data, parcelas_data)
+        
+        if not nota_salva:
             return False, "Erro ao salvar nota. Tente novamente."
+        if len(nota_salva['parcelas']) == 1:
+            return True, "Nota e parcela salvas com sucesso!"
+        return True, f"Nota e {len(nota_salva['parcelas'])} parcelas salvas com sucesso!"
             
+    except ValueError as e:
+        return False, str(e)
     except Exception as e:
         return False, f"Erro inesperado: {e}"
 
@@ -713,7 +703,7 @@ st.sidebar.markdown("""
 
 # Estatísticas rápidas
 st.sidebar.markdown("### 📊 Estatísticas")
-total_notas = len(db.get_notas())
+total_notas = db.count_notas()
 total_fornecedores = len(fornecedores)
 total_locais = len(locais)
 
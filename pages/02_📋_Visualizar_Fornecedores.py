@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-from database import DatabaseManager
+from database import obter_database_manager
 from utils import formatar_moeda
 
 st.set_page_config(
@@ -12,7 +12,7 @@ st.set_page_config(
 st.title("📋 Visualizar Fornecedores")
 
 # Inicializar banco de dados
-db = DatabaseManager()
+db = obter_database_manager()
 
 # Filtros
 st.subheader("🔍 Filtros")
@@ -37,7 +37,7 @@ if filtro_vendedor:
     filtros['vendedor'] = filtro_vendedor
 
 # Buscar fornecedores
-fornecedores = db.get_fornecedores(filtros)
+fornecedores = db.get_fornecedores(filtros, colunas='id, nome, cnpj, telefone, vendedor, created_at')
 
 if fornecedores:
     st.subheader(f"📊 Fornecedores Encontrados ({len(fornecedores)})")
@@ -1,13 +1,15 @@
 import streamlit as st
 import pandas as pd
+import json
+import math
 from datetime import date, datetime
-from database import DatabaseManager
+from database import obter_database_manager
 from utils import (
-    formatar_moeda, obter_status_parcela, calcular_dias_vencimento,
+    formatar_moeda, calcular_dias_vencimento,
     obter_cor_status, obter_icone_status
 )
 from config import MATERIAL_STATUS, PARCELA_STATUS
-from auth import AuthManager
+from auth import obter_auth_manager
 
 st.set_page_config(
     page_title="Visualizar Notas",
@@ -18,23 +20,30 @@ st.set_page_config(
 st.title("📋 Visualizar Notas")
 
 # Verificar autenticação
-auth = AuthManager()
+auth = obter_auth_manager()
 if not auth.is_logged_in():
     st.switch_page("pages/00_🔐_Login.py")
 
 # Inicializar banco de dados
-db = DatabaseManager()
+db = obter_database_manager()
 
-# Carregar dados
-notas = db.get_notas()
-# Ordenar por sequência de lançamento (ID crescente)
-notas = sorted(notas, key=lambda n: n.get('id', 0))
-locais = db.get_locais_aplicacao()
+# Quantidade de notas exibidas por página
+NOTAS_POR_PAGINA = 20
+
+# Campos exibidos de cada nota e de suas parcelas
+COLUNAS_NOTA = 'id, numero_nota, fornecedor, valor_total, data_emissao, descricao, local_aplicacao, status_material, eh_parcelada'
+COLUNAS_PARCELA = 'id, nota_id, numero, valor, data_vencimento, status, status_material'
+
+# Carregar dados de referência
+locais = db.get_locais_aplicacao(colunas='id, nome')
 locais_dict = {local['id']: local['nome'] for local in locais}
+locais_por_nome = {local['nome']: local['id'] for local in locais}
+# Rótulo exibido -> chave gravada no banco
+material_por_rotulo = {v: k for k, v in MATERIAL_STATUS.items()}
+status_parcela_por_rotulo = {v: k for k, v in PARCELA_STATUS.items()}
 
-if not notas:
-    st.info("Nenhuma nota cadastrada ainda.")
-    st.stop()
+# Fornecedores presentes nas notas (inclui nomes digitados ou que não estão mais no cadastro)
+fornecedores = db.get_fornecedores_notas()
 
 # Filtros
 st.subheader("🔍 Filtros")
@@ -42,7 +51,6 @@ st.subheader("🔍 Filtros")
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    fornecedores = sorted(list(set(nota['fornecedor'] for nota in notas)))
     fornecedor_filtro = st.selectbox("Fornecedor", ["Todos"] + fornecedores)
 
 with col2:
@@ -55,43 +63,65 @@ with col3:
 with col4:
     status_parcela_filtro = st.selectbox("Status da Parcela", ["Todos"] + list(PARCELA_STATUS.values()))
 
-# Aplicar filtros
-notas_filtradas = notas.copy()
+# Filtros da listagem e do resumo
+filtros = {}
 
 if fornecedor_filtro != "Todos":
-    notas_filtradas = [n for n in notas_filtradas if n['fornecedor'] == fornecedor_filtro]
+    filtros['fornecedor'] = fornecedor_filtro
 
 if local_filtro != "Todos":
-    local_id = next((l['id'] for l in locais if l['nome'] == local_filtro), None)
+    local_id = locais_por_nome.get(local_filtro)
     if local_id:
-        notas_filtradas = [n for n in notas_filtradas if n['local_aplicacao'] == local_id]
+        filtros['local_aplicacao'] = local_id
 
+material_key = None
 if status_filtro != "Todos":
-    status_key = next((k for k, v in MATERIAL_STATUS.items() if v == status_filtro), None)
-    if status_key:
-        # Para notas parceladas, verificar se alguma parcela tem o status desejado
-        notas_com_status = []
-        for nota in notas_filtradas:
-            if nota.get('eh_parcelada', False):
-                # Para notas parceladas, verificar parcelas
-                parcelas = db.get_parcelas_by_nota(nota['id'])
-                if any(p.get('status_material') == status_key for p in parcelas):
-                    notas_com_status.append(nota)
-            else:
-                # Para notas à vista, verificar status da nota
-                if nota['status_material'] == status_key:
-                    notas_com_status.append(nota)
-        notas_filtradas = notas_com_status
-
-# Exibir notas filtradas
-if not notas_filtradas:
-    st.warning("Nenhuma nota encontrada com os filtros aplicados.")
+    # Notas à vista usam o status da nota; parceladas, o de qualquer parcela
+    material_key = material_por_rotulo.get(status_filtro)
+    if material_key:
+        filtros['material'] = material_key
+
+if status_parcela_filtro != "Todos":
+    # Apenas notas com alguma parcela no status escolhido
+    status_parcela_key = status_parcela_por_rotulo.get(status_parcela_filtro)
+    if status_parcela_key:
+        filtros['status_parcela'] = status_parcela_key
+
+# Paginação por keyset: pilha com o último id exibido em cada página anterior
+chave_filtros = json.dumps(filtros, sort_keys=True)
+if st.session_state.get('notas_filtros') != chave_filtros:
+    st.session_state.notas_filtros = chave_filtros
+    st.session_state.notas_cursores = [None]
+cursores = st.session_state.notas_cursores
+
+# Total e página da mesma fonte (réplica local ou servidor); uma nota a mais indica se existe próxima página
+total_notas, notas_pagina = db.get_pagina_notas(filtros, after_id=cursores[-1], limit=NOTAS_POR_PAGINA + 1, colunas=COLUNAS_NOTA)
+if total_notas == 0:
+    if filtros:
+        st.warning("Nenhuma nota encontrada com os filtros aplicados.")
+    else:
+        st.info("Nenhuma nota cadastrada ainda.")
     st.stop()
 
-st.subheader(f"📊 {len(notas_filtradas)} Nota(s) Encontrada(s)")
+tem_proxima = len(notas_pagina) > NOTAS_POR_PAGINA
+notas_pagina = notas_pagina[:NOTAS_POR_PAGINA]
+
+if not notas_pagina and len(cursores) > 1:
+    # A página ficou vazia (ex.: após exclusões): voltar para a anterior
+    cursores.pop()
+    st.rerun()
+
+# Parcelas apenas das notas da página, em uma única requisição
+parcelas_por_nota = db.get_parcelas_by_notas([nota['id'] for nota in notas_pagina], colunas=COLUNAS_PARCELA)
+
+pagina_atual = len(cursores)
+total_paginas = max(1, math.ceil(total_notas / NOTAS_POR_PAGINA))
+
+st.subheader(f"📊 {total_notas} Nota(s) Encontrada(s)")
+st.caption(f"Página {pagina_atual} de {total_paginas}")
 
 # Tabela de notas
-for i, nota in enumerate(notas_filtradas):
+for i, nota in enumerate(notas_pagina):
     # Criar container para cada nota
     with st.container():
         # Header com informações resumidas e ações
@@ -182,7 +212,7 @@ for i, nota in enumerate(notas_filtradas):
                     )
                     
                     if st.button(f"Atualizar Local", key=f"btn_local_{nota['id']}", width='stretch'):
-                        local_id = next((l['id'] for l in locais if l['nome'] == novo_local), None)
+                        local_id = locais_por_nome.get(novo_local)
                         if local_id and local_id != nota['local_aplicacao']:
                             resultado = db.update_nota(nota['id'], {'local_aplicacao': local_id})
                             if resultado:
@@ -200,7 +230,7 @@ for i, nota in enumerate(notas_filtradas):
                         )
                         
                         if st.button(f"Atualizar Status", key=f"btn_status_{nota['id']}", width='stretch'):
-                            status_key = next((k for k, v in MATERIAL_STATUS.items() if v == novo_status), None)
+                            status_key = material_por_rotulo.get(novo_status)
                             if status_key and status_key != nota['status_material']:
                                 resultado = db.update_nota(nota['id'], {'status_material': status_key})
                                 if resultado:
@@ -213,18 +243,12 @@ for i, nota in enumerate(notas_filtradas):
                 
                 # Parcelas da nota (dentro do expander)
                 st.subheader("💳 Parcelas")
-                parcelas = db.get_parcelas_by_nota(nota['id'])
+                parcelas = parcelas_por_nota.get(nota['id'], [])
+                parcelas_por_numero = {p['numero']: p for p in parcelas}
                 
                 if parcelas:
-                    # Atualizar status das parcelas baseado na data
-                    for parcela in parcelas:
-                        novo_status = obter_status_parcela(parcela['data_vencimento'], parcela['status'])
-                        if novo_status != parcela['status']:
-                            db.update_parcela_status(parcela['id'], novo_status)
-                    
-                    # Recarregar parcelas com status atualizado
-                    parcelas = db.get_parcelas_by_nota(nota['id'])
-                    
+                    # O status (PENDENTE/VENCIDA) já vem normalizado pelo banco:
+                    # gatilho na gravação e agendador diário (ver agendador.py)
                     # Criar DataFrame das parcelas (robusto a campos ausentes)
                     df_parcelas = pd.DataFrame(parcelas)
                     # Garantir colunas esperadas
@@ -236,12 +260,12 @@ for i, nota in enumerate(notas_filtradas):
                     df_parcelas['Vencimento'] = pd.to_datetime(df_parcelas['data_vencimento'], errors='coerce').dt.strftime('%d/%m/%Y')
                     df_parcelas['Dias para Vencimento'] = df_parcelas['data_vencimento'].apply(lambda d: calcular_dias_vencimento(d) if d else '')
                     df_parcelas['Status'] = df_parcelas['status'].apply(lambda x: f"{obter_icone_status(x)} {PARCELA_STATUS.get(x, x)}")
+                    # Estatísticas de todas as parcelas da nota (antes do filtro abaixo)
+                    contagem_nota = df_parcelas['status'].value_counts()
                     
                     # Aplicar filtro de status da parcela se selecionado
-                    if status_parcela_filtro != "Todos":
-                        status_key = next((k for k, v in PARCELA_STATUS.items() if v == status_parcela_filtro), None)
-                        if status_key:
-                            df_parcelas = df_parcelas[df_parcelas['status'] == status_key]
+                    if filtros.get('status_parcela'):
+                        df_parcelas = df_parcelas[df_parcelas['status'] == filtros['status_parcela']]
                     
                     # Adicionar coluna de status do material se existir
                     if 'status_material' in df_parcelas.columns:
@@ -290,7 +314,7 @@ for i, nota in enumerate(notas_filtradas):
                             if st.button("✅ Marcar como Paga", key=f"btn_pagar_{nota['id']}", width='stretch'):
                                 # Encontrar a parcela selecionada na lista de parcelas pendentes
                                 parcela_numero = int(parcela_pagar.split(' - ')[0].split(' ')[1])
-                                parcela_selecionada = next((p for p in parcelas_pendentes if p['numero'] == parcela_numero), None)
+                                parcela_selecionada = parcelas_por_numero.get(parcela_numero)
                                 
                                 if parcela_selecionada:
                                     parcela_id = parcela_selecionada['id']
@@ -316,7 +340,7 @@ for i, nota in enumerate(notas_filtradas):
                             if st.button("📦 Alterar Status Material", key=f"btn_status_material_{nota['id']}", width='stretch'):
                                 # Encontrar a parcela selecionada
                                 parcela_numero = int(parcela_status_material.split(' - ')[0].split(' ')[1])
-                                parcela_selecionada = next((p for p in parcelas if p['numero'] == parcela_numero), None)
+                                parcela_selecionada = parcelas_por_numero.get(parcela_numero)
                                 
                                 if parcela_selecionada:
                                     parcela_id = parcela_selecionada['id']
@@ -337,19 +361,50 @@ for i, nota in enumerate(notas_filtradas):
                     
                     with col3:
                         # Estatísticas das parcelas
-                        total_parcelas = len(parcelas)
-                        parcelas_pagas = len([p for p in parcelas if p['status'] == 'PAGA'])
-                        parcelas_pendentes = len([p for p in parcelas if p['status'] == 'PENDENTE'])
-                        parcelas_vencidas = len([p for p in parcelas if p['status'] == 'VENCIDA'])
-                        
-                        st.metric("Total de Parcelas", total_parcelas)
-                        st.metric("Pagas", parcelas_pagas)
-                        st.metric("Pendentes", parcelas_pendentes)
-                        st.metric("Vencidas", parcelas_vencidas)
+                        st.metric("Total de Parcelas", len(parcelas))
+                        st.metric("Pagas", int(contagem_nota.get('PAGA', 0)))
+                        st.metric("Pendentes", int(contagem_nota.get('PENDENTE', 0)))
+                        st.metric("Vencidas", int(contagem_nota.get('VENCIDA', 0)))
                 else:
                     st.info("Nenhuma parcela encontrada para esta nota.")
 
-# Resumo geral
+# Exclusão em lote (notas da página atual), em uma única transação
+with st.expander("🗑️ Excluir Notas em Lote"):
+    opcoes_exclusao = {f"Nota {n['numero_nota']} - {n['fornecedor']} (#{n['id']})": n['id'] for n in notas_pagina}
+    selecionadas = st.multiselect("Notas desta página", list(opcoes_exclusao.keys()), key="exclusao_lote")
+    confirmar = st.checkbox(
+        "Confirmo a exclusão das notas selecionadas e de suas parcelas (não pode ser desfeita)",
+        key="confirmar_exclusao_lote"
+    )
+    if st.button("🗑️ Deletar Selecionadas", disabled=not (selecionadas and confirmar), width='stretch'):
+        removidas = db.delete_notas([opcoes_exclusao[s] for s in selecionadas])
+        if removidas:
+            st.success(f"{len(removidas)} nota(s) deletada(s) com sucesso!")
+            del st.session_state['exclusao_lote']
+            del st.session_state['confirmar_exclusao_lote']
+            st.rerun()
+        else:
+            st.error("Erro ao deletar notas")
+
+# Navegação entre páginas
+col_anterior, col_pagina, col_proxima = st.columns([1, 2, 1])
+
+with col_anterior:
+    if st.button("⬅️ Anterior", disabled=pagina_atual == 1, width='stretch'):
+        cursores.pop()
+        st.rerun()
+
+with col_pagina:
+    st.markdown(f"<p style='text-align: center;'>Página {pagina_atual} de {total_paginas}</p>", unsafe_allow_html=True)
+
+with col_proxima:
+    if st.button("Próxima ➡️", disabled=not tem_proxima, width='stretch'):
+        cursores.append(notas_pagina[-1]['id'])
+        st.rerun()
+
+# Resumo geral (todas as notas filtradas, não apenas a página atual)
+resumo = db.get_resumo_notas(filtros)
+
 st.subheader("📊 Resumo Geral")
 
 # Informação sobre o filtro aplicado
@@ -358,30 +413,11 @@ if status_filtro != "Todos":
 
 col1, col2, col3, col4 = st.columns(4)
 
-# Calcular valor total baseado no filtro de status do material
-total_valor_filtrado = 0
-total_parcelas_filtradas = 0
+# Valor e quantidade de parcelas do conjunto filtrado
+total_valor_filtrado = sum(r['total'] for r in resumo.values())
+total_parcelas_filtradas = sum(r['quantidade'] for r in resumo.values())
 
-for nota in notas_filtradas:
-    parcelas = db.get_parcelas_by_nota(nota['id'])
-    
-    if status_filtro != "Todos":
-        status_key = next((k for k, v in MATERIAL_STATUS.items() if v == status_filtro), None)
-        if status_key:
-            # Somar apenas parcelas com o status filtrado
-            parcelas_filtradas = [p for p in parcelas if p.get('status_material') == status_key]
-            total_valor_filtrado += sum(p['valor'] for p in parcelas_filtradas)
-            total_parcelas_filtradas += len(parcelas_filtradas)
-        else:
-            # Se não há filtro de status, somar todas as parcelas
-            total_valor_filtrado += sum(p['valor'] for p in parcelas)
-            total_parcelas_filtradas += len(parcelas)
-    else:
-        # Se não há filtro de status, somar todas as parcelas
-        total_valor_filtrado += sum(p['valor'] for p in parcelas)
-        total_parcelas_filtradas += len(parcelas)
-
-col1.metric("Total de Notas", len(notas_filtradas))
+col1.metric("Total de Notas", total_notas)
 
 # Mostrar valor baseado no filtro
 so_status_todos = (status_filtro == "Todos")
@@ -404,29 +440,14 @@ else:
     col3.metric("Total de Parcelas", total_parcelas_filtradas)
 
 # Contar parcelas por status (apenas as filtradas)
-todas_parcelas = []
-for nota in notas_filtradas:
-    parcelas = db.get_parcelas_by_nota(nota['id'])
-    
-    if status_filtro != "Todos":
-        status_key = next((k for k, v in MATERIAL_STATUS.items() if v == status_filtro), None)
-        if status_key:
-            # Incluir apenas parcelas com o status filtrado
-            parcelas_filtradas = [p for p in parcelas if p.get('status_material') == status_key]
-            todas_parcelas.extend(parcelas_filtradas)
-        else:
-            todas_parcelas.extend(parcelas)
-    else:
-        todas_parcelas.extend(parcelas)
-
-parcelas_pagas = len([p for p in todas_parcelas if p['status'] == 'PAGA'])
-parcelas_pendentes = len([p for p in todas_parcelas if p['status'] == 'PENDENTE'])
-parcelas_vencidas = len([p for p in todas_parcelas if p['status'] == 'VENCIDA'])
+parcelas_pagas = resumo.get('PAGA', {}).get('quantidade', 0)
+parcelas_pendentes = resumo.get('PENDENTE', {}).get('quantidade', 0)
+parcelas_vencidas = resumo.get('VENCIDA', {}).get('quantidade', 0)
 
 col4.metric("Parcelas Pagas", parcelas_pagas)
 
 # Gráfico de status das parcelas
-if todas_parcelas:
+if total_parcelas_filtradas:
     st.subheader("📈 Distribuição de Status das Parcelas")
     
     import plotly.express as px
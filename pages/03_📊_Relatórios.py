@@ -1,9 +1,11 @@
 import streamlit as st
 import pandas as pd
+import json
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import date, datetime, timedelta
-from database import DatabaseManager
+from datetime import date, datetime
+from database import obter_database_manager, PAGE_SIZE
+from database_async import carregar_em_paralelo
 from utils import formatar_moeda
 from config import MATERIAL_STATUS, PARCELA_STATUS
 
@@ -15,15 +17,16 @@ st.set_page_config(
 
 st.title("📊 Relatórios")
 
+PARCELAS_POR_PAGINA = 50
+
 # Inicializar banco de dados
-db = DatabaseManager()
+db = obter_database_manager()
 
 # Carregar dados
-notas = db.get_notas()
-locais = db.get_locais_aplicacao()
+total_notas, locais = carregar_em_paralelo(db.count_notas, db.get_locais_aplicacao)
 locais_dict = {local['id']: local['nome'] for local in locais}
 
-if not notas:
+if not total_notas:
     st.info("Nenhuma nota cadastrada ainda.")
     st.stop()
 
@@ -45,7 +48,10 @@ with col2:
     mes_selecionado = st.selectbox("Mês", meses, index=date.today().month - 1)
 
 # Gerar relatório mensal
-relatorio = db.get_relatorio_mensal(meses.index(mes_selecionado) + 1, ano_selecionado)
+mes_numero = meses.index(mes_selecionado) + 1
+inicio_mes = date(ano_selecionado, mes_numero, 1)
+fim_mes = date(ano_selecionado + 1, 1, 1) if mes_numero == 12 else date(ano_selecionado, mes_numero + 1, 1)
+relatorio = db.get_relatorio_mensal(mes_numero, ano_selecionado)
 
 # Resumo executivo
 st.subheader("📈 Resumo Executivo")
@@ -104,22 +110,24 @@ with col1:
 
 # Gráfico de barras - Comparativo mensal
 with col2:
-    # Buscar dados dos últimos 6 meses para comparação
-    dados_comparativo = []
-    for i in range(6):
-        data_ref = date(ano_selecionado, meses.index(mes_selecionado) + 1, 1) - timedelta(days=30*i)
-        rel_mes = db.get_relatorio_mensal(data_ref.month, data_ref.year)
-        
-        dados_comparativo.append({
-            'Mês': f"{data_ref.month:02d}/{data_ref.year}",
-            'Pago': rel_mes['total_pago'],
-            'Pendente': rel_mes['total_pendente'],
-            'Vencido': rel_mes['total_vencido']
-        })
+    # Totais mensais da janela agregados no servidor em uma única requisição
+    janela_meses = st.selectbox("Janela do comparativo", [6, 12, 24, 36], format_func=lambda n: f"Últimos {n} meses")
+    # Meses contados a partir do ano 0 (0 = janeiro): a janela termina no mês selecionado
+    indice_mes = ano_selecionado * 12 + meses.index(mes_selecionado)
+    indice_inicio, indice_fim = indice_mes - janela_meses + 1, indice_mes + 1
+    inicio_janela = date(indice_inicio // 12, indice_inicio % 12 + 1, 1)
+    fim_janela = date(indice_fim // 12, indice_fim % 12 + 1, 1)
+    
+    dados_comparativo = [{
+        'Mês': datetime.fromisoformat(linha['periodo']).strftime('%m/%Y'),
+        'Pago': linha['total_pago'],
+        'Pendente': linha['total_pendente'],
+        'Vencido': linha['total_vencido']
+    } for linha in db.get_relatorio_periodo(inicio_janela, fim_janela, 'mes')]
     
     if dados_comparativo:
+        # Os períodos já vêm em ordem cronológica
         df_comparativo = pd.DataFrame(dados_comparativo)
-        df_comparativo = df_comparativo.sort_values('Mês')
         
         fig_barras = go.Figure()
         
@@ -145,7 +153,7 @@ with col2:
         ))
         
         fig_barras.update_layout(
-            title=f"Evolução dos Valores - Últimos 6 Meses",
+            title=f"Evolução dos Valores - Últimos {janela_meses} Meses",
             xaxis_title="Mês",
             yaxis_title="Valor (R$)",
             barmode='stack'
@@ -153,29 +161,35 @@ with col2:
         
         st.plotly_chart(fig_barras, use_container_width=True)
 
-# Tabela detalhada de parcelas
+# Tabela detalhada de parcelas (carregada sob demanda, uma página por vez)
 st.subheader("📋 Detalhamento das Parcelas")
 
-if relatorio['parcelas']:
-    # Preparar dados da tabela
-    parcelas_data = []
-    for parcela in relatorio['parcelas']:
-        nota = parcela.get('notas', {})
-        local_nome = locais_dict.get(nota.get('local_aplicacao'), 'N/A')
-        
-        parcelas_data.append({
-            'Nota': nota.get('numero_nota', 'N/A'),
-            'Fornecedor': nota.get('fornecedor', 'N/A'),
-            'Parcela': parcela['numero'],
-            'Valor': parcela['valor'],
-            'Vencimento': datetime.fromisoformat(parcela['data_vencimento']).strftime('%d/%m/%Y'),
-            'Status': PARCELA_STATUS.get(parcela['status'], parcela['status']),
-            'Local': local_nome,
-            'Material': MATERIAL_STATUS.get(nota.get('status_material'), 'N/A')
-        })
-    
-    df_parcelas = pd.DataFrame(parcelas_data)
-    df_parcelas['Valor'] = df_parcelas['Valor'].apply(formatar_moeda)
+def linha_parcela(parcela):
+    """Linha da tabela de detalhamento a partir de uma parcela de get_parcelas_relatorio"""
+    return {
+        'Nota': parcela.get('numero_nota') or 'N/A',
+        'Fornecedor': parcela.get('fornecedor') or 'N/A',
+        'Parcela': parcela['numero'],
+        'Valor': parcela['valor'],
+        'Vencimento': datetime.fromisoformat(str(parcela['data_vencimento'])).strftime('%d/%m/%Y'),
+        'Status': PARCELA_STATUS.get(parcela['status'], parcela['status']),
+        'Local': locais_dict.get(parcela.get('local_aplicacao'), 'N/A'),
+        'Material': MATERIAL_STATUS.get(parcela.get('status_material'), 'N/A')
+    }
+
+total_parcelas_mes = sum(relatorio['quantidades'].values())
+
+if not total_parcelas_mes:
+    st.info(f"Nenhuma parcela encontrada para {mes_selecionado}/{ano_selecionado}")
+elif st.checkbox(f"Exibir as {total_parcelas_mes} parcelas do mês"):
+    # Opções dos filtros a partir dos totais agregados do mês
+    status_por_rotulo = {rotulo: chave for chave, rotulo in PARCELA_STATUS.items()}
+    fornecedores = sorted(g['chave'] for g in db.get_totais_agrupados(inicio_mes, fim_mes, 'fornecedor') if g['chave'])
+    local_por_nome = {
+        locais_dict[g['chave']]: g['chave']
+        for g in db.get_totais_agrupados(inicio_mes, fim_mes, 'local')
+        if g['chave'] in locais_dict
+    }
     
     # Filtros para a tabela
     col1, col2, col3 = st.columns(3)
@@ -184,86 +198,107 @@ if relatorio['parcelas']:
         status_filtro = st.selectbox("Filtrar por Status", ["Todos"] + list(PARCELA_STATUS.values()))
     
     with col2:
-        fornecedores = sorted(list(set(df_parcelas['Fornecedor'])))
         fornecedor_filtro = st.selectbox("Filtrar por Fornecedor", ["Todos"] + fornecedores)
     
     with col3:
-        locais_filtro = st.selectbox("Filtrar por Local", ["Todos"] + list(set(df_parcelas['Local'])))
-    
-    # Aplicar filtros
-    df_filtrado = df_parcelas.copy()
+        locais_filtro = st.selectbox("Filtrar por Local", ["Todos"] + sorted(local_por_nome))
     
+    # Filtros aplicados no servidor
+    filtros_parcelas = {}
     if status_filtro != "Todos":
-        df_filtrado = df_filtrado[df_filtrado['Status'] == status_filtro]
-    
+        filtros_parcelas['status'] = status_por_rotulo[status_filtro]
     if fornecedor_filtro != "Todos":
-        df_filtrado = df_filtrado[df_filtrado['Fornecedor'] == fornecedor_filtro]
-    
+        filtros_parcelas['fornecedor'] = fornecedor_filtro
     if locais_filtro != "Todos":
-        df_filtrado = df_filtrado[df_filtrado['Local'] == locais_filtro]
+        filtros_parcelas['local_aplicacao'] = local_por_nome[locais_filtro]
+    
+    # Paginação por keyset: pilha com o último id exibido em cada página anterior
+    chave_detalhe = json.dumps({'mes': mes_numero, 'ano': ano_selecionado, **filtros_parcelas}, sort_keys=True)
+    if st.session_state.get('relatorio_filtros') != chave_detalhe:
+        st.session_state.relatorio_filtros = chave_detalhe
+        st.session_state.relatorio_cursores = [None]
+    cursores = st.session_state.relatorio_cursores
+    
+    # Uma parcela a mais indica se existe próxima página
+    parcelas_pagina = db.get_parcelas_relatorio(inicio_mes, fim_mes, filtros_parcelas,
+                                                after_id=cursores[-1], limit=PARCELAS_POR_PAGINA + 1)
+    tem_proxima = len(parcelas_pagina) > PARCELAS_POR_PAGINA
+    parcelas_pagina = parcelas_pagina[:PARCELAS_POR_PAGINA]
     
-    # Exibir tabela
-    st.dataframe(
-        df_filtrado,
-        column_config={
-            'Nota': 'Número da Nota',
-            'Fornecedor': 'Fornecedor',
-            'Parcela': 'Parcela',
-            'Valor': 'Valor',
-            'Vencimento': 'Vencimento',
-            'Status': 'Status',
-            'Local': 'Local de Aplicação',
-            'Material': 'Status do Material'
-        },
-        hide_index=True,
-        use_container_width=True
-    )
+    if not parcelas_pagina and len(cursores) > 1:
+        cursores.pop()
+        st.rerun()
     
-    # Estatísticas da tabela filtrada
-    if not df_filtrado.empty:
-        st.subheader("📊 Estatísticas do Filtro")
+    if parcelas_pagina:
+        df_parcelas = pd.DataFrame([linha_parcela(parcela) for parcela in parcelas_pagina])
+        df_parcelas['Valor'] = df_parcelas['Valor'].apply(formatar_moeda)
         
-        col1, col2, col3, col4 = st.columns(4)
+        # Exibir tabela
+        st.dataframe(
+            df_parcelas,
+            column_config={
+                'Nota': 'Número da Nota',
+                'Fornecedor': 'Fornecedor',
+                'Parcela': 'Parcela',
+                'Valor': 'Valor',
+                'Vencimento': 'Vencimento',
+                'Status': 'Status',
+                'Local': 'Local de Aplicação',
+                'Material': 'Status do Material'
+            },
+            hide_index=True,
+            use_container_width=True
+        )
         
-        total_filtrado = sum(float(v.replace('R$ ', '').replace('.', '').replace(',', '.')) for v in df_filtrado['Valor'])
+        # Navegação entre páginas
+        col_anterior, col_pagina, col_proxima = st.columns([1, 2, 1])
         
-        col1.metric("Total de Parcelas", len(df_filtrado))
-        col2.metric("Valor Total", formatar_moeda(total_filtrado))
+        with col_anterior:
+            if st.button("⬅️ Anterior", disabled=len(cursores) == 1, width='stretch'):
+                cursores.pop()
+                st.rerun()
         
-        status_counts = df_filtrado['Status'].value_counts()
-        col3.metric("Mais Comum", status_counts.index[0] if not status_counts.empty else "N/A")
-        col4.metric("Quantidade", status_counts.iloc[0] if not status_counts.empty else 0)
-else:
-    st.info(f"Nenhuma parcela encontrada para {mes_selecionado}/{ano_selecionado}")
+        with col_pagina:
+            st.markdown(f"<p style='text-align: center;'>Página {len(cursores)}</p>", unsafe_allow_html=True)
+        
+        with col_proxima:
+            if st.button("Próxima ➡️", disabled=not tem_proxima, width='stretch'):
+                cursores.append(parcelas_pagina[-1]['id'])
+                st.rerun()
+        
+        # Estatísticas de todas as parcelas filtradas (não apenas da página), agregadas no servidor
+        resumo_filtro = db.get_resumo_parcelas_relatorio(inicio_mes, fim_mes, filtros_parcelas)
+        if resumo_filtro:
+            st.subheader("📊 Estatísticas do Filtro")
+            
+            col1, col2, col3, col4 = st.columns(4)
+            
+            col1.metric("Total de Parcelas", sum(r['quantidade'] for r in resumo_filtro.values()))
+            col2.metric("Valor Total", formatar_moeda(sum(r['total'] for r in resumo_filtro.values())))
+            
+            status_comum = max(resumo_filtro, key=lambda status: resumo_filtro[status]['quantidade'])
+            col3.metric("Mais Comum", PARCELA_STATUS.get(status_comum, status_comum))
+            col4.metric("Quantidade", resumo_filtro[status_comum]['quantidade'])
+    else:
+        st.info("Nenhuma parcela encontrada com os filtros aplicados.")
 
 # Análise por local de aplicação
 st.subheader("🏗️ Análise por Local de Aplicação")
 
 if locais:
-    local_stats = []
-    
-    for local in locais:
-        # Buscar parcelas deste local no período
-        parcelas_local = []
-        for parcela in relatorio['parcelas']:
-            nota = parcela.get('notas', {})
-            if nota.get('local_aplicacao') == local['id']:
-                parcelas_local.append(parcela)
-        
-        if parcelas_local:
-            total_local = sum(p['valor'] for p in parcelas_local)
-            pago_local = sum(p['valor'] for p in parcelas_local if p['status'] == 'PAGA')
-            pendente_local = sum(p['valor'] for p in parcelas_local if p['status'] == 'PENDENTE')
-            vencido_local = sum(p['valor'] for p in parcelas_local if p['status'] == 'VENCIDA')
-            
-            local_stats.append({
-                'Local': local['nome'],
-                'Total': total_local,
-                'Pago': pago_local,
-                'Pendente': pendente_local,
-                'Vencido': vencido_local,
-                'Parcelas': len(parcelas_local)
-            })
+    # Totais por local agregados no servidor
+    local_stats = [
+        {
+            'Local': locais_dict[grupo['chave']],
+            'Total': grupo['total'],
+            'Pago': grupo['total_pago'],
+            'Pendente': grupo['total_pendente'],
+            'Vencido': grupo['total_vencido'],
+            'Parcelas': grupo['quantidade']
+        }
+        for grupo in db.get_totais_agrupados(inicio_mes, fim_mes, 'local')
+        if grupo['chave'] in locais_dict
+    ]
     
     if local_stats:
         df_local = pd.DataFrame(local_stats)
@@ -317,8 +352,16 @@ col1, col2 = st.columns(2)
 
 with col1:
     if st.button("📊 Exportar Relatório CSV"):
-        if relatorio['parcelas']:
-            df_export = pd.DataFrame(parcelas_data)
+        if total_parcelas_mes:
+            # Todas as parcelas do mês, buscadas apenas ao exportar
+            parcelas_export = []
+            while True:
+                lote = db.get_parcelas_relatorio(inicio_mes, fim_mes, after_id=parcelas_export[-1]['id'] if parcelas_export else None,
+                                                 limit=PAGE_SIZE)
+                parcelas_export.extend(lote)
+                if len(lote) < PAGE_SIZE:
+                    break
+            df_export = pd.DataFrame([linha_parcela(parcela) for parcela in parcelas_export])
             csv = df_export.to_csv(index=False)
             st.download_button(
                 label="Download CSV",
@@ -341,10 +384,10 @@ RESUMO EXECUTIVO:
 - Total Geral: {formatar_moeda(total_geral)}
 
 ESTATÍSTICAS:
-- Total de Parcelas: {len(relatorio['parcelas'])}
-- Parcelas Pagas: {len([p for p in relatorio['parcelas'] if p['status'] == 'PAGA'])}
-- Parcelas Pendentes: {len([p for p in relatorio['parcelas'] if p['status'] == 'PENDENTE'])}
-- Parcelas Vencidas: {len([p for p in relatorio['parcelas'] if p['status'] == 'VENCIDA'])}
+- Total de Parcelas: {sum(relatorio['quantidades'].values())}
+- Parcelas Pagas: {relatorio['quantidades'].get('PAGA', 0)}
+- Parcelas Pendentes: {relatorio['quantidades'].get('PENDENTE', 0)}
+- Parcelas Vencidas: {relatorio['quantidades'].get('VENCIDA', 0)}
 
 Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
         """
@@ -1,5 +1,5 @@
 import streamlit as st
-from database import DatabaseManager
+from database import obter_database_manager
 from utils import carregar_locais_aplicacao
 
 st.set_page_config(
@@ -11,7 +11,7 @@ st.set_page_config(
 st.title("⚙️ Configurações do Sistema")
 
 # Inicializar banco de dados
-db = DatabaseManager()
+db = obter_database_manager()
 
 # Gerenciar Locais de Aplicação
 st.subheader("🏗️ Gerenciar Locais de Aplicação")
@@ -38,7 +38,7 @@ with st.expander("➕ Adicionar Novo Local", expanded=True):
 # Listar locais existentes
 st.subheader("📋 Locais Cadastrados")
 
-locais = db.get_locais_aplicacao()
+locais = db.get_locais_aplicacao(colunas='id, nome')
 
 if locais:
     for i, local in enumerate(locais):
@@ -99,23 +99,12 @@ st.subheader("📊 Estatísticas do Sistema")
 col1, col2, col3, col4 = st.columns(4)
 
 # Buscar estatísticas
-notas = db.get_notas()
-total_notas = len(notas)
-total_valor = sum(nota['valor_total'] for nota in notas)
-
-# Contar parcelas
-todas_parcelas = []
-for nota in notas:
-    parcelas = db.get_parcelas_by_nota(nota['id'])
-    todas_parcelas.extend(parcelas)
-
-total_parcelas = len(todas_parcelas)
-parcelas_pagas = len([p for p in todas_parcelas if p['status'] == 'PAGA'])
-
-col1.metric("Total de Notas", total_notas)
-col2.metric("Valor Total", f"R$ {total_valor:,.2f}")
-col3.metric("Total de Parcelas", total_parcelas)
-col4.metric("Parcelas Pagas", parcelas_pagas)
+kpis = db.get_kpis()
+
+col1.metric("Total de Notas", kpis['total_notas'])
+col2.metric("Valor Total", f"R$ {kpis['valor_total']:,.2f}")
+col3.metric("Total de Parcelas", kpis['total_parcelas'])
+col4.metric("Parcelas Pagas", kpis['parcelas_pagas'])
 
 # Informações do banco de dados
 st.subheader("🗄️ Informações do Banco de Dados")
@@ -1,8 +1,8 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime, timedelta
-from auth import AuthManager
-from database import DatabaseManager
+from datetime import datetime, timedelta, timezone
+from auth import obter_auth_manager
+from database import obter_database_manager
 
 st.set_page_config(
     page_title="Logs do Sistema",
@@ -11,7 +11,7 @@ st.set_page_config(
 )
 
 # Verificar autenticação
-auth = AuthManager()
+auth = obter_auth_manager()
 auth.require_auth()
 
 # Verificar se é administrador
@@ -23,7 +23,13 @@ st.title("📊 Logs do Sistema")
 st.markdown("Rastreamento de todas as ações realizadas no sistema")
 
 # Inicializar banco de dados
-db = DatabaseManager()
+db = obter_database_manager()
+
+
+def data_log(log) -> datetime:
+    """Horário do log sem fuso (UTC), como a coluna created_at (timestamp sem fuso) armazena"""
+    data = datetime.fromisoformat(log['created_at'].replace('Z', '+00:00'))
+    return data.astimezone(timezone.utc).replace(tzinfo=None) if data.tzinfo else data
 
 # Filtros
 st.subheader("🔍 Filtros")
@@ -39,7 +45,7 @@ with col1:
 with col2:
     usuario_filtro = st.selectbox(
         "Usuário",
-        ["Todos"] + [f"{u['nome']} ({u['funcao']})" for u in db.get_usuarios()]
+        ["Todos"] + [f"{u['nome']} ({u['funcao']})" for u in db.get_usuarios(colunas='nome, funcao')]
     )
 
 with col3:
@@ -55,6 +61,8 @@ with col4:
     )
 
 # Aplicar filtros
+# Logs ainda na fila de gravação em segundo plano também devem aparecer
+db.descarregar_logs()
 logs = db.get_logs(limit=1000)
 
 # Filtrar por ação
@@ -74,7 +82,7 @@ if tabela_filtro != "Todas":
 if dias_filtro != "Todos":
     dias = int(dias_filtro.split(' ')[1].replace('dias', ''))
     data_limite = datetime.now() - timedelta(days=dias)
-    logs = [log for log in logs if datetime.fromisoformat(log['created_at'].replace('Z', '+00:00')) >= data_limite]
+    logs = [log for log in logs if data_log(log) >= data_limite]
 
 # Estatísticas
 st.subheader("📈 Estatísticas")
@@ -83,9 +91,9 @@ col1, col2, col3, col4 = st.columns(4)
 
 total_logs = len(logs)
 logins_hoje = len([log for log in logs if log['acao'] == 'LOGIN' and 
-                  datetime.fromisoformat(log['created_at'].replace('Z', '+00:00')).date() == datetime.now().date()])
+                  data_log(log).date() == datetime.now().date()])
 acoes_hoje = len([log for log in logs if 
-                 datetime.fromisoformat(log['created_at'].replace('Z', '+00:00')).date() == datetime.now().date()])
+                 data_log(log).date() == datetime.now().date()])
 usuarios_ativos = len(set(log['usuario_id'] for log in logs if log['usuario_id']))
 
 col1.metric("Total de Logs", total_logs)
@@ -102,7 +110,7 @@ if logs:
     for log in logs:
         usuario_info = log.get('usuarios', {})
         logs_data.append({
-            'Data/Hora': datetime.fromisoformat(log['created_at'].replace('Z', '+00:00')).strftime('%d/%m/%Y %H:%M:%S'),
+            'Data/Hora': data_log(log).strftime('%d/%m/%Y %H:%M:%S'),
             'Usuário': usuario_info.get('nome', 'Sistema'),
             'Função': usuario_info.get('funcao', 'N/A'),
             'Empresa': usuario_info.get('empresa', 'N/A'),
@@ -137,19 +145,20 @@ if logs:
     if len(logs) > 0:
         log_selecionado = st.selectbox(
             "Selecionar Log para Detalhes",
-            options=[f"{i+1}. {log['acao']} - {log.get('usuarios', {}).get('nome', 'Sistema')} - {datetime.fromisoformat(log['created_at'].replace('Z', '+00:00')).strftime('%d/%m/%Y %H:%M')}" 
+            options=[f"{i+1}. {log['acao']} - {log.get('usuarios', {}).get('nome', 'Sistema')} - {data_log(log).strftime('%d/%m/%Y %H:%M')}" 
                     for i, log in enumerate(logs[:50])]  # Limitar a 50 para performance
         )
         
         if log_selecionado:
             log_idx = int(log_selecionado.split('.')[0]) - 1
-            log_detalhado = logs[log_idx]
+            # A listagem não traz os dados anteriores/novos: buscar o log completo
+            log_detalhado = db.get_log(logs[log_idx]['id']) or logs[log_idx]
             
             col1, col2 = st.columns(2)
             
             with col1:
                 st.write("**Informações Básicas:**")
-                st.write(f"• **Data/Hora:** {datetime.fromisoformat(log_detalhado['created_at'].replace('Z', '+00:00')).strftime('%d/%m/%Y %H:%M:%S')}")
+                st.write(f"• **Data/Hora:** {data_log(log_detalhado).strftime('%d/%m/%Y %H:%M:%S')}")
                 st.write(f"• **Ação:** {log_detalhado['acao']}")
                 st.write(f"• **Tabela:** {log_detalhado.get('tabela_afetada', 'N/A')}")
                 st.write(f"• **Registro ID:** {log_detalhado.get('registro_id', 'N/A')}")
@@ -193,6 +202,53 @@ with col3:
         if st.button("✅ Confirmar Limpeza"):
             st.info("Funcionalidade em desenvolvimento")
 
+# Desempenho do acesso ao banco (métricas deste processo)
+st.subheader("⏱️ Desempenho do Banco de Dados")
+
+from instrumentacao import metricas
+
+with st.expander("📈 Requisições por Página e Método", expanded=False):
+    dados_metricas = metricas.snapshot()
+    if dados_metricas:
+        df_metricas = pd.DataFrame([{
+            'Página': m['pagina'],
+            'Método': m['metodo'],
+            'Chamadas': m['chamadas'],
+            'Round Trips': m['requisicoes'],
+            'Linhas': m['linhas'],
+            'KB': round(m['bytes'] / 1024, 1),
+            'Conexões': m['conexoes'],
+            'Handshakes TLS': m['handshakes_tls'],
+            'p50 (ms)': m['requisicao']['p50_ms'],
+            'p95 (ms)': m['requisicao']['p95_ms'],
+            'p99 (ms)': m['requisicao']['p99_ms'],
+            'Chamada p95 (ms)': m['chamada']['p95_ms'],
+        } for m in dados_metricas])
+        
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Round Trips", int(df_metricas['Round Trips'].sum()))
+        col2.metric("Linhas Recebidas", int(df_metricas['Linhas'].sum()))
+        col3.metric("Dados Recebidos", f"{df_metricas['KB'].sum():,.1f} KB")
+        col4.metric("Handshakes TLS", int(df_metricas['Handshakes TLS'].sum()))
+        
+        st.dataframe(df_metricas, width='stretch', hide_index=True)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                label="📥 Exportar Métricas (JSON)",
+                data=metricas.to_json(),
+                file_name=f"metricas_db_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                mime="application/json",
+                width='stretch'
+            )
+        with col2:
+            if st.button("🔄 Zerar Métricas", width='stretch'):
+                metricas.reset()
+                st.rerun()
+    else:
+        st.info("Nenhuma métrica registrada neste processo (verifique se INSTRUMENTACAO está ativa).")
+
 # Informações do sistema
 st.sidebar.markdown("### ℹ️ Informações")
 st.sidebar.markdown("""
@@ -0,0 +1,55 @@
+"""Quadros tipados (pandas) de notas e parcelas para filtros e totais vetorizados.
+
+O resumo de Visualizar Notas percorria listas de dicts a cada rerun. Aqui as
+linhas viram DataFrames uma única vez (ver DatabaseManager.get_quadros_notas) e
+são reaproveitadas até a réplica local mudar: fornecedor e status como
+categorias, ids inteiros, datas em datetime64 e valores em float64. Filtros,
+contagens e somas passam a ser máscaras e agregações sobre as colunas.
+"""
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+# Tipo de cada coluna (as colunas de data viram datetime64)
+TIPOS_NOTAS = {
+    'id': 'int64', 'numero_nota': 'string', 'fornecedor': 'category', 'valor_total': 'float64',
+    'local_aplicacao': 'Int64', 'status_material': 'category', 'eh_parcelada': 'bool', 'num_parcelas': 'Int64',
+}
+TIPOS_PARCELAS = {
+    'id': 'int64', 'nota_id': 'int64', 'numero': 'int64', 'valor': 'float64',
+    'status': 'category', 'status_material': 'category',
+}
+COLUNAS_DATA = ('data_emissao', 'data_vencimento', 'data_pagamento')
+
+
+def quadro_tipado(linhas: List[Dict], colunas: List[str], tipos: Dict[str, str]) -> pd.DataFrame:
+    """DataFrame com `colunas`, na ordem dada, convertidas para os tipos de `tipos`"""
+    quadro = pd.DataFrame.from_records(linhas, columns=colunas)
+    for coluna in colunas:
+        if coluna in COLUNAS_DATA:
+            quadro[coluna] = pd.to_datetime(quadro[coluna], errors='coerce')
+        elif tipos.get(coluna) == 'bool':
+            # Nulo conta como falso
+            quadro[coluna] = quadro[coluna].eq(True)
+        elif coluna in tipos:
+            quadro[coluna] = quadro[coluna].astype(tipos[coluna])
+    return quadro
+
+
+def mascara_notas(notas: pd.DataFrame, parcelas: pd.DataFrame, filtros: Optional[Dict]) -> pd.Series:
+    """Notas que atendem aos filtros de DatabaseManager.get_notas (mesma regra de vw_notas_listagem)"""
+    filtros = filtros or {}
+    mascara = pd.Series(True, index=notas.index)
+    for coluna in ('fornecedor', 'local_aplicacao', 'status_material'):
+        if filtros.get(coluna):
+            # isin trata nulos e valores fora das categorias como falso
+            mascara &= notas[coluna].isin([filtros[coluna]])
+    if filtros.get('material'):
+        com_material = parcelas.loc[parcelas['status_material'].isin([filtros['material']]), 'nota_id']
+        parcelada = notas['eh_parcelada']
+        mascara &= ((parcelada & notas['id'].isin(com_material))
+                    | (~parcelada & notas['status_material'].isin([filtros['material']])))
+    if filtros.get('status_parcela'):
+        com_status = parcelas.loc[parcelas['status'].isin([filtros['status_parcela']]), 'nota_id']
+        mascara &= notas['id'].isin(com_status)
+    return mascara
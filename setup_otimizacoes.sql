@@ -0,0 +1,693 @@
+-- Script SQL com views, índices e funções de apoio à performance
+-- Execute este script no editor SQL do Supabase depois de setup_supabase.sql,
+-- setup_fornecedores.sql e setup_usuarios.sql
+
+-- Listagem de notas com o status do material considerando as parcelas:
+-- notas à vista usam o status da nota; notas parceladas, o de qualquer parcela
+CREATE OR REPLACE VIEW vw_notas_listagem AS
+SELECT
+    n.*,
+    CASE WHEN n.eh_parcelada
+        THEN EXISTS (SELECT 1 FROM parcelas p WHERE p.nota_id = n.id AND p.status_material = 'ESTOQUE')
+        ELSE n.status_material = 'ESTOQUE'
+    END AS material_estoque,
+    CASE WHEN n.eh_parcelada
+        THEN EXISTS (SELECT 1 FROM parcelas p WHERE p.nota_id = n.id AND p.status_material = 'EM_USO')
+        ELSE n.status_material = 'EM_USO'
+    END AS material_em_uso,
+    EXISTS (SELECT 1 FROM parcelas p WHERE p.nota_id = n.id AND p.status = 'PENDENTE') AS parcela_pendente,
+    EXISTS (SELECT 1 FROM parcelas p WHERE p.nota_id = n.id AND p.status = 'PAGA') AS parcela_paga,
+    EXISTS (SELECT 1 FROM parcelas p WHERE p.nota_id = n.id AND p.status = 'VENCIDA') AS parcela_vencida
+FROM notas n;
+
+-- Atualização em lote de parcelas (valor e vencimento) em uma única transação,
+-- com um único registro de auditoria contendo os dados anteriores e os novos.
+-- p_parcelas: [{"id": 1, "valor": 100.00, "data_vencimento": "2025-01-31"}, ...]
+CREATE OR REPLACE FUNCTION atualizar_parcelas_lote(p_parcelas JSONB, p_usuario_id INTEGER DEFAULT NULL)
+RETURNS SETOF parcelas AS $$
+DECLARE
+    v_anteriores JSONB;
+BEGIN
+    -- FOR UPDATE não é permitido com agregação: trava as linhas antes de lê-las
+    PERFORM 1 FROM parcelas
+    WHERE id IN (SELECT (e->>'id')::INTEGER FROM jsonb_array_elements(p_parcelas) e)
+    FOR UPDATE;
+
+    SELECT jsonb_agg(to_jsonb(p) ORDER BY p.id) INTO v_anteriores
+    FROM parcelas p
+    WHERE p.id IN (SELECT (e->>'id')::INTEGER FROM jsonb_array_elements(p_parcelas) e);
+
+    IF v_anteriores IS NULL THEN
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+    WITH atualizadas AS (
+        UPDATE parcelas p
+        SET valor = d.valor,
+            data_vencimento = d.data_vencimento
+        FROM jsonb_to_recordset(p_parcelas) AS d(id INTEGER, valor DECIMAL(10,2), data_vencimento DATE)
+        WHERE p.id = d.id
+        RETURNING p.*
+    )
+    SELECT * FROM atualizadas ORDER BY id;
+
+    INSERT INTO logs_sistema (usuario_id, acao, tabela_afetada, dados_anteriores, dados_novos)
+    VALUES (p_usuario_id, 'UPDATE', 'parcelas', v_anteriores, p_parcelas);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Atualização de um registro com auditoria em uma única chamada: trava a linha,
+-- guarda a imagem anterior, aplica as colunas de p_dados, grava o log e retorna
+-- a linha atualizada (NULL se o registro não existir). Só aceita as colunas editáveis
+-- de cada tabela: id, nota_id, created_at e updated_at não podem ser alterados
+CREATE OR REPLACE FUNCTION atualizar_registro_auditado(
+    p_tabela TEXT, p_id INTEGER, p_dados JSONB, p_usuario_id INTEGER DEFAULT NULL)
+RETURNS JSONB AS $$
+DECLARE
+    v_anterior JSONB;
+    v_novo JSONB;
+    v_colunas TEXT;
+    v_editaveis TEXT[];
+    v_invalidas TEXT[];
+BEGIN
+    v_editaveis := CASE p_tabela
+        WHEN 'notas' THEN ARRAY['numero_nota', 'fornecedor', 'valor_total', 'data_emissao', 'descricao',
+                                'local_aplicacao', 'status_material', 'eh_parcelada', 'num_parcelas',
+                                'dias_ate_primeira', 'intervalo_dias']
+        WHEN 'parcelas' THEN ARRAY['numero', 'valor', 'data_vencimento', 'status', 'data_pagamento',
+                                   'status_material']
+    END;
+    IF v_editaveis IS NULL THEN
+        RAISE EXCEPTION 'Tabela não permitida: %', p_tabela;
+    END IF;
+
+    SELECT array_agg(k) INTO v_invalidas
+    FROM jsonb_object_keys(p_dados) AS k
+    WHERE k <> ALL(v_editaveis);
+    IF v_invalidas IS NOT NULL THEN
+        RAISE EXCEPTION 'Colunas não editáveis em %: %', p_tabela, v_invalidas;
+    END IF;
+
+    EXECUTE format('SELECT to_jsonb(t) FROM %I t WHERE id = $1 FOR UPDATE', p_tabela)
+        INTO v_anterior USING p_id;
+    IF v_anterior IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    SELECT string_agg(format('%I = r.%I', k, k), ', ') INTO v_colunas
+    FROM jsonb_object_keys(p_dados) AS k;
+
+    EXECUTE format(
+        'UPDATE %I t SET %s FROM jsonb_populate_record(NULL::%I, $1) r WHERE t.id = $2 RETURNING to_jsonb(t)',
+        p_tabela, v_colunas, p_tabela)
+        INTO v_novo USING p_dados, p_id;
+
+    INSERT INTO logs_sistema (usuario_id, acao, tabela_afetada, registro_id, dados_anteriores, dados_novos)
+    VALUES (p_usuario_id, 'UPDATE', p_tabela, p_id, v_anterior, p_dados);
+
+    RETURN v_novo;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Exclusão atômica de notas (parcelas removidas por ON DELETE CASCADE), com um log
+-- por nota contendo a nota e suas parcelas. Retorna os ids efetivamente removidos
+CREATE OR REPLACE FUNCTION excluir_notas(p_ids INTEGER[], p_usuario_id INTEGER DEFAULT NULL)
+RETURNS INTEGER[] AS $$
+DECLARE
+    v_removidas INTEGER[];
+BEGIN
+    PERFORM 1 FROM notas WHERE id = ANY(p_ids) FOR UPDATE;
+
+    INSERT INTO logs_sistema (usuario_id, acao, tabela_afetada, registro_id, dados_anteriores, dados_novos)
+    SELECT p_usuario_id, 'DELETE', 'notas', n.id,
+           jsonb_build_object(
+               'nota', to_jsonb(n),
+               'parcelas', COALESCE(
+                   (SELECT jsonb_agg(to_jsonb(p) ORDER BY p.numero) FROM parcelas p WHERE p.nota_id = n.id),
+                   '[]'::jsonb)),
+           NULL
+    FROM notas n
+    WHERE n.id = ANY(p_ids);
+
+    WITH removidas AS (
+        DELETE FROM notas WHERE id = ANY(p_ids) RETURNING id
+    )
+    SELECT COALESCE(array_agg(id ORDER BY id), '{}') INTO v_removidas FROM removidas;
+
+    RETURN v_removidas;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Índice para a verificação de nota duplicada (número + fornecedor)
+CREATE INDEX IF NOT EXISTS idx_notas_numero_fornecedor ON notas(numero_nota, fornecedor);
+
+-- Criação atômica de uma nota com suas parcelas. Recusa (NOTA_DUPLICADA) se já
+-- existir nota com o mesmo número e fornecedor. Retorna a nota com a chave
+-- 'parcelas' contendo as parcelas criadas
+CREATE OR REPLACE FUNCTION criar_nota_com_parcelas(p_nota JSONB, p_parcelas JSONB)
+RETURNS JSONB AS $$
+DECLARE
+    v_nota notas;
+    v_parcelas JSONB;
+BEGIN
+    -- Serializa lançamentos simultâneos do mesmo número/fornecedor
+    PERFORM pg_advisory_xact_lock(hashtext((p_nota->>'numero_nota') || '|' || (p_nota->>'fornecedor')));
+
+    IF EXISTS (
+        SELECT 1 FROM notas
+        WHERE numero_nota = p_nota->>'numero_nota' AND fornecedor = p_nota->>'fornecedor'
+    ) THEN
+        RAISE EXCEPTION 'NOTA_DUPLICADA' USING ERRCODE = 'unique_violation';
+    END IF;
+
+    INSERT INTO notas (numero_nota, fornecedor, valor_total, data_emissao, descricao, local_aplicacao,
+                       status_material, eh_parcelada, num_parcelas, dias_ate_primeira, intervalo_dias)
+    SELECT numero_nota, fornecedor, valor_total, data_emissao, descricao, local_aplicacao,
+           status_material, COALESCE(eh_parcelada, FALSE), COALESCE(num_parcelas, 1),
+           COALESCE(dias_ate_primeira, 0), COALESCE(intervalo_dias, 30)
+    FROM jsonb_populate_record(NULL::notas, p_nota)
+    RETURNING * INTO v_nota;
+
+    WITH inseridas AS (
+        INSERT INTO parcelas (nota_id, numero, valor, data_vencimento, status, status_material)
+        SELECT v_nota.id, numero, valor, data_vencimento,
+               COALESCE(status, 'PENDENTE'), COALESCE(status_material, 'ESTOQUE')
+        FROM jsonb_populate_recordset(NULL::parcelas, p_parcelas)
+        RETURNING *
+    )
+    SELECT COALESCE(jsonb_agg(to_jsonb(i) ORDER BY i.numero), '[]'::jsonb) INTO v_parcelas FROM inseridas;
+
+    RETURN to_jsonb(v_nota) || jsonb_build_object('parcelas', v_parcelas);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Totais das parcelas por período de vencimento e status em [p_inicio, p_fim),
+-- incluindo períodos sem parcelas (zerados).
+-- p_granularidade: 'dia', 'semana', 'mes', 'trimestre' ou 'ano'
+CREATE OR REPLACE FUNCTION relatorio_periodo(p_inicio DATE, p_fim DATE, p_granularidade TEXT DEFAULT 'mes')
+RETURNS TABLE (periodo DATE, total_pago NUMERIC, total_pendente NUMERIC, total_vencido NUMERIC, quantidade BIGINT) AS $$
+    WITH unidade AS (
+        -- u: unidade de date_trunc; passo: intervalo entre períodos ('1 quarter' não é intervalo válido)
+        SELECT u, passo::interval AS passo
+        FROM (VALUES ('dia', 'day', '1 day'), ('semana', 'week', '1 week'), ('mes', 'month', '1 month'),
+                     ('trimestre', 'quarter', '3 months'), ('ano', 'year', '1 year')) AS g(granularidade, u, passo)
+        WHERE g.granularidade = p_granularidade
+    ),
+    periodos AS (
+        SELECT generate_series(
+            date_trunc(u, p_inicio::timestamp),
+            date_trunc(u, (p_fim - 1)::timestamp),
+            passo
+        )::date AS inicio_periodo
+        FROM unidade
+    ),
+    totais AS (
+        SELECT date_trunc(u, p.data_vencimento::timestamp)::date AS inicio_periodo,
+               SUM(p.valor) FILTER (WHERE p.status = 'PAGA') AS pago,
+               SUM(p.valor) FILTER (WHERE p.status = 'PENDENTE') AS pendente,
+               SUM(p.valor) FILTER (WHERE p.status = 'VENCIDA') AS vencido,
+               COUNT(*) AS qtd
+        FROM parcelas p, unidade
+        WHERE p.data_vencimento >= p_inicio AND p.data_vencimento < p_fim
+        GROUP BY 1
+    )
+    SELECT pr.inicio_periodo, COALESCE(t.pago, 0), COALESCE(t.pendente, 0), COALESCE(t.vencido, 0), COALESCE(t.qtd, 0)
+    FROM periodos pr
+    LEFT JOIN totais t ON t.inicio_periodo = pr.inicio_periodo
+    ORDER BY pr.inicio_periodo;
+$$ LANGUAGE sql STABLE;
+
+-- Totais das parcelas com vencimento em [p_inicio, p_fim) por status, agrupados por
+-- p_agrupamento: 'status', 'local' (id do local), 'fornecedor' ou 'status_material'
+CREATE OR REPLACE FUNCTION relatorio_totais(p_inicio DATE, p_fim DATE, p_agrupamento TEXT DEFAULT 'status')
+RETURNS TABLE (chave TEXT, status TEXT, total NUMERIC, quantidade BIGINT) AS $$
+    SELECT CASE p_agrupamento
+               WHEN 'status' THEN p.status
+               WHEN 'local' THEN n.local_aplicacao::TEXT
+               WHEN 'fornecedor' THEN n.fornecedor
+               WHEN 'status_material' THEN p.status_material
+           END,
+           p.status::TEXT,
+           SUM(p.valor),
+           COUNT(*)
+    FROM parcelas p
+    JOIN notas n ON n.id = p.nota_id
+    WHERE p.data_vencimento >= p_inicio AND p.data_vencimento < p_fim
+    GROUP BY 1, 2
+    ORDER BY 1, 2;
+$$ LANGUAGE sql STABLE;
+
+-- Detalhamento do relatório: parcelas com vencimento em [p_inicio, p_fim) e os dados
+-- da nota, com filtros opcionais (NULL = todos), paginadas por keyset (id > p_apos_id)
+CREATE OR REPLACE FUNCTION relatorio_parcelas(
+    p_inicio DATE, p_fim DATE, p_status TEXT DEFAULT NULL, p_fornecedor TEXT DEFAULT NULL,
+    p_local INTEGER DEFAULT NULL, p_apos_id INTEGER DEFAULT NULL, p_limite INTEGER DEFAULT 50)
+RETURNS TABLE (id INTEGER, numero INTEGER, valor NUMERIC, data_vencimento DATE, status TEXT,
+               numero_nota TEXT, fornecedor TEXT, local_aplicacao INTEGER, status_material TEXT) AS $$
+    SELECT p.id, p.numero, p.valor, p.data_vencimento, p.status::TEXT,
+           n.numero_nota::TEXT, n.fornecedor::TEXT, n.local_aplicacao, n.status_material::TEXT
+    FROM parcelas p
+    JOIN notas n ON n.id = p.nota_id
+    WHERE p.data_vencimento >= p_inicio AND p.data_vencimento < p_fim
+      AND (p_status IS NULL OR p.status = p_status)
+      AND (p_fornecedor IS NULL OR n.fornecedor = p_fornecedor)
+      AND (p_local IS NULL OR n.local_aplicacao = p_local)
+      AND (p_apos_id IS NULL OR p.id > p_apos_id)
+    ORDER BY p.id
+    LIMIT p_limite;
+$$ LANGUAGE sql STABLE;
+
+-- Totais por status das parcelas que atendem aos mesmos filtros de relatorio_parcelas
+CREATE OR REPLACE FUNCTION relatorio_parcelas_resumo(
+    p_inicio DATE, p_fim DATE, p_status TEXT DEFAULT NULL, p_fornecedor TEXT DEFAULT NULL,
+    p_local INTEGER DEFAULT NULL)
+RETURNS TABLE (status TEXT, total NUMERIC, quantidade BIGINT) AS $$
+    SELECT p.status::TEXT, SUM(p.valor), COUNT(*)
+    FROM parcelas p
+    JOIN notas n ON n.id = p.nota_id
+    WHERE p.data_vencimento >= p_inicio AND p.data_vencimento < p_fim
+      AND (p_status IS NULL OR p.status = p_status)
+      AND (p_fornecedor IS NULL OR n.fornecedor = p_fornecedor)
+      AND (p_local IS NULL OR n.local_aplicacao = p_local)
+    GROUP BY 1
+    ORDER BY 1;
+$$ LANGUAGE sql STABLE;
+
+-- Resumo de Visualizar Notas sem a réplica local: total e quantidade por status das
+-- parcelas das notas que atendem aos filtros da listagem (mesma regra de vw_notas_listagem).
+-- Com p_material, apenas as parcelas com esse status do material
+CREATE OR REPLACE FUNCTION resumo_parcelas_notas(
+    p_fornecedor TEXT DEFAULT NULL, p_local INTEGER DEFAULT NULL, p_status_material TEXT DEFAULT NULL,
+    p_material TEXT DEFAULT NULL, p_status_parcela TEXT DEFAULT NULL)
+RETURNS TABLE (status TEXT, total NUMERIC, quantidade BIGINT) AS $$
+    SELECT p.status::TEXT, SUM(p.valor), COUNT(*)
+    FROM parcelas p
+    JOIN vw_notas_listagem n ON n.id = p.nota_id
+    WHERE (p_fornecedor IS NULL OR n.fornecedor = p_fornecedor)
+      AND (p_local IS NULL OR n.local_aplicacao = p_local)
+      AND (p_status_material IS NULL OR n.status_material = p_status_material)
+      AND (p_material IS NULL OR (p.status_material = p_material AND CASE p_material
+               WHEN 'ESTOQUE' THEN n.material_estoque
+               WHEN 'EM_USO' THEN n.material_em_uso
+           END))
+      AND (p_status_parcela IS NULL OR CASE p_status_parcela
+               WHEN 'PENDENTE' THEN n.parcela_pendente
+               WHEN 'PAGA' THEN n.parcela_paga
+               WHEN 'VENCIDA' THEN n.parcela_vencida
+           END)
+    GROUP BY 1
+    ORDER BY 1;
+$$ LANGUAGE sql STABLE;
+
+-- Fornecedores distintos presentes nas notas (inclui nomes fora do cadastro de fornecedores)
+CREATE OR REPLACE FUNCTION fornecedores_notas()
+RETURNS TABLE (fornecedor TEXT) AS $$
+    SELECT DISTINCT n.fornecedor::TEXT FROM notas n ORDER BY 1;
+$$ LANGUAGE sql STABLE;
+
+-- Indicadores do dashboard em uma tabela de uma única linha, mantida pelos gatilhos
+-- abaixo a cada escrita em notas/parcelas: a leitura não depende do volume de dados.
+-- Os gatilhos são por comando (FOR EACH STATEMENT, com tabelas de transição): cada
+-- comando aplica um único delta agregado, qualquer que seja o número de linhas, e só
+-- atualiza a linha de kpis_resumo (e disputa o seu bloqueio) se os indicadores mudam
+CREATE TABLE IF NOT EXISTS kpis_resumo (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    total_notas BIGINT NOT NULL DEFAULT 0,
+    valor_total NUMERIC(15,2) NOT NULL DEFAULT 0,
+    total_parcelas BIGINT NOT NULL DEFAULT 0,
+    parcelas_pagas BIGINT NOT NULL DEFAULT 0,
+    parcelas_pendentes BIGINT NOT NULL DEFAULT 0,
+    parcelas_vencidas BIGINT NOT NULL DEFAULT 0,
+    valor_pago NUMERIC(15,2) NOT NULL DEFAULT 0,
+    valor_pendente NUMERIC(15,2) NOT NULL DEFAULT 0,
+    valor_vencido NUMERIC(15,2) NOT NULL DEFAULT 0,
+    atualizado_em TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+DROP TRIGGER IF EXISTS trigger_kpis_parcelas ON parcelas;
+DROP TRIGGER IF EXISTS trigger_kpis_parcelas_update ON parcelas;
+DROP TRIGGER IF EXISTS trigger_kpis_notas ON notas;
+DROP FUNCTION IF EXISTS kpis_aplicar_parcela(TEXT, NUMERIC, INTEGER);
+
+-- Soma aos indicadores o delta agregado de um comando sobre parcelas.
+-- p_delta: [{"status": "PAGA", "quantidade": 2, "valor": 150.00}, ...] (negativos subtraem);
+-- NULL (nenhuma linha alterada) não atualiza kpis_resumo
+CREATE OR REPLACE FUNCTION kpis_aplicar_parcelas(p_delta JSONB)
+RETURNS VOID AS $$
+    UPDATE kpis_resumo SET
+        total_parcelas = total_parcelas + d.quantidade,
+        parcelas_pagas = parcelas_pagas + d.pagas,
+        parcelas_pendentes = parcelas_pendentes + d.pendentes,
+        parcelas_vencidas = parcelas_vencidas + d.vencidas,
+        valor_pago = valor_pago + d.valor_pago,
+        valor_pendente = valor_pendente + d.valor_pendente,
+        valor_vencido = valor_vencido + d.valor_vencido,
+        atualizado_em = NOW()
+    FROM (
+        SELECT COALESCE(SUM(quantidade), 0) AS quantidade,
+               COALESCE(SUM(quantidade) FILTER (WHERE status = 'PAGA'), 0) AS pagas,
+               COALESCE(SUM(quantidade) FILTER (WHERE status = 'PENDENTE'), 0) AS pendentes,
+               COALESCE(SUM(quantidade) FILTER (WHERE status = 'VENCIDA'), 0) AS vencidas,
+               COALESCE(SUM(valor) FILTER (WHERE status = 'PAGA'), 0) AS valor_pago,
+               COALESCE(SUM(valor) FILTER (WHERE status = 'PENDENTE'), 0) AS valor_pendente,
+               COALESCE(SUM(valor) FILTER (WHERE status = 'VENCIDA'), 0) AS valor_vencido
+        FROM jsonb_to_recordset(p_delta) AS x(status TEXT, quantidade BIGINT, valor NUMERIC)
+    ) d
+    WHERE kpis_resumo.id = 1 AND p_delta IS NOT NULL;
+$$ LANGUAGE sql;
+
+-- Delta do comando por status: as linhas incluídas somam e as excluídas subtraem. Nas
+-- atualizações entram só as linhas cujo status ou valor mudou, comparando a linha final
+-- (inclusive o status ajustado por normalizar_status_parcela) com a anterior
+CREATE OR REPLACE FUNCTION kpis_parcelas_gatilho()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM kpis_aplicar_parcelas(jsonb_agg(d)) FROM (
+            SELECT status, COUNT(*) AS quantidade, SUM(COALESCE(valor, 0)) AS valor
+            FROM novas GROUP BY status
+        ) d;
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM kpis_aplicar_parcelas(jsonb_agg(d)) FROM (
+            SELECT status, -COUNT(*) AS quantidade, -SUM(COALESCE(valor, 0)) AS valor
+            FROM antigas GROUP BY status
+        ) d;
+    ELSE
+        PERFORM kpis_aplicar_parcelas(jsonb_agg(d)) FROM (
+            SELECT status, SUM(sinal) AS quantidade, SUM(sinal * COALESCE(valor, 0)) AS valor
+            FROM (
+                SELECT n.status, n.valor, 1 AS sinal
+                FROM novas n JOIN antigas a ON a.id = n.id
+                WHERE a.status IS DISTINCT FROM n.status OR a.valor IS DISTINCT FROM n.valor
+                UNION ALL
+                SELECT a.status, a.valor, -1 AS sinal
+                FROM antigas a JOIN novas n ON n.id = a.id
+                WHERE a.status IS DISTINCT FROM n.status OR a.valor IS DISTINCT FROM n.valor
+            ) alteradas
+            GROUP BY status
+        ) d;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION kpis_notas_gatilho()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_notas BIGINT;
+    v_valor NUMERIC;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT COUNT(*), COALESCE(SUM(valor_total), 0) INTO v_notas, v_valor FROM novas;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT -COUNT(*), -COALESCE(SUM(valor_total), 0) INTO v_notas, v_valor FROM antigas;
+    ELSE
+        SELECT 0, COALESCE(SUM(COALESCE(n.valor_total, 0) - COALESCE(a.valor_total, 0)), 0)
+        INTO v_notas, v_valor
+        FROM novas n JOIN antigas a ON a.id = n.id
+        WHERE a.valor_total IS DISTINCT FROM n.valor_total;
+    END IF;
+    IF v_notas <> 0 OR v_valor <> 0 THEN
+        UPDATE kpis_resumo SET
+            total_notas = total_notas + v_notas,
+            valor_total = valor_total + v_valor,
+            atualizado_em = NOW()
+        WHERE id = 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Tabelas de transição exigem um gatilho por evento (e não aceitam UPDATE OF colunas:
+-- as atualizações que não mudam os indicadores são descartadas pela função)
+DROP TRIGGER IF EXISTS trigger_kpis_parcelas_insert ON parcelas;
+CREATE TRIGGER trigger_kpis_parcelas_insert
+    AFTER INSERT ON parcelas REFERENCING NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION kpis_parcelas_gatilho();
+
+DROP TRIGGER IF EXISTS trigger_kpis_parcelas_delete ON parcelas;
+CREATE TRIGGER trigger_kpis_parcelas_delete
+    AFTER DELETE ON parcelas REFERENCING OLD TABLE AS antigas
+    FOR EACH STATEMENT EXECUTE FUNCTION kpis_parcelas_gatilho();
+
+DROP TRIGGER IF EXISTS trigger_kpis_parcelas_update ON parcelas;
+CREATE TRIGGER trigger_kpis_parcelas_update
+    AFTER UPDATE ON parcelas REFERENCING OLD TABLE AS antigas NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION kpis_parcelas_gatilho();
+
+DROP TRIGGER IF EXISTS trigger_kpis_notas_insert ON notas;
+CREATE TRIGGER trigger_kpis_notas_insert
+    AFTER INSERT ON notas REFERENCING NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION kpis_notas_gatilho();
+
+DROP TRIGGER IF EXISTS trigger_kpis_notas_delete ON notas;
+CREATE TRIGGER trigger_kpis_notas_delete
+    AFTER DELETE ON notas REFERENCING OLD TABLE AS antigas
+    FOR EACH STATEMENT EXECUTE FUNCTION kpis_notas_gatilho();
+
+DROP TRIGGER IF EXISTS trigger_kpis_notas_update ON notas;
+CREATE TRIGGER trigger_kpis_notas_update
+    AFTER UPDATE ON notas REFERENCING OLD TABLE AS antigas NEW TABLE AS novas
+    FOR EACH STATEMENT EXECUTE FUNCTION kpis_notas_gatilho();
+
+-- Recalcula os indicadores a partir das tabelas (carga inicial ou conferência periódica,
+-- ex.: SELECT cron.schedule('0 3 * * *', 'SELECT recalcular_kpis()') com pg_cron)
+CREATE OR REPLACE FUNCTION recalcular_kpis()
+RETURNS VOID AS $$
+BEGIN
+    LOCK TABLE kpis_resumo IN EXCLUSIVE MODE;
+    INSERT INTO kpis_resumo (id) VALUES (1) ON CONFLICT (id) DO NOTHING;
+    UPDATE kpis_resumo SET
+        total_notas = n.total_notas,
+        valor_total = n.valor_total,
+        total_parcelas = p.total_parcelas,
+        parcelas_pagas = p.parcelas_pagas,
+        parcelas_pendentes = p.parcelas_pendentes,
+        parcelas_vencidas = p.parcelas_vencidas,
+        valor_pago = p.valor_pago,
+        valor_pendente = p.valor_pendente,
+        valor_vencido = p.valor_vencido,
+        atualizado_em = NOW()
+    FROM (SELECT COUNT(*) AS total_notas, COALESCE(SUM(valor_total), 0) AS valor_total FROM notas) n,
+         (SELECT COUNT(*) AS total_parcelas,
+                 COUNT(*) FILTER (WHERE status = 'PAGA') AS parcelas_pagas,
+                 COUNT(*) FILTER (WHERE status = 'PENDENTE') AS parcelas_pendentes,
+                 COUNT(*) FILTER (WHERE status = 'VENCIDA') AS parcelas_vencidas,
+                 COALESCE(SUM(valor) FILTER (WHERE status = 'PAGA'), 0) AS valor_pago,
+                 COALESCE(SUM(valor) FILTER (WHERE status = 'PENDENTE'), 0) AS valor_pendente,
+                 COALESCE(SUM(valor) FILTER (WHERE status = 'VENCIDA'), 0) AS valor_vencido
+          FROM parcelas) p
+    WHERE kpis_resumo.id = 1;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Carga inicial (a partir daqui os gatilhos mantêm os valores)
+INSERT INTO kpis_resumo (id, total_notas, valor_total, total_parcelas, parcelas_pagas, parcelas_pendentes,
+                         parcelas_vencidas, valor_pago, valor_pendente, valor_vencido)
+SELECT 1,
+       (SELECT COUNT(*) FROM notas),
+       (SELECT COALESCE(SUM(valor_total), 0) FROM notas),
+       (SELECT COUNT(*) FROM parcelas),
+       (SELECT COUNT(*) FROM parcelas WHERE status = 'PAGA'),
+       (SELECT COUNT(*) FROM parcelas WHERE status = 'PENDENTE'),
+       (SELECT COUNT(*) FROM parcelas WHERE status = 'VENCIDA'),
+       (SELECT COALESCE(SUM(valor), 0) FROM parcelas WHERE status = 'PAGA'),
+       (SELECT COALESCE(SUM(valor), 0) FROM parcelas WHERE status = 'PENDENTE'),
+       (SELECT COALESCE(SUM(valor), 0) FROM parcelas WHERE status = 'VENCIDA')
+WHERE NOT EXISTS (SELECT 1 FROM kpis_resumo);
+
+-- Filtro de notas por status das parcelas (colunas parcela_* de vw_notas_listagem)
+CREATE INDEX IF NOT EXISTS idx_parcelas_nota_status ON parcelas(nota_id, status);
+
+-- Status de parcelas não pagas coerente com o vencimento já na gravação: parcelas
+-- criadas, reabertas ou com vencimento alterado ficam VENCIDA ou PENDENTE conforme a data.
+-- A passagem do tempo é tratada por atualizar_status_parcelas_vencidas(), chamada
+-- diariamente pelo agendador do app (agendador.py)
+CREATE OR REPLACE FUNCTION normalizar_status_parcela()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.status IN ('PENDENTE', 'VENCIDA') THEN
+        NEW.status := CASE WHEN NEW.data_vencimento < CURRENT_DATE THEN 'VENCIDA' ELSE 'PENDENTE' END;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_normalizar_status_parcela ON parcelas;
+CREATE TRIGGER trigger_normalizar_status_parcela
+    BEFORE INSERT OR UPDATE OF status, data_vencimento ON parcelas
+    FOR EACH ROW EXECUTE FUNCTION normalizar_status_parcela();
+
+-- Liderança das tarefas agendadas: apenas o processo que detém a concessão (lease)
+-- de uma tarefa a executa; a concessão expira se o processo parar de renová-la
+CREATE TABLE IF NOT EXISTS agendador_lider (
+    nome VARCHAR(100) PRIMARY KEY,
+    dono VARCHAR(255) NOT NULL,
+    expira_em TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+-- Adquire ou renova a concessão; retorna TRUE se p_dono é o líder de p_nome
+CREATE OR REPLACE FUNCTION adquirir_lideranca(p_nome TEXT, p_dono TEXT, p_segundos INTEGER)
+RETURNS BOOLEAN AS $$
+DECLARE
+    v_dono TEXT;
+BEGIN
+    INSERT INTO agendador_lider (nome, dono, expira_em)
+    VALUES (p_nome, p_dono, NOW() + make_interval(secs => p_segundos))
+    ON CONFLICT (nome) DO UPDATE
+        SET dono = EXCLUDED.dono, expira_em = EXCLUDED.expira_em
+        WHERE agendador_lider.dono = EXCLUDED.dono OR agendador_lider.expira_em < NOW()
+    RETURNING dono INTO v_dono;
+    RETURN v_dono IS NOT NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Sincronização incremental (ReplicaLocal, sincronizacao.py): updated_at mantido por
+-- gatilho e registro das exclusões (tombstones) de notas, parcelas e fornecedores.
+-- Ambos usam clock_timestamp() (momento da escrita) e não NOW() (início da transação):
+-- assim o atraso entre o carimbo e o commit fica limitado à duração do comando que
+-- escreveu a linha, e não à da transação inteira (ver alteracoes_desde)
+ALTER TABLE notas ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW();
+ALTER TABLE parcelas ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW();
+ALTER TABLE fornecedores ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW();
+
+CREATE INDEX IF NOT EXISTS idx_notas_updated_at ON notas(updated_at);
+CREATE INDEX IF NOT EXISTS idx_parcelas_updated_at ON parcelas(updated_at);
+CREATE INDEX IF NOT EXISTS idx_fornecedores_updated_at ON fornecedores(updated_at);
+
+CREATE OR REPLACE FUNCTION definir_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at := clock_timestamp();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_updated_at_notas ON notas;
+CREATE TRIGGER trigger_updated_at_notas
+    BEFORE INSERT OR UPDATE ON notas
+    FOR EACH ROW EXECUTE FUNCTION definir_updated_at();
+
+DROP TRIGGER IF EXISTS trigger_updated_at_parcelas ON parcelas;
+CREATE TRIGGER trigger_updated_at_parcelas
+    BEFORE INSERT OR UPDATE ON parcelas
+    FOR EACH ROW EXECUTE FUNCTION definir_updated_at();
+
+DROP TRIGGER IF EXISTS trigger_updated_at_fornecedores ON fornecedores;
+CREATE TRIGGER trigger_updated_at_fornecedores
+    BEFORE INSERT OR UPDATE ON fornecedores
+    FOR EACH ROW EXECUTE FUNCTION definir_updated_at();
+
+-- Exclusões, inclusive as em cascata (parcelas de notas excluídas)
+CREATE TABLE IF NOT EXISTS registros_excluidos (
+    id BIGSERIAL PRIMARY KEY,
+    tabela VARCHAR(50) NOT NULL,
+    registro_id INTEGER NOT NULL,
+    excluido_em TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_registros_excluidos_em ON registros_excluidos(excluido_em);
+
+CREATE OR REPLACE FUNCTION registrar_exclusoes()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO registros_excluidos (tabela, registro_id, excluido_em)
+    SELECT TG_TABLE_NAME, id, clock_timestamp() FROM excluidos;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_exclusoes_notas ON notas;
+CREATE TRIGGER trigger_exclusoes_notas
+    AFTER DELETE ON notas REFERENCING OLD TABLE AS excluidos
+    FOR EACH STATEMENT EXECUTE FUNCTION registrar_exclusoes();
+
+DROP TRIGGER IF EXISTS trigger_exclusoes_parcelas ON parcelas;
+CREATE TRIGGER trigger_exclusoes_parcelas
+    AFTER DELETE ON parcelas REFERENCING OLD TABLE AS excluidos
+    FOR EACH STATEMENT EXECUTE FUNCTION registrar_exclusoes();
+
+DROP TRIGGER IF EXISTS trigger_exclusoes_fornecedores ON fornecedores;
+CREATE TRIGGER trigger_exclusoes_fornecedores
+    AFTER DELETE ON fornecedores REFERENCING OLD TABLE AS excluidos
+    FOR EACH STATEMENT EXECUTE FUNCTION registrar_exclusoes();
+
+-- Alterações posteriores a p_desde, em uma única requisição.
+-- p_colunas: {"notas": ["id", "numero_nota", ...], "parcelas": [...]} (colunas de cada tabela)
+-- Retorna {"cursor", "completo", "exclusoes": [{"tabela", "registro_id"}], "<tabela>": [linhas]}.
+-- Sem p_desde, ou com p_desde além da retenção dos registros de exclusão (30 dias), as
+-- tabelas vêm completas (completo = true).
+-- O cursor fica 5 minutos atrás do relógio do banco para alcançar linhas de transações
+-- ainda não confirmadas. Garantia: uma alteração só é perdida se entre a escrita da linha
+-- (updated_at/excluido_em) e o commit passarem mais de 5 minutos. As escritas do app são
+-- requisições únicas ao PostgREST, limitadas pelo statement_timeout dos papéis da API
+-- (segundos no Supabase); processos que escrevam direto no banco precisam de
+-- statement_timeout/idle_in_transaction_session_timeout abaixo dessa margem. As linhas
+-- da margem voltam em toda sincronização e a réplica ignora as que não mudaram.
+CREATE OR REPLACE FUNCTION alteracoes_desde(p_desde TIMESTAMP WITH TIME ZONE, p_colunas JSONB)
+RETURNS JSONB AS $$
+DECLARE
+    v_completo BOOLEAN := p_desde IS NULL OR p_desde < NOW() - INTERVAL '30 days';
+    v_resultado JSONB;
+    v_tabela TEXT;
+    v_colunas TEXT;
+    v_linhas JSONB;
+BEGIN
+    v_resultado := jsonb_build_object(
+        'cursor', clock_timestamp() - INTERVAL '5 minutes',
+        'completo', v_completo,
+        'exclusoes', '[]'::JSONB
+    );
+
+    FOR v_tabela IN SELECT jsonb_object_keys(p_colunas) LOOP
+        IF v_tabela NOT IN ('notas', 'parcelas', 'fornecedores') THEN
+            RAISE EXCEPTION 'Tabela sem sincronização: %', v_tabela;
+        END IF;
+        SELECT string_agg(quote_ident(c), ', ') INTO v_colunas
+        FROM jsonb_array_elements_text(p_colunas -> v_tabela) c;
+        EXECUTE format(
+            'SELECT COALESCE(jsonb_agg(to_jsonb(t)), ''[]'') FROM (SELECT %s FROM %I WHERE $1 OR updated_at > $2) t',
+            v_colunas, v_tabela
+        ) INTO v_linhas USING v_completo, p_desde;
+        v_resultado := v_resultado || jsonb_build_object(v_tabela, v_linhas);
+    END LOOP;
+
+    IF NOT v_completo THEN
+        v_resultado := v_resultado || jsonb_build_object('exclusoes', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object('tabela', tabela, 'registro_id', registro_id))
+            FROM registros_excluidos
+            WHERE excluido_em > p_desde AND p_colunas ? tabela
+        ), '[]'::JSONB));
+    END IF;
+
+    RETURN v_resultado;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Descarta registros de exclusão fora da retenção (chamada pela manutenção diária do app)
+CREATE OR REPLACE FUNCTION limpar_exclusoes()
+RETURNS VOID AS $$
+BEGIN
+    DELETE FROM registros_excluidos WHERE excluido_em < NOW() - INTERVAL '30 days';
+END;
+$$ LANGUAGE plpgsql;
+
+-- Notificações de alteração (Supabase Realtime) que invalidam os caches dos processos
+-- do app (notificacoes.py): as tabelas precisam estar na publicação supabase_realtime
+DO $$
+DECLARE
+    v_tabela TEXT;
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_publication WHERE pubname = 'supabase_realtime') THEN
+        FOREACH v_tabela IN ARRAY ARRAY['notas', 'parcelas', 'fornecedores', 'locais_aplicacao'] LOOP
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_publication_tables
+                WHERE pubname = 'supabase_realtime' AND schemaname = 'public' AND tablename = v_tabela
+            ) THEN
+                EXECUTE format('ALTER PUBLICATION supabase_realtime ADD TABLE public.%I', v_tabela);
+            END IF;
+        END LOOP;
+    END IF;
+END;
+$$;
@@ -0,0 +1,184 @@
+"""Réplica em memória de tabelas, mantida por sincronização incremental.
+
+Em vez de baixar as tabelas inteiras a cada rerun, a `ReplicaLocal` guarda as
+linhas (apenas as colunas configuradas) e, por tabela, o cursor da última
+sincronização. Cada sincronização chama a função alteracoes_desde
+(setup_otimizacoes.sql), que devolve em uma única requisição só as linhas com
+updated_at posterior ao cursor e os registros de exclusão (tombstones) do
+período. O cursor fica alguns minutos atrás do relógio do banco, para alcançar
+transações confirmadas depois (ver a garantia em alteracoes_desde); com os dados
+inalterados a resposta traz só as linhas dessa margem.
+
+Entre sincronizações as leituras são servidas da memória. Escritas feitas pelo
+próprio processo (métodos com @invalida) marcam as tabelas para sincronizar na
+próxima leitura, que espera a sincronização; alterações de outros processos
+aparecem em até `intervalo` segundos, sincronizadas em segundo plano enquanto as
+leituras seguem com as linhas atuais. Há uma busca por vez, feita fora do lock
+das linhas: leituras concorrentes esperam a busca em andamento em vez de repeti-la.
+"""
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class ReplicaLocal:
+    """Linhas de `colunas` ({tabela: [colunas]}) sincronizadas por `buscar_alteracoes(cursor, colunas)`"""
+
+    def __init__(self, buscar_alteracoes: Callable[[Optional[str], Dict[str, List[str]]], Dict],
+                 colunas: Dict[str, Sequence[str]], intervalo: float = 30.0):
+        self.buscar_alteracoes = buscar_alteracoes
+        self.colunas = {tabela: list(lista) for tabela, lista in colunas.items()}
+        self.intervalo = intervalo
+        self._linhas: Dict[str, Dict[int, Dict]] = {tabela: {} for tabela in self.colunas}
+        self._cursores: Dict[str, Optional[str]] = {tabela: None for tabela in self.colunas}
+        self._sincronizado_em: Dict[str, float] = {}
+        self._pendentes = set(self.colunas)
+        self._lock = threading.RLock()
+        # Uma busca por vez (liberado pela thread que fez a busca, inclusive em segundo plano)
+        self._busca = threading.Lock()
+        # Muda a cada clear(): buscas iniciadas antes são descartadas
+        self._geracao = 0
+        # Versão de cada tabela e a lista ordenada por id montada para ela
+        self._versoes_tabela: Dict[str, int] = {tabela: 0 for tabela in self.colunas}
+        self._ordenadas: Dict[str, Tuple[int, List[Dict]]] = {}
+        # Muda a cada sincronização que altera linhas (permite guardar dados derivados)
+        self.versao = 0
+
+    def cobre(self, tabela: str, colunas: str) -> bool:
+        """A réplica guarda todas as colunas pedidas (select '*' sempre vai ao banco)"""
+        if tabela not in self.colunas or colunas.strip() == '*':
+            return False
+        return {c.strip() for c in colunas.split(',')} <= set(self.colunas[tabela])
+
+    def linhas(self, *tabelas: str) -> Optional[Dict[str, List[Dict]]]:
+        """Linhas atuais de cada tabela em ordem de id, sincronizando antes se preciso.
+
+        Retorna None se alguma das tabelas nunca pôde ser sincronizada. As listas e
+        as linhas são compartilhadas entre as leituras e não devem ser alteradas.
+        """
+        resultado = self.linhas_versionadas(*tabelas)
+        return resultado[1] if resultado is not None else None
+
+    def linhas_versionadas(self, *tabelas: str) -> Optional[Tuple[int, Dict[str, List[Dict]]]]:
+        """Como `linhas`, acompanhadas da versão da réplica a que correspondem"""
+        if self.versao_atual(*tabelas) is None:
+            return None
+        with self._lock:
+            if any(self._cursores[tabela] is None for tabela in tabelas):
+                return None
+            return self.versao, {tabela: self._ordenadas_de(tabela) for tabela in tabelas}
+
+    def _ordenadas_de(self, tabela: str) -> List[Dict]:
+        # A lista ordenada só é remontada quando a tabela muda
+        versao = self._versoes_tabela[tabela]
+        ordenadas = self._ordenadas.get(tabela)
+        if ordenadas is None or ordenadas[0] != versao:
+            ordenadas = (versao, [linha for _, linha in sorted(self._linhas[tabela].items())])
+            self._ordenadas[tabela] = ordenadas
+        return ordenadas[1]
+
+    def versao_atual(self, *tabelas: str) -> Optional[int]:
+        """Sincroniza as tabelas se preciso e retorna a versão (None se alguma nunca pôde ser sincronizada).
+
+        Tabelas nunca sincronizadas ou com escritas deste processo são sincronizadas antes
+        de retornar; as que apenas passaram do intervalo, em segundo plano.
+        """
+        urgentes, vencidas = self._a_sincronizar(tabelas)
+        if urgentes:
+            with self._busca:
+                # Outra leitura pode ter sincronizado as tabelas enquanto esta esperava
+                urgentes, vencidas = self._a_sincronizar(tabelas)
+                self._sincronizar_tabelas(urgentes + vencidas)
+        elif vencidas and self._busca.acquire(blocking=False):
+            try:
+                threading.Thread(target=self._sincronizar_em_segundo_plano, args=(vencidas,), daemon=True).start()
+            except Exception:
+                self._busca.release()
+                raise
+        with self._lock:
+            if any(self._cursores[tabela] is None for tabela in tabelas):
+                return None
+            return self.versao
+
+    def _a_sincronizar(self, tabelas: Sequence[str]) -> Tuple[List[str], List[str]]:
+        """Tabelas a sincronizar antes de retornar e tabelas que passaram do intervalo"""
+        with self._lock:
+            agora = time.monotonic()
+            urgentes = [tabela for tabela in tabelas
+                        if tabela in self._pendentes or self._cursores[tabela] is None]
+            vencidas = [tabela for tabela in tabelas if tabela not in urgentes
+                        and agora - self._sincronizado_em.get(tabela, agora) > self.intervalo]
+        return urgentes, vencidas
+
+    def _sincronizar_em_segundo_plano(self, tabelas: List[str]):
+        try:
+            self._sincronizar_tabelas(tabelas)
+        finally:
+            self._busca.release()
+
+    def _sincronizar_tabelas(self, tabelas: List[str]):
+        # Tabelas com o mesmo cursor são sincronizadas na mesma requisição
+        with self._lock:
+            grupos: Dict[Optional[str], List[str]] = {}
+            for tabela in tabelas:
+                grupos.setdefault(self._cursores[tabela], []).append(tabela)
+        for cursor, grupo in grupos.items():
+            self._sincronizar(cursor, grupo)
+
+    def _sincronizar(self, cursor: Optional[str], tabelas: List[str]):
+        with self._lock:
+            # Escritas durante a busca marcam a tabela de novo (ver invalidate)
+            self._pendentes.difference_update(tabelas)
+            geracao = self._geracao
+        try:
+            # Fora do lock: enquanto isso as leituras seguem servidas da memória
+            dados = self.buscar_alteracoes(cursor, {tabela: self.colunas[tabela] for tabela in tabelas})
+            novo_cursor = dados['cursor']
+        except Exception as e:
+            print(f"Erro ao sincronizar {', '.join(tabelas)}: {e}")
+            self._pendentes.update(tabelas)
+            return
+
+        with self._lock:
+            if self._geracao != geracao:
+                # clear() durante a busca: as tabelas já estão marcadas para sincronizar de novo
+                return
+            alteradas = set(tabelas) if dados.get('completo') else set()
+            for tabela in tabelas:
+                if dados.get('completo'):
+                    self._linhas[tabela] = {}
+                destino = self._linhas[tabela]
+                # Linhas novas substituem as antigas (as já entregues às leituras não mudam);
+                # as que voltam inalteradas (margem do cursor) não mudam a versão
+                for linha in dados.get(tabela) or []:
+                    if destino.get(linha['id']) != linha:
+                        destino[linha['id']] = linha
+                        alteradas.add(tabela)
+            for exclusao in dados.get('exclusoes') or []:
+                if exclusao['tabela'] in tabelas:
+                    if self._linhas[exclusao['tabela']].pop(exclusao['registro_id'], None) is not None:
+                        alteradas.add(exclusao['tabela'])
+            if alteradas:
+                self.versao += 1
+                for tabela in alteradas:
+                    self._versoes_tabela[tabela] += 1
+
+            agora = time.monotonic()
+            for tabela in tabelas:
+                self._cursores[tabela] = novo_cursor
+                self._sincronizado_em[tabela] = agora
+
+    def invalidate(self, *tabelas: str):
+        """Sincroniza as tabelas na próxima leitura (mesma interface de QueryCache)"""
+        self._pendentes.update(tabela for tabela in tabelas if tabela in self.colunas)
+
+    def clear(self):
+        """Descarta as linhas e os cursores (a próxima leitura baixa as tabelas completas)"""
+        with self._lock:
+            self._linhas = {tabela: {} for tabela in self.colunas}
+            self._cursores = {tabela: None for tabela in self.colunas}
+            self._sincronizado_em.clear()
+            self._pendentes = set(self.colunas)
+            self._ordenadas.clear()
+            self._geracao += 1
+            self.versao += 1
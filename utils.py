@@ -1,6 +1,6 @@
 from datetime import datetime, date, timedelta
 from typing import List, Dict
-import streamlit as st
+import re
 
 def calcular_parcelas(valor_total: float, num_parcelas: int, dias_ate_primeira: int, intervalo_dias: int, data_emissao: date = None) -> List[Dict]:
     """Calcula as parcelas baseado nos parâmetros fornecidos"""
@@ -51,6 +51,36 @@ def validar_formato_valor(valor_str: str) -> bool:
     except:
         return False
 
+def formatar_cnpj(cnpj):
+    """Aplica máscara de CNPJ: 00.000.000/0000-00"""
+    if not cnpj:
+        return ""
+    
+    # Remove tudo que não é dígito
+    cnpj_limpo = re.sub(r'\D', '', cnpj)
+    
+    # Limita a 14 dígitos
+    cnpj_limpo = cnpj_limpo[:14]
+    
+    # Aplica a máscara progressivamente
+    if len(cnpj_limpo) == 0:
+        return ""
+    elif len(cnpj_limpo) <= 2:
+        return cnpj_limpo
+    elif len(cnpj_limpo) <= 5:
+        return f"{cnpj_limpo[:2]}.{cnpj_limpo[2:]}"
+    elif len(cnpj_limpo) <= 8:
+        return f"{cnpj_limpo[:2]}.{cnpj_limpo[2:5]}.{cnpj_limpo[5:]}"
+    elif len(cnpj_limpo) <= 12:
+        return f"{cnpj_limpo[:2]}.{cnpj_limpo[2:5]}.{cnpj_limpo[5:8]}/{cnpj_limpo[8:]}"
+    else:
+        return f"{cnpj_limpo[:2]}.{cnpj_limpo[2:5]}.{cnpj_limpo[5:8]}/{cnpj_limpo[8:12]}-{cnpj_limpo[12:14]}"
+
+def validar_cnpj(cnpj):
+    """Valida se o CNPJ tem 14 dígitos"""
+    cnpj_limpo = re.sub(r'\D', '', cnpj)
+    return len(cnpj_limpo) == 14
+
 def validar_data_emissao(data_emissao: date) -> bool:
     """Valida se a data de emissão não é futura"""
     return data_emissao <= date.today()
@@ -97,11 +127,10 @@ def obter_icone_status(status: str) -> str:
     }
     return icones.get(status, '❓')
 
-@st.cache_data
 def carregar_locais_aplicacao():
-    """Carrega locais de aplicação do cache"""
-    from database import DatabaseManager
-    db = DatabaseManager()
+    """Carrega locais de aplicação do cache de referências do processo"""
+    from database import obter_database_manager
+    db = obter_database_manager()
     return db.get_locais_aplicacao()
 
 def validar_campos_obrigatorios(nota_data: Dict) -> List[str]: